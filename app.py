@@ -1,9 +1,10 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
 
+from dashboard import cache, timing, warmup
+from dashboard.diagnostics import render as render_diagnostics
+
 # Page config
 st.set_page_config(
     page_title="Crop Yield Volatility Risk Assessment",
@@ -11,6 +12,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Fill the other pages' caches in the background (no-op after the first session)
+warmup.start()
+
 # Professional color palette with high contrast
 COLORS = {
     'primary': '#1f77b4',      # Clear blue
@@ -179,15 +183,12 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # Load data
-@st.cache_data
 def load_data():
     try:
-        predictions = pd.read_csv('data/model_predictions.csv')
-        analysis = pd.read_csv('data/volatility_final_analysis.csv')
-        return predictions, analysis
+        return cache.summary_cube()
     except FileNotFoundError:
         st.error(" Data files not found! Please ensure CSV files are in the 'data/' folder.")
-        return None, None
+        return None
 
 def create_metric_card(label, value, delta, icon="📊"):
     """Create a custom metric card with consistent styling"""
@@ -201,21 +202,25 @@ def create_metric_card(label, value, delta, icon="📊"):
     """, unsafe_allow_html=True)
 
 def main():
+    run = timing.PageRun('home')
+
     # Header
     st.markdown('<div class="main-header"> Crop Yield Volatility Risk Assessment</div>', unsafe_allow_html=True)
     st.markdown('<div class="sub-header">Climate Change Impact on US Agriculture (2005-2023)</div>', unsafe_allow_html=True)
     
     # Load data
-    predictions, analysis = load_data()
+    cube = load_data()
     
-    if predictions is None or analysis is None:
+    if cube is None:
         st.stop()
+    headline = cube['headline'].iloc[0]
+    run.mark('load_data')
     
     # Key metrics row with custom cards
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        high_risk_count = len(predictions[predictions['predicted_high_risk'] == True])
+        high_risk_count = int(headline['predicted_high_risk'])
         create_metric_card(
             "High-Risk Counties",
             str(high_risk_count),
@@ -224,7 +229,7 @@ def main():
         )
     
     with col2:
-        total_counties = predictions['county_fp'].nunique()
+        total_counties = int(headline['total_counties'])
         create_metric_card(
             "Total Counties",
             str(total_counties),
@@ -292,6 +297,8 @@ def main():
         </div>
         """, unsafe_allow_html=True)
     
+    run.mark('overview')
+
     st.markdown("---")
     
     # Risk Distribution Section - ONE VISUALIZATION PER ROW
@@ -300,7 +307,7 @@ def main():
     # First visualization - Pie Chart (full width)
     st.markdown("### Counties by Risk Category")
     
-    risk_counts = analysis['risk_category'].value_counts()
+    risk_counts = cube['risk_counts'][cube['risk_counts']['source'] == 'analysis'].set_index('level')['count']
     # Define a mapping from risk category to color (use exact names in your CSV)
     risk_colors = {
     "High Risk (Increasing)": COLORS['danger'],         # red
@@ -386,8 +393,9 @@ def main():
     # Second visualization - Bar Chart (full width)
     st.markdown("### Top 10 Highest Risk Counties")
     
-    top_risk = analysis.nlargest(10, 'yield_cv_change')[
-        ['county_name', 'state_name', 'crop', 'yield_cv_change']
+    top_counties = cube['top_counties']
+    top_risk = top_counties[(top_counties['source'] == 'analysis') & (top_counties['scope'] == 'all')][
+        ['county_name', 'state_name', 'crop', 'cv_change']
     ].copy()
     
     top_risk.columns = ['County', 'State', 'Crop', 'CV Change (%)']
@@ -454,6 +462,8 @@ def main():
 
     
     st.plotly_chart(fig_bar, use_container_width=True)
+    run.mark('risk_charts')
+    run.finish()
     
 
     
@@ -461,4 +471,8 @@ def main():
     
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Hidden diagnostics view: /?diagnostics=1
+    if 'diagnostics' in st.experimental_get_query_params():
+        render_diagnostics()
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""
+Cold-start profile of the dashboard pages.
+
+Opens each page once in a fresh interpreter started with -X importtime,
+the way the first visitor of a newly started server would: Streamlit and
+its testing API are already imported, everything the page imports or
+loads is not. Reports per page:
+
+    first_run_ms    first script run (imports, cache misses, rendering)
+    second_run_ms   a rerun in the same process (imports and caches warm)
+    import_ms       time spent importing modules during the first run
+    top_imports     the packages that import time went to
+
+With --warm the child runs dashboard.warmup.warm() before opening the
+page, which shows what the first visitor sees once the server's warm-up
+has finished.
+
+Usage:
+    python -m benchmarks.coldstart
+    python -m benchmarks.coldstart --pages risk_map modeler --data-dir benchmarks/data/scale_1
+    python -m benchmarks.coldstart --compare benchmarks/results/coldstart_OLD.json benchmarks/results/coldstart_NEW.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.loadtest import PAGES
+from benchmarks.run import RESULTS_DIR, git_commit
+
+logger = logging.getLogger(__name__)
+
+# Written to stderr by the child between its own imports and the page run
+MARKER = 'coldstart: page start'
+
+# Packages listed per page, by import time
+TOP_IMPORTS = 8
+
+CHILD_SCRIPT = f"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+page, warm, timeout = sys.argv[1], sys.argv[2] == '1', float(sys.argv[3])
+at = AppTest.from_file(page, default_timeout=timeout)
+if warm:
+    from dashboard import warmup
+    warmup.warm()
+sys.stderr.write({MARKER!r} + '\\n')
+sys.stderr.flush()
+
+start = time.perf_counter()
+at.run()
+first = time.perf_counter() - start
+start = time.perf_counter()
+at.run()
+second = time.perf_counter() - start
+print(json.dumps({{'first_run_ms': first * 1000, 'second_run_ms': second * 1000,
+                  'exceptions': [str(e.value)[:200] for e in at.exception]}}))
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Per-package import time after MARKER from -X importtime output.
+
+    Returns:
+        (total_ms, {top-level package: self ms})
+    """
+    lines = stderr.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1:]
+
+    packages = defaultdict(float)
+    for line in lines:
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        try:
+            self_us = int(fields[0])
+        except ValueError:
+            continue  # column header
+        packages[fields[2].strip().split('.')[0]] += self_us / 1000
+    return sum(packages.values()), dict(packages)
+
+
+def profile_page(page, warm=False, timeout=120, data_dir=None):
+    """Cold-start profile of one page (see module docstring)."""
+    env = dict(os.environ)
+    if data_dir is not None:
+        env['DASHBOARD_DATA_DIR'] = str(data_dir)
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT, PAGES[page], '1' if warm else '0', str(timeout)],
+        capture_output=True, text=True, env=env, timeout=timeout * 3,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{page} failed: {result.stderr.strip().splitlines()[-1:]}")
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    import_ms, packages = parse_importtime(result.stderr)
+    top = sorted(packages.items(), key=lambda item: -item[1])[:TOP_IMPORTS]
+    return {
+        'page': page,
+        **timings,
+        'import_ms': import_ms,
+        'top_imports': {name: round(ms, 1) for name, ms in top},
+    }
+
+
+def run_coldstart(pages=None, warm=False, timeout=120, data_dir=None):
+    """Profile each page in its own fresh process."""
+    results = []
+    for page in pages or PAGES:
+        logger.info(f"Profiling {page}")
+        results.append(profile_page(page, warm=warm, timeout=timeout, data_dir=data_dir))
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'warm': warm,
+        'data_dir': str(data_dir) if data_dir else None,
+        'results': results,
+    }
+
+
+def compare(baseline_path, candidate_path):
+    """First-run and import time per page, baseline vs candidate."""
+    frames = []
+    for path in (baseline_path, candidate_path):
+        with open(path) as f:
+            frames.append(pd.DataFrame(json.load(f)['results'])[['page', 'first_run_ms', 'import_ms']])
+
+    table = frames[0].merge(frames[1], on='page', suffixes=('_baseline', '_candidate'))
+    table['first_run_ratio'] = table['first_run_ms_candidate'] / table['first_run_ms_baseline']
+    return table
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Profile cold-start imports and first run of each dashboard page.")
+    parser.add_argument('--pages', nargs='*', choices=list(PAGES), help="Only profile these pages (default: all)")
+    parser.add_argument('--warm', action='store_true', help="Run the server warm-up before opening each page")
+    parser.add_argument('--data-dir', help="Data directory for the pages, e.g. benchmarks/data/scale_1")
+    parser.add_argument('--timeout', type=float, default=120, help="Per-run timeout in seconds")
+    parser.add_argument('--output', help="Result JSON path (default: benchmarks/results/coldstart_<commit>_<time>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'),
+                        help="Compare two saved results instead of profiling")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    if args.compare:
+        table = compare(*args.compare)
+        print(table.to_string(index=False, float_format='%.1f'))
+        return table
+
+    report = run_coldstart(pages=args.pages, warm=args.warm, timeout=args.timeout, data_dir=args.data_dir)
+    output = Path(args.output) if args.output else RESULTS_DIR / (
+        f"coldstart_{report['commit'] or 'nogit'}_{report['timestamp'].replace(':', '')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for result in report['results']:
+        top = ', '.join(f'{name} {ms:.0f}' for name, ms in result['top_imports'].items())
+        print(f"{result['page']:<18} first {result['first_run_ms']:7.0f} ms  rerun {result['second_run_ms']:6.0f} ms  "
+              f"imports {result['import_ms']:6.0f} ms  ({top})")
+        for exception in result['exceptions']:
+            print(f"{'':<18} exception: {exception}")
+    print(f"Saved: {output}")
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,425 @@
+"""
+Headless multi-session load test for the Streamlit dashboard.
+
+Drives app.py and every page in pages/ through Streamlit's script-testing
+API (streamlit.testing.v1.AppTest). Each simulated session loads a page
+and then runs a scripted interaction on it: slider drags on the Modeler,
+county and crop switches on the County Explorer, searches on the Risk Map.
+AppTest swaps a process-global mock runtime on every run, so sessions
+cannot share one process: each simulated session runs in its own worker
+process. Caches are therefore per session (the first load of each session
+is a cold cache miss, later reruns hit), and peak RSS is reported both per
+session and summed over all sessions.
+
+AppTest cannot run the pinned streamlit-folium component (it passes a
+callback that Streamlit fails to serialise), so the session workers
+replace st_folium with _render_folium. That still renders the map to
+HTML and sends it as a component, so the map build and its payload are
+timed. Reruns that fail anyway are counted per page and action in the
+summary, and the command exits non-zero when there are any.
+
+With --mode static the same sessions browse the static export
+(dashboard/export.py) instead, served by a threaded static file server
+in this process. Like a browser, each session keeps one connection
+open to the server. A page load fetches the viewer, plotly.js and that
+view's JSON. A County Explorer switch fetches one county file. Risk Map
+search and other interactions happen in the browser and need no
+requests, so only county switches count as reruns after the load.
+Peak RSS then measures the simulated clients, not the server.
+server_cpu_s is the CPU spent serving in both modes: the session
+processes' CPU for Streamlit, and the file server's CPU for static.
+
+Usage:
+    python -m benchmarks.loadtest --sessions 16 --steps 10
+    python -m benchmarks.loadtest --sessions 32 --pages risk_map modeler
+    python -m benchmarks.loadtest --data-dir benchmarks/data/scale_10
+    python -m benchmarks.loadtest --mode static --data-dir benchmarks/data/scale_1
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import platform
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.run import RESULTS_DIR, git_commit
+from dashboard import data
+from dashboard.export import export_site
+from dashboard.timing import peak_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+PAGES = {
+    'home': 'app.py',
+    'risk_map': 'pages/1_Risk_Map.py',
+    'county_explorer': 'pages/2_County_Explorer.py',
+    'modeler': 'pages/3_Volatility_Impact_Modeler.py',
+    'analytics': 'pages/4_Analytics.py',
+    'model_performance': 'pages/5_Model_Performance.py',
+}
+
+# Share of sessions opening each page; the Risk Map and Modeler see most traffic
+PAGE_WEIGHTS = {
+    'home': 0.10,
+    'risk_map': 0.30,
+    'county_explorer': 0.15,
+    'modeler': 0.30,
+    'analytics': 0.10,
+    'model_performance': 0.05,
+}
+
+SEARCH_TERMS = ['iowa', 'st', 'lincoln', 'ill', 'wash', 'co', '']
+
+MB = 1024 ** 2
+
+# Files a browser fetches on the first static page load (cached afterwards)
+STATIC_ASSETS = ['index.html', 'viewer.js', 'viewer.css', 'plotly.min.js', 'data/manifest.json']
+
+# Static views and the JSON each one loads
+STATIC_VIEWS = {
+    'home': ['data/summary/headline.json', 'data/summary/risk_counts.json', 'data/summary/top_counties.json'],
+    'risk_map': ['data/summary/headline.json', 'data/summary/county_risk.json', 'data/summary/state_summary.json',
+                 'data/summary/prediction_table.json', 'data/geo/counties.json'],
+    'county_explorer': ['data/counties.json'],
+}
+
+
+def _drag_slider(at, rng):
+    """Move one Modeler slider to a random position on its own step grid."""
+    if not len(at.slider):
+        return 'rerun'
+    slider = at.slider[rng.integers(len(at.slider))]
+    n_steps = int(round((slider.max - slider.min) / slider.step))
+    value = slider.min + rng.integers(n_steps + 1) * slider.step
+    slider.set_value(type(slider.value)(round(value, 6)))
+    return 'slider_drag'
+
+
+def _switch_county(at, rng):
+    """Pick another county, or another crop for the current county."""
+    if len(at.selectbox) < 2:
+        return 'rerun'
+    if rng.random() < 0.75 or len(at.selectbox[1].options) < 2:
+        box, action = at.selectbox[0], 'county_switch'
+    else:
+        box, action = at.selectbox[1], 'crop_switch'
+    box.set_value(box.options[rng.integers(len(box.options))])
+    return action
+
+
+def _search(at, rng):
+    """Type a query into the Risk Map county/state search box."""
+    if not len(at.text_input):
+        return 'rerun'
+    at.text_input[0].input(SEARCH_TERMS[rng.integers(len(SEARCH_TERMS))])
+    return 'search'
+
+
+# Page -> interaction applied before each rerun after the initial load
+INTERACTIONS = {
+    'risk_map': _search,
+    'county_explorer': _switch_county,
+    'modeler': _drag_slider,
+}
+
+
+def _render_folium(fig, height=700, width=None, **kwargs):
+    """Stand-in for streamlit_folium.st_folium under AppTest: render the map and send it as HTML."""
+    import streamlit.components.v1 as components
+    components.html(fig.get_root().render(), height=height, width=width)
+    return {}
+
+
+def run_session(session_id, page, steps, seed, timeout, data_dir=None):
+    """
+    Load a page and run its interaction script for one simulated session.
+
+    Returns:
+        (records, peak_rss_bytes, cpu_s): one dict with page, action, latency
+        and error per rerun, the worker process's peak RSS, and the CPU
+        seconds the session's reruns used
+    """
+    if data_dir is not None:
+        data.DATA_DIR = str(data_dir)
+    # The page imports st_folium on every run, so it picks up the stand-in
+    import streamlit_folium
+    streamlit_folium.st_folium = _render_folium
+
+    cpu_start = time.process_time()
+    rng = np.random.default_rng(seed)
+    records = []
+
+    def timed_run(at, action):
+        start = time.perf_counter()
+        error = None
+        try:
+            at.run(timeout=timeout)
+            if at.exception:
+                error = at.exception[0].value
+        except Exception as e:
+            error = str(e)
+        records.append({
+            'session': session_id, 'page': page, 'action': action,
+            'latency_ms': (time.perf_counter() - start) * 1000, 'error': error,
+        })
+        return error is None
+
+    at = AppTest.from_file(PAGES[page], default_timeout=timeout)
+    if timed_run(at, 'load'):
+        interact = INTERACTIONS.get(page)
+        for _ in range(steps):
+            action = interact(at, rng) if interact else 'rerun'
+            if not timed_run(at, action):
+                break
+
+    return records, peak_rss_bytes(), time.process_time() - cpu_start
+
+
+def run_static_session(session_id, page, steps, seed, timeout, site):
+    """
+    Browse one static view and switch counties, fetching what a browser would.
+
+    Args:
+        site: {'url': server base URL, 'views': STATIC_VIEWS limited to files
+            present in the export}
+
+    Returns:
+        (records, peak_rss_bytes, cpu_s) like run_session; cpu_s is 0 since
+        the serving happens in the file server
+    """
+    rng = np.random.default_rng(seed)
+    url = urlsplit(site['url'])
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=timeout)
+    records = []
+
+    def get(path):
+        conn.request('GET', f'/{path}')
+        response = conn.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise OSError(f'HTTP {response.status} for /{path}')
+        return body
+
+    def timed_fetch(paths, action):
+        start = time.perf_counter()
+        error, size = None, 0
+        try:
+            for path in paths:
+                size += len(get(path))
+        except Exception as e:
+            conn.close()  # Reconnects on the next request
+            error = str(e)
+        records.append({
+            'session': session_id, 'page': page, 'action': action,
+            'latency_ms': (time.perf_counter() - start) * 1000, 'error': error, 'bytes': size,
+        })
+        return error is None
+
+    if timed_fetch(STATIC_ASSETS + site['views'][page], 'load') and page == 'county_explorer':
+        counties = json.loads(get('data/counties.json'))
+        for _ in range(steps):
+            county = counties[rng.integers(len(counties))]
+            if not timed_fetch([f"data/county/{county['fips']}.json"], 'county_switch'):
+                break
+    conn.close()
+
+    return records, peak_rss_bytes(), 0.0
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    # Keep-alive, as browsers and real static hosts use; without Nagle, the
+    # body written after the headers is not held back for a delayed ACK (~40 ms)
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StaticServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 overflows with many sessions connecting at once,
+    # and the 1 s SYN retry would be timed instead of the serving
+    request_queue_size = 256
+
+
+def serve_static(directory):
+    """Start a threaded static file server for directory on a free localhost port."""
+    server = _StaticServer(('127.0.0.1', 0), partial(_QuietHandler, directory=str(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def summarize(records):
+    """Latency percentiles of successful reruns and error counts per page and action, plus an overall row."""
+    frame = pd.DataFrame(records)
+    failed = frame['error'].notna()
+
+    def percentiles(group):
+        latencies = group['latency_ms'].to_numpy()
+        if not len(latencies):
+            return pd.Series({'reruns': 0, 'p50_ms': np.nan, 'p95_ms': np.nan, 'p99_ms': np.nan, 'max_ms': np.nan})
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return pd.Series({'reruns': len(latencies), 'p50_ms': p50, 'p95_ms': p95,
+                          'p99_ms': p99, 'max_ms': latencies.max()})
+
+    if frame.empty:
+        return pd.DataFrame(columns=['page', 'action', 'reruns', 'errors', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+
+    # Pages whose reruns all failed keep a row, with their error count and no latencies
+    groups = frame.groupby(['page', 'action'])
+    by_action = groups.apply(lambda group: percentiles(group[group['error'].isna()])).reset_index()
+    by_action.insert(3, 'errors', groups['error'].count().to_numpy())
+    overall = percentiles(frame[~failed]).to_frame().T.assign(page='all', action='all', errors=int(failed.sum()))
+    table = pd.concat([by_action, overall], ignore_index=True)
+    table[['reruns', 'errors']] = table[['reruns', 'errors']].astype(int)
+    return table
+
+
+def run_loadtest(sessions=16, steps=10, pages=None, seed=42, timeout=120, data_dir=None,
+                 mode='streamlit', static_dir=None):
+    """
+    Run concurrent simulated sessions against the dashboard.
+
+    Args:
+        sessions: Number of concurrent sessions
+        steps: Interactions per session after the initial page load
+        pages: Restrict sessions to these page names (default: weighted mix of all pages)
+        seed: Random seed for page choice and interactions
+        timeout: Per-rerun timeout in seconds
+        data_dir: Data directory the pages read (default: DASHBOARD_DATA_DIR or data/)
+        mode: 'streamlit' (AppTest sessions) or 'static' (HTTP against the static export)
+        static_dir: Existing static export for mode='static' (default: export data_dir
+            to a temporary directory first)
+
+    Returns:
+        Result dict with per-page/action latency summary, errors, RSS and serving CPU
+    """
+    rng = np.random.default_rng(seed)
+    available = STATIC_VIEWS if mode == 'static' else PAGES
+    names = [name for name in (pages or PAGE_WEIGHTS) if name in available]
+    weights = np.array([PAGE_WEIGHTS[name] for name in names])
+    plan = rng.choice(names, size=sessions, p=weights / weights.sum())
+
+    server = tmp = None
+    if mode == 'static':
+        if static_dir is None:
+            tmp = tempfile.TemporaryDirectory()
+            static_dir = Path(tmp.name) / 'site'
+            export_site(data_dir, static_dir)
+        server = serve_static(static_dir)
+        site = {
+            'url': f'http://127.0.0.1:{server.server_address[1]}',
+            'views': {view: [path for path in paths if (Path(static_dir) / path).exists()]
+                      for view, paths in STATIC_VIEWS.items()},
+        }
+        session_args = [(run_static_session, site)] * sessions
+    else:
+        session_args = [(run_session, data_dir)] * sessions
+
+    server_cpu_start = time.process_time()
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=sessions) as pool:
+            futures = [pool.submit(fn, i, page, steps, seed + i, timeout, arg)
+                       for i, (page, (fn, arg)) in enumerate(zip(plan, session_args))]
+            results = [future.result() for future in futures]
+    finally:
+        elapsed = time.perf_counter() - start
+        server_cpu = time.process_time() - server_cpu_start
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        if tmp is not None:
+            tmp.cleanup()
+
+    records = [record for session_records, _, _ in results for record in session_records]
+    # NaN where peak RSS is unavailable (no `resource` module on Windows)
+    peaks = np.array([peak for _, peak, _ in results], dtype=float)
+    if mode != 'static':
+        server_cpu = sum(cpu for _, _, cpu in results)
+
+    errors = [r for r in records if r['error'] is not None]
+    for record in errors[:5]:
+        logger.warning(f"Session {record['session']} {record['page']}/{record['action']}: {record['error']}")
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'mode': mode,
+        'sessions': sessions,
+        'steps': steps,
+        'data_dir': str(data_dir or data.DATA_DIR),
+        'pages': dict(pd.Series(plan).value_counts()),
+        'reruns': len(records),
+        'errors': len(errors),
+        'elapsed_s': elapsed,
+        'reruns_per_s': len(records) / elapsed,
+        'peak_rss_per_session_mb': peaks.max() / MB,
+        'peak_rss_total_mb': peaks.sum() / MB,
+        'server_cpu_s': server_cpu,
+        'bytes_served_mb': sum(r.get('bytes', 0) for r in records) / MB,
+        'latency': summarize(records).to_dict('records'),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load-test the dashboard with concurrent simulated sessions.")
+    parser.add_argument('--sessions', type=int, default=16)
+    parser.add_argument('--steps', type=int, default=10,
+                        help="Interactions per session after the first page load")
+    parser.add_argument('--pages', nargs='*', choices=list(PAGES),
+                        help="Only open these pages (default: weighted mix of all pages)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', help="Data directory for the pages, e.g. benchmarks/data/scale_10")
+    parser.add_argument('--mode', choices=['streamlit', 'static'], default='streamlit',
+                        help="Drive the Streamlit pages, or browse the static export over HTTP")
+    parser.add_argument('--static-dir', help="Existing static export for --mode static (default: export --data-dir)")
+    parser.add_argument('--timeout', type=float, default=120, help="Per-rerun timeout in seconds")
+    parser.add_argument('--output', help="Result JSON path (default: benchmarks/results/loadtest_<mode>_<commit>_<time>.json)")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    report = run_loadtest(sessions=args.sessions, steps=args.steps, pages=args.pages,
+                          seed=args.seed, timeout=args.timeout, data_dir=args.data_dir,
+                          mode=args.mode, static_dir=args.static_dir)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / (
+        f"loadtest_{report['mode']}_{report['commit'] or 'nogit'}_{report['timestamp'].replace(':', '')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, default=int)
+
+    print(pd.DataFrame(report['latency']).to_string(index=False, float_format='%.1f'))
+    print(f"\n{report['sessions']} sessions, {report['reruns']} reruns ({report['errors']} errors) "
+          f"in {report['elapsed_s']:.1f}s = {report['reruns_per_s']:.1f} reruns/s")
+    print(f"Peak RSS: {report['peak_rss_per_session_mb']:.0f} MB per session (max), "
+          f"{report['peak_rss_total_mb']:.0f} MB over all sessions")
+    print(f"Serving CPU: {report['server_cpu_s']:.2f}s ({report['mode']})")
+    print(f"Saved: {output}")
+    if report['errors']:
+        raise SystemExit(f"{report['errors']} reruns failed (see the errors column)")
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
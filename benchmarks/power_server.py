@@ -0,0 +1,161 @@
+"""
+Local stand-in for POWER's monthly regional endpoint.
+
+Serves grid.synthetic_values() on the MERRA-2 lattice (points every 0.5
+degrees of latitude and 0.625 of longitude) over EXTENT. Responses use
+the regional FeatureCollection format that pipeline.power parses,
+including the annual (month 13) entries and FILL_VALUE outside EXTENT.
+Boxes outside POWER's 2-10 degree limits are rejected the same way.
+This lets the bulk download, its cache and the interpolation run offline.
+
+Usage:
+    python -m benchmarks.power_server --port 8765
+    python -m pipeline.power --base-url http://127.0.0.1:8765/api/temporal/monthly/regional
+"""
+
+import argparse
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from pipeline.grid import POWER_DLAT, POWER_DLON, Grid, monthly_times, synthetic_values
+from pipeline.power import FILL_VALUE, REGION_MAX_DEGREES, REGION_MIN_DEGREES
+
+logger = logging.getLogger(__name__)
+
+PATH = '/api/temporal/monthly/regional'
+
+# (lat_min, lat_max, lon_min, lon_max) with synthetic values; the contiguous US and margins
+EXTENT = (20.0, 55.0, -130.0, -60.0)
+YEARS = (1981, 2023)
+
+
+class SyntheticRegions:
+    """Synthetic monthly fields on the MERRA-2 point lattice."""
+
+    def __init__(self, extent=EXTENT, years=YEARS):
+        lat_min, lat_max, lon_min, lon_max = extent
+        ny = int(round((lat_max - lat_min) / POWER_DLAT)) + 1
+        nx = int(round((lon_max - lon_min) / POWER_DLON)) + 1
+        # Grid cells centered on the lattice points
+        self.grid = Grid(lat_min - POWER_DLAT / 2, lon_min - POWER_DLON / 2, POWER_DLAT, POWER_DLON, ny, nx)
+        self.times = monthly_times(*years)
+        self.values = synthetic_values(self.grid, self.times)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def response(self, params):
+        """
+        Regional FeatureCollection for one request.
+
+        Args:
+            params: Query parameters (single values)
+
+        Raises:
+            ValueError: For a missing or unknown parameter or a box outside the size limits
+        """
+        with self._lock:
+            self.requests += 1
+        variable = params['parameters']
+        if variable not in self.values:
+            raise ValueError(f"Unknown parameter {variable}")
+        lat_min, lat_max = float(params['latitude-min']), float(params['latitude-max'])
+        lon_min, lon_max = float(params['longitude-min']), float(params['longitude-max'])
+        for low, high in [(lat_min, lat_max), (lon_min, lon_max)]:
+            if not REGION_MIN_DEGREES <= high - low <= REGION_MAX_DEGREES:
+                raise ValueError(f"Regional extent must be {REGION_MIN_DEGREES:g}-{REGION_MAX_DEGREES:g} degrees")
+        start, end = int(params['start']), int(params['end'])
+
+        # Lattice points in the box, on the same 0.5 x 0.625 multiples as POWER
+        lat = np.arange(np.ceil(lat_min / POWER_DLAT), np.floor(lat_max / POWER_DLAT) + 1) * POWER_DLAT
+        lon = np.arange(np.ceil(lon_min / POWER_DLON), np.floor(lon_max / POWER_DLON) + 1) * POWER_DLON
+        i = np.round((lat - self.grid.lat[0]) / POWER_DLAT).astype(int)
+        j = np.round((lon - self.grid.lon[0]) / POWER_DLON).astype(int)
+        t = (self.times // 100 >= start) & (self.times // 100 <= end)
+        years = np.arange(start, end + 1)
+
+        features = []
+        for row, point_lat in zip(i, lat):
+            for col, point_lon in zip(j, lon):
+                if 0 <= row < self.grid.ny and 0 <= col < self.grid.nx:
+                    monthly = self.values[variable][t, row, col].astype(float).round(2)
+                else:
+                    monthly = np.full(t.sum(), FILL_VALUE, dtype=float)
+                series = dict(zip(map(str, self.times[t]), monthly.tolist()))
+                for year, annual in zip(years, monthly.reshape(len(years), 12).mean(axis=1)):
+                    series[f'{year}13'] = round(float(annual), 2)
+                features.append({
+                    'type': 'Feature',
+                    'geometry': {'type': 'Point', 'coordinates': [float(point_lon), float(point_lat), 0.0]},
+                    'properties': {'parameter': {variable: series}},
+                })
+        return {'type': 'FeatureCollection', 'features': features,
+                'parameters': {variable: {'units': 'synthetic'}}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    regions = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != PATH:
+            self._send(404, {'messages': [f"Unknown path {url.path}"]})
+            return
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            self._send(200, self.regions.response(params))
+        except (KeyError, ValueError) as e:
+            self._send(422, {'messages': [str(e)]})
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=0, regions=None):
+    """
+    Start the stand-in server in a daemon thread.
+
+    Returns:
+        (server, url): the ThreadingHTTPServer and its regional endpoint URL;
+        server.regions counts the requests served
+    """
+    regions = regions or SyntheticRegions()
+    handler = type('Handler', (_Handler,), {'regions': regions})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.regions = regions
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}{PATH}'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve synthetic POWER regional blocks locally.")
+    parser.add_argument('--port', type=int, default=8765)
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    server, url = serve(args.port)
+    print(f"Serving synthetic POWER regional blocks at {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
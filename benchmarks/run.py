@@ -0,0 +1,439 @@
+"""
+Benchmark the dashboard and pipeline hot paths on synthetic data.
+
+Each benchmark runs against benchmarks/data/scale_<k>/ (generated on
+demand) and results are written as JSON tagged with the git commit, so
+runs from different commits can be diffed with --compare.
+
+Usage:
+    python -m benchmarks.run --scales 1 10
+    python -m benchmarks.run --only risk_map load_data --repeat 5
+    python -m benchmarks.run --compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate, make_daily_climate, scale_dir
+from dashboard import data
+from dashboard.search import SearchIndex
+from pipeline import grid, spatial, summary
+from pipeline import reports
+from pipeline.analogs import AnalogIndex
+from pipeline.bootstrap import RiskBootstrap
+from pipeline.daily import DailyClimate
+from pipeline.dependence import DependenceCurves
+from pipeline.merger import CropYieldDataMerger
+from pipeline.schema import feature_matrix
+from pipeline.surrogate import SliderSurrogate
+from pipeline.tipping import TippingPoints
+from pipeline.volatility import VolatilityAnalyzer
+from pipeline.windows import YieldWindows
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = Path('benchmarks/results')
+
+# Exact, short-prefix and misspelled Risk Map searches
+SEARCH_QUERIES = ['st louis', 'iowa', 'st', 'washingtn']
+
+# Default Modeler page slider values
+MODELER_INPUTS = pd.DataFrame({
+    'T2M_mean_change': [1.0], 'T2M_std_change': [2.0], 'T2M_max_change': [2.0],
+    'extreme_heat_days_change': [3], 'RH2M_mean_change': [-2.0],
+    'NDVI_mean_change': [-0.05], 'NDVI_std_change': [0.05],
+    'early_yield_mean': [140.0], 'early_yield_cv': [10.0], 'crop_soybean': [0],
+})
+
+
+# ----------------------------------------------------------------------
+# Hot paths. The page-level ones mirror the code in pages/ step for step.
+# ----------------------------------------------------------------------
+
+def risk_map_prepare(cube):
+    """pages/1_Risk_Map.py: headline metrics, county and state tables from the summary cube."""
+    filtered_data = cube['prediction_table']
+    headline = cube['headline'].iloc[0]
+    int(headline['predicted_high_risk'])
+    county_agg = cube['county_risk']
+
+    state_summary = cube['state_summary'][cube['state_summary']['source'] == 'predictions']
+    state_summary[state_summary['high_risk_count'] > 0] \
+        .set_index('state_name')['high_risk_count'].sort_values(ascending=False).head(10)
+    state_summary.set_index('state_name')['mean_cv_change'].sort_values(ascending=False).head(10)
+    return filtered_data, county_agg
+
+
+def risk_map_folium(county_agg, geojson):
+    """pages/1_Risk_Map.py: choropleth plus one tooltip layer per county, rendered to HTML."""
+    import folium
+
+    county_data = county_agg.set_index('fips')[
+        ['predicted_cv_change', 'county_name', 'state_name', 'crop']
+    ].to_dict('index')
+
+    m = folium.Map(location=[39.8283, -98.5795], zoom_start=4, tiles='OpenStreetMap')
+    folium.GeoJson(
+        geojson,
+        style_function=lambda feature: {'fillOpacity': 0.7 if feature['id'] in county_data else 0},
+    ).add_to(m)
+
+    for feature in geojson['features']:
+        if feature['id'] in county_data:
+            row = county_data[feature['id']]
+            folium.GeoJson(
+                feature,
+                style_function=lambda x: {'fillColor': 'transparent', 'color': 'transparent', 'weight': 0},
+                tooltip=folium.Tooltip(
+                    f"<b>{row['county_name']}, {row['state_name']}</b><br>"
+                    f"CV Change: <b>{row['predicted_cv_change']:.2f}%</b>",
+                    sticky=True
+                )
+            ).add_to(m)
+
+    return m.get_root().render()
+
+
+def risk_map_search(filtered_data, search_index, queries=SEARCH_QUERIES):
+    """pages/1_Risk_Map.py: search box lookups through the name index (table is pre-sorted)."""
+    for search in queries:
+        row_ids, _ = search_index.search(search)
+        filtered_data.iloc[row_ids].head(50)
+
+
+def county_explorer_filter(analysis, merged_data, windows):
+    """pages/2_County_Explorer.py: county list, selection filters and rolling volatility."""
+    county_list = analysis.apply(
+        lambda x: f"{x['county_name']}, {x['state_name']}", axis=1
+    ).unique().tolist()
+    county_list.sort()
+    county_name, state_name = county_list[len(county_list) // 2].split(", ")
+
+    county_data = analysis[
+        (analysis['county_name'] == county_name) &
+        (analysis['state_name'] == state_name)
+    ]
+    selected_crop = county_data['crop'].unique().tolist()[0]
+
+    hist_data = merged_data[
+        (merged_data['county_name'] == county_name) &
+        (merged_data['state_name'] == state_name) &
+        (merged_data['crop'] == selected_crop)
+    ].sort_values('year')
+    windows.rolling(3)
+
+    analysis[
+        (analysis['state_name'] == state_name) &
+        (analysis['crop'] == selected_crop)
+    ]['yield_cv_change'].mean()
+
+
+def analogs_query(analog_index, analysis, queries=20):
+    """pages/2_County_Explorer.py and the Modeler: nearest analog counties for several county-crops."""
+    step = max(1, len(analysis) // queries)
+    for _, row in analysis.iloc[::step].head(queries).iterrows():
+        analog_index.query(row, row['crop'], exclude=(row['state_fp'], row['county_fp']))
+
+
+def reports_render(shared, count=50):
+    """pipeline/reports.py: render county-crop reports in memory (one worker's share)."""
+    analysis = shared['analysis']
+    for position in range(min(count, len(analysis))):
+        reports.render_report(analysis.iloc[position], shared)
+
+
+def modeler_predict(model, calls=50):
+    """pages/3_Volatility_Impact_Modeler.py: single-row feature build and predict."""
+    for _ in range(calls):
+        model.predict(feature_matrix(MODELER_INPUTS, fill_derived=True))
+
+
+def modeler_surrogate(surrogate, calls=1000):
+    """Live slider estimate: surrogate lookups for one drag's worth of pointer moves."""
+    values = MODELER_INPUTS.iloc[0].to_dict()
+    for i in range(calls):
+        values['T2M_std_change'] = -1.0 + (i % 61) * 0.1
+        surrogate.predict(values)
+
+
+def analytics_state_summary(cube):
+    """pages/4_Analytics.py: state ranking from the summary cube."""
+    state_summary = cube['state_summary']
+    state_summary = state_summary[state_summary['source'] == 'analysis'][['state_name', 'mean_cv_change', 'count']]
+    state_summary.columns = ['State', 'Avg CV Change', 'Counties']
+    state_summary = state_summary[state_summary['Counties'] >= 3]
+    state_summary.nlargest(10, 'Avg CV Change')
+    state_summary.nsmallest(10, 'Avg CV Change')
+
+
+def home_summary(cube):
+    """app.py: risk category counts and top-10 table from the summary cube."""
+    cube['risk_counts'][cube['risk_counts']['source'] == 'analysis'].set_index('level')['count']
+    top_counties = cube['top_counties']
+    top_counties[(top_counties['source'] == 'analysis') & (top_counties['scope'] == 'all')][
+        ['county_name', 'state_name', 'crop', 'cv_change']
+    ]
+
+
+def analyzer_loop(merged_data):
+    """VolatilityAnalyzer per-group metrics and climate trends, as in the notebook."""
+    analyzer = VolatilityAnalyzer()
+    analyzer.data = merged_data
+    analyzer.merge_volatility_and_trends()
+
+
+def analyzer_running_state(merged_data):
+    """VolatilityAnalyzer vectorized running-sum path."""
+    analyzer = VolatilityAnalyzer()
+    analyzer.data = merged_data
+    analyzer.build_running_state()
+    analyzer.analysis_from_state()
+
+
+def merger_merge(data_dir):
+    """CropYieldDataMerger.load_data + merge_datasets on the raw synthetic inputs."""
+    data_dir = Path(data_dir)
+    merger = CropYieldDataMerger()
+    merger.load_data(
+        climate_path=data_dir / 'us_county_climate_data.csv',
+        satellite_path=data_dir / 'us_county_modis_data.csv',
+        corn_yield_path=data_dir / 'corn_yield_data.csv',
+        soybean_yield_path=data_dir / 'soybeans_yield_data.csv'
+    )
+    merger.merge_datasets()
+
+
+def merger_merge_chunked(data_dir):
+    """CropYieldDataMerger.merge_datasets_chunked on the raw synthetic inputs."""
+    data_dir = Path(data_dir)
+    CropYieldDataMerger().merge_datasets_chunked(
+        climate_path=data_dir / 'us_county_climate_data.csv',
+        satellite_path=data_dir / 'us_county_modis_data.csv',
+        corn_yield_path=data_dir / 'corn_yield_data.csv',
+        soybean_yield_path=data_dir / 'soybeans_yield_data.csv'
+    )
+
+
+def daily_records(daily):
+    """Long-format daily POWER records (one row per county-day) from dense arrays."""
+    n_counties, n_years, n_days = daily.tmax.shape
+    season = pd.date_range('2001-04-01', periods=n_days)
+    month_day = (season.month * 100 + season.day).to_numpy()
+    date = daily.years[None, :, None] * 10000 + month_day[None, None, :]
+    return pd.DataFrame({
+        'state_fp': np.repeat(daily.keys['state_fp'].to_numpy(), n_years * n_days),
+        'county_fp': np.repeat(daily.keys['county_fp'].to_numpy(), n_years * n_days),
+        'date': np.broadcast_to(date, daily.tmax.shape).ravel(),
+        'T2M_MAX': daily.tmax.ravel(),
+        'T2M_MIN': daily.tmin.ravel(),
+    })
+
+
+def build_benchmarks(data_dir):
+    """Name -> zero-argument callable for one scale's data directory."""
+    predictions = data.read_predictions(data_dir)
+    analysis = data.read_analysis(data_dir)
+    merged_data = data.read_merged(data_dir)
+    model = data.read_model()
+    with open(Path(data_dir) / 'counties.geojson') as f:
+        geojson = json.load(f)
+    cube = data.read_summary_cube(data_dir)
+    filtered_data, county_agg = risk_map_prepare(cube)
+    search_index = SearchIndex.from_frame(filtered_data)
+    windows = YieldWindows(merged_data)
+    fips, neighbors = spatial.neighbor_matrix(geojson)
+    analog_index = AnalogIndex.build(analysis)
+    climate_grid = grid.Grid.covering(geojson)
+    _, grid_weights = grid.overlap_weights(geojson, climate_grid)
+    grid_t2m = grid.synthetic_values(climate_grid, grid.monthly_times(2005, 2023))['T2M']
+    report_data = reports.load_report_data(data_dir)
+    surrogate = SliderSurrogate.build(model, MODELER_INPUTS.iloc[0].to_dict())
+
+    benchmarks = {
+        'load_data.home': lambda: data.read_summary_cube(data_dir),
+        'load_data.risk_map': lambda: data.read_summary_cube(data_dir),
+        'load_data.county_explorer': lambda: (data.read_analysis(data_dir), data.read_merged(data_dir)),
+        'load_data.modeler': lambda: data.read_model(),
+        'load_data.analytics': lambda: (data.read_analysis(data_dir),
+                                        data.read_feature_importance(data_dir),
+                                        data.read_summary_cube(data_dir)),
+        'load_data.model_performance': lambda: (data.read_model_metrics(data_dir),
+                                                data.read_predictions(data_dir)),
+        'summary.build': lambda: summary.build_summary(predictions, analysis),
+        'home.summary': lambda: home_summary(cube),
+        'risk_map.prepare': lambda: risk_map_prepare(cube),
+        'risk_map.folium': lambda: risk_map_folium(county_agg, geojson),
+        'risk_map.search_index': lambda: SearchIndex.from_frame(filtered_data),
+        'risk_map.search_x4': lambda: risk_map_search(filtered_data, search_index),
+        'county_explorer.filter': lambda: county_explorer_filter(analysis, merged_data, windows),
+        'spatial.neighbors': lambda: spatial.neighbor_matrix(geojson),
+        'spatial.morans_i': lambda: spatial.build_spatial(predictions, analysis, fips, neighbors),
+        'grid.weights': lambda: grid.overlap_weights(geojson, climate_grid),
+        'grid.series': lambda: grid.county_series(grid_weights, grid_t2m),
+        'analogs.build': lambda: AnalogIndex.build(analysis),
+        'analogs.load': lambda: data.read_analog_index(data_dir),
+        'analogs.query_x20': lambda: analogs_query(analog_index, analysis),
+        'tipping.build': lambda: TippingPoints.build(model, analysis),
+        'tipping.load': lambda: data.read_tipping(data_dir),
+        'reports.load_data': lambda: reports.load_report_data(data_dir),
+        'reports.render_x50': lambda: reports_render(report_data),
+        'windows.build': lambda: YieldWindows(merged_data),
+        'bootstrap.build': lambda: RiskBootstrap.build(merged_data),
+        'bootstrap.load': lambda: data.read_risk_bootstrap(data_dir),
+        'windows.compare': lambda: windows.compare((2008, 2012), (2018, 2023)),
+        'modeler.predict_x50': lambda: modeler_predict(model),
+        'modeler.surrogate_build': lambda: SliderSurrogate.build(model, MODELER_INPUTS.iloc[0].to_dict()),
+        'modeler.surrogate_x1000': lambda: modeler_surrogate(surrogate),
+        'analytics.state_summary': lambda: analytics_state_summary(cube),
+        'analytics.dependence_build': lambda: DependenceCurves.build(model, analysis),
+        'analytics.dependence_load': lambda: data.read_dependence(data_dir),
+        'analyzer.loop': lambda: analyzer_loop(merged_data),
+        'analyzer.running_state': lambda: analyzer_running_state(merged_data),
+    }
+    if (Path(data_dir) / 'us_county_climate_data.csv').exists():
+        benchmarks['merger.merge_datasets'] = lambda: merger_merge(data_dir)
+        benchmarks['merger.merge_chunked'] = lambda: merger_merge_chunked(data_dir)
+        # Daily records only exist in memory; like the raw inputs, skipped at large scales
+        daily = make_daily_climate(analysis[['state_fp', 'county_fp']].drop_duplicates(),
+                                   np.random.default_rng(0))
+        daily_frame = daily_records(daily)
+        benchmarks['daily.from_frame'] = lambda: DailyClimate.from_frame(daily_frame)
+        benchmarks['daily.features'] = lambda: daily.features()
+
+    rows = {
+        'model_predictions': len(predictions),
+        'volatility_final_analysis': len(analysis),
+        'merged_crop_climate_data': len(merged_data),
+    }
+    return benchmarks, rows
+
+
+def time_call(fn, repeat):
+    """Wall-clock seconds for repeat calls of fn."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales, data_root='benchmarks/data', repeat=3, only=None):
+    """
+    Run all (or the selected) benchmarks at each scale.
+
+    Args:
+        scales: County scale factors
+        data_root: Root of the synthetic data directories
+        repeat: Timed calls per benchmark
+        only: Optional name prefixes to select benchmarks
+
+    Returns:
+        Result dict ready to be written as JSON
+    """
+    results = []
+    for scale in scales:
+        data_dir = scale_dir(data_root, scale)
+        if not (data_dir / 'model_predictions.csv').exists():
+            logger.info(f"Generating synthetic data for scale {scale:g}...")
+            generate(scale, data_dir, data.read_model(), raw=scale <= 10)
+
+        benchmarks, rows = build_benchmarks(data_dir)
+        for name, fn in benchmarks.items():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            timings = time_call(fn, repeat)
+            results.append({
+                'scale': scale,
+                'benchmark': name,
+                'repeat': repeat,
+                'median_s': statistics.median(timings),
+                'min_s': min(timings),
+                'max_s': max(timings),
+                **{f'rows_{k}': v for k, v in rows.items()},
+            })
+            logger.info(f"scale {scale:g} {name}: {statistics.median(timings) * 1000:.1f} ms")
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+
+
+def compare(baseline_path, candidate_path, threshold=1.2):
+    """Median-time ratio (candidate / baseline) per scale and benchmark."""
+    frames = []
+    for path in (baseline_path, candidate_path):
+        with open(path) as f:
+            frames.append(pd.DataFrame(json.load(f)['results'])[['scale', 'benchmark', 'median_s']])
+
+    table = frames[0].merge(frames[1], on=['scale', 'benchmark'], suffixes=('_baseline', '_candidate'))
+    table['ratio'] = table['median_s_candidate'] / table['median_s_baseline']
+    table['regression'] = table['ratio'] > threshold
+    return table
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard and pipeline hot paths.")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--data-root', default='benchmarks/data')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='*', help="Benchmark name prefixes to run")
+    parser.add_argument('--output', help="Result JSON path (default: benchmarks/results/<commit>_<time>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'),
+                        help="Compare two result files instead of running")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="Slowdown ratio flagged as a regression by --compare")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+
+    if args.compare:
+        table = compare(*args.compare, threshold=args.threshold)
+        print(table.to_string(index=False, float_format='%.4f'))
+        return table
+
+    report = run(args.scales, data_root=args.data_root, repeat=args.repeat, only=args.only)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / (
+        f"{report['commit'] or 'nogit'}_{report['timestamp'].replace(':', '')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    summary = pd.DataFrame(report['results'])[['scale', 'benchmark', 'median_s', 'min_s']]
+    print(summary.to_string(index=False, float_format='%.4f'))
+    print(f"\nSaved: {output}")
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
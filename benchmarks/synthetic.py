@@ -0,0 +1,344 @@
+"""
+Synthetic dataset generator for benchmarks.
+
+Writes files with the same names and columns as the real data/ directory,
+scaled by county count (scale 1 ~ the 1,834 counties behind the shipped
+data, scale 100 ~ 183k):
+
+    model_predictions.csv, volatility_final_analysis.csv,
+    merged_crop_climate_data.csv, feature_importance.csv,
+    model_comparison_metrics.csv, counties.geojson
+
+plus, up to --raw-max-scale, the raw inputs CropYieldDataMerger reads
+(monthly climate and satellite records, NASS-style yield exports).
+
+Usage:
+    python -m benchmarks.synthetic --scales 1 10 100
+"""
+
+import argparse
+import json
+import logging
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+from pipeline.daily import SEASON_DAYS, DailyClimate
+from pipeline.summary import SUMMARY_DIR, build_summary, write_summary
+from pipeline.schema import FEATURE_COLUMNS, HIGH_RISK_THRESHOLD, feature_matrix
+from pipeline.volatility import VolatilityAnalyzer
+
+logger = logging.getLogger(__name__)
+
+STATES = [
+    (1, 'ALABAMA'), (5, 'ARKANSAS'), (6, 'CALIFORNIA'), (8, 'COLORADO'),
+    (10, 'DELAWARE'), (13, 'GEORGIA'), (16, 'IDAHO'), (17, 'ILLINOIS'),
+    (18, 'INDIANA'), (19, 'IOWA'), (20, 'KANSAS'), (21, 'KENTUCKY'),
+    (22, 'LOUISIANA'), (24, 'MARYLAND'), (26, 'MICHIGAN'), (27, 'MINNESOTA'),
+    (28, 'MISSISSIPPI'), (29, 'MISSOURI'), (31, 'NEBRASKA'), (34, 'NEW JERSEY'),
+    (36, 'NEW YORK'), (37, 'NORTH CAROLINA'), (38, 'NORTH DAKOTA'), (39, 'OHIO'),
+    (40, 'OKLAHOMA'), (42, 'PENNSYLVANIA'), (45, 'SOUTH CAROLINA'),
+    (46, 'SOUTH DAKOTA'), (47, 'TENNESSEE'), (48, 'TEXAS'), (51, 'VIRGINIA'),
+    (53, 'WASHINGTON'), (54, 'WEST VIRGINIA'), (55, 'WISCONSIN'),
+]
+YEARS = np.arange(2005, 2024)
+BASE_COUNTIES = 1834
+SOYBEAN_SHARE = 0.88
+MISSING_YEAR_RATE = 0.15
+BASE_FEATURES = [c for c in FEATURE_COLUMNS if c != 'crop_soybean']
+
+# Column order produced by CropYieldDataMerger.merge_datasets()
+MERGED_COLUMNS = [
+    'state_fp', 'county_fp', 'year',
+    'T2M_mean', 'T2M_max', 'T2M_min', 'T2M_std',
+    'RH2M_mean', 'RH2M_std', 'ALLSKY_SFC_SW_DWN_mean', 'ALLSKY_SFC_SW_DWN_std',
+    'latitude_first', 'longitude_first', 'county_first', 'extreme_heat_days',
+    'NDVI_mean', 'NDVI_max', 'NDVI_min', 'NDVI_std',
+    'EVI_mean', 'EVI_std', 'NDWI_mean', 'NDWI_std',
+    'state_name', 'county_name', 'crop', 'yield_value', 'yield_cv',
+]
+
+
+def make_counties(scale, rng):
+    """One row per synthetic county with FIPS codes, names and a centroid."""
+    n = max(1, int(round(BASE_COUNTIES * scale)))
+    idx = np.arange(n)
+    state_fp = np.array([fp for fp, _ in STATES])[idx % len(STATES)]
+    state_name = np.array([name for _, name in STATES])[idx % len(STATES)]
+    county_fp = (idx // len(STATES)) * 2 + 1
+
+    counties = pd.DataFrame({
+        'state_fp': state_fp,
+        'county_fp': county_fp,
+        'state_name': state_name,
+        'county_name': [f'COUNTY {fp}' for fp in county_fp],
+        'latitude': rng.uniform(30, 48, n),
+        'longitude': rng.uniform(-120, -75, n),
+    })
+    # County-level climate baselines and yield volatility
+    counties['t2m_base'] = 28 - 0.5 * (counties['latitude'] - 30) + rng.normal(0, 1, n)
+    counties['rh_base'] = rng.normal(71, 6, n)
+    counties['solar_base'] = rng.normal(19.2, 1.1, n)
+    counties['ndvi_base'] = rng.uniform(0.35, 0.8, n)
+    counties['yield_cv_base'] = rng.uniform(0.05, 0.3, n)
+    return counties
+
+
+def make_merged(counties, rng):
+    """Synthetic merged_crop_climate_data.csv rows (county x year x crop)."""
+    n_counties, n_years = len(counties), len(YEARS)
+    c = np.repeat(np.arange(n_counties), n_years)
+    year = np.tile(YEARS, n_counties)
+    base = counties.iloc[c].reset_index(drop=True)
+    n = len(c)
+    warming = 0.03 * (year - YEARS[0])
+
+    climate = pd.DataFrame({
+        'state_fp': base['state_fp'],
+        'county_fp': base['county_fp'],
+        'year': year,
+    })
+    climate['T2M_mean'] = base['t2m_base'] + warming + rng.normal(0, 0.6, n)
+    climate['T2M_max'] = climate['T2M_mean'] + rng.uniform(6, 10, n)
+    climate['T2M_min'] = climate['T2M_mean'] - rng.uniform(8, 12, n)
+    climate['T2M_std'] = rng.normal(5.5, 0.7, n)
+    climate['RH2M_mean'] = base['rh_base'] + rng.normal(0, 2, n)
+    climate['RH2M_std'] = rng.uniform(2, 8, n)
+    climate['ALLSKY_SFC_SW_DWN_mean'] = base['solar_base'] + rng.normal(0, 0.5, n)
+    climate['ALLSKY_SFC_SW_DWN_std'] = rng.uniform(2, 5, n)
+    climate['latitude_first'] = base['latitude']
+    climate['longitude_first'] = base['longitude']
+    climate['county_first'] = base['county_name'].str.title()
+    climate['extreme_heat_days'] = rng.poisson(0.08 + 0.02 * (climate['T2M_max'] > 35), n).astype(float)
+    climate['NDVI_mean'] = (base['ndvi_base'] + rng.normal(0, 0.03, n)).clip(0.1, 0.9)
+    climate['NDVI_max'] = climate['NDVI_mean'] + rng.uniform(0.05, 0.2, n)
+    climate['NDVI_min'] = climate['NDVI_mean'] - rng.uniform(0.2, 0.4, n)
+    climate['NDVI_std'] = rng.uniform(0.02, 0.2, n)
+    climate['EVI_mean'] = climate['NDVI_mean'] * 0.65 + rng.normal(0, 0.01, n)
+    climate['EVI_std'] = rng.uniform(0.01, 0.12, n)
+    climate['NDWI_mean'] = climate['NDVI_mean'] + rng.normal(0, 0.01, n)
+    climate['NDWI_std'] = rng.uniform(0.02, 0.2, n)
+    climate['state_name'] = base['state_name']
+    climate['county_name'] = base['county_name']
+
+    frames = []
+    for crop, share, level in [('corn', 1.0, 150.0), ('soybean', SOYBEAN_SHARE, 45.0)]:
+        grows = np.repeat(rng.random(n_counties) < share, n_years)
+        observed = grows & (rng.random(n) >= MISSING_YEAR_RATE)
+        rows = climate[observed].copy()
+        cv = base.loc[observed, 'yield_cv_base'].to_numpy()
+        trend = 1 + 0.01 * (rows['year'].to_numpy() - YEARS[0])
+        rows['crop'] = crop
+        rows['yield_value'] = np.round(
+            (level * trend * (1 + rng.normal(0, 1, len(rows)) * cv)).clip(min=5), 1
+        )
+        rows['yield_cv'] = np.where(rng.random(len(rows)) < 0.6,
+                                    np.round(rng.uniform(2, 20, len(rows)), 1), np.nan)
+        frames.append(rows)
+
+    merged = pd.concat(frames, ignore_index=True)
+    return merged.sort_values(['state_fp', 'county_fp', 'year', 'crop'],
+                              kind='stable')[MERGED_COLUMNS].reset_index(drop=True)
+
+
+def make_analysis(merged):
+    """volatility_final_analysis.csv rows, via VolatilityAnalyzer's running sums."""
+    analyzer = VolatilityAnalyzer()
+    analyzer.data = merged
+    analyzer.build_running_state()
+    return analyzer.analysis_from_state()
+
+
+def make_predictions(analysis, model):
+    """model_predictions.csv rows: the exported model scored on the synthetic analysis."""
+    clean = analysis.dropna(subset=BASE_FEATURES + ['yield_cv_change', 'crop'])
+    predictions = clean[['state_fp', 'county_fp', 'county_name', 'state_name',
+                         'crop', 'yield_cv_change']].copy()
+    predictions['predicted_cv_change'] = model.predict(feature_matrix(clean))
+    predictions['predicted_high_risk'] = predictions['predicted_cv_change'] > HIGH_RISK_THRESHOLD
+    return predictions
+
+
+def make_geojson(counties, half_size=0.15):
+    """County squares keyed by the 5-digit FIPS id the Risk Map joins on."""
+    features = []
+    for row in counties.itertuples(index=False):
+        x, y = row.longitude, row.latitude
+        features.append({
+            'type': 'Feature',
+            'id': f'{row.state_fp:02d}{row.county_fp:03d}',
+            'properties': {'NAME': row.county_name},
+            'geometry': {
+                'type': 'Polygon',
+                'coordinates': [[
+                    [x - half_size, y - half_size], [x + half_size, y - half_size],
+                    [x + half_size, y + half_size], [x - half_size, y + half_size],
+                    [x - half_size, y - half_size],
+                ]],
+            },
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def make_daily_climate(keys, rng, years=YEARS):
+    """
+    Daily growing-season T2M_MAX/T2M_MIN for pipeline.daily.DailyClimate.
+
+    Generated in memory only: at full scale the long-format CSV would hold
+    about 12M rows per variable.
+
+    Args:
+        keys: DataFrame of state_fp, county_fp (one row per county)
+        rng: numpy Generator
+        years: Years to generate
+    """
+    shape = (len(keys), len(years), SEASON_DAYS)
+    # Summer peak in mid-July, warmer south, slight warming trend, persistent weather
+    season = 8 * np.sin(np.pi * np.arange(SEASON_DAYS) / SEASON_DAYS)
+    county = rng.normal(0, 3, (len(keys), 1, 1))
+    warming = 0.03 * (np.asarray(years) - years[0])[None, :, None]
+    weather = lfilter([1], [1, -0.7], rng.normal(0, 2.5, shape).astype(np.float32), axis=-1)
+    tmax = (19 + season + county + warming + weather).astype(np.float32)
+    tmin = tmax - rng.uniform(8, 14, shape).astype(np.float32)
+    return DailyClimate(keys[['state_fp', 'county_fp']], years, tmax, tmin)
+
+
+def write_raw_inputs(counties, merged, out_dir, rng):
+    """Monthly climate/satellite records and NASS yield exports for CropYieldDataMerger."""
+    paths = {
+        'climate': out_dir / 'us_county_climate_data.csv',
+        'satellite': out_dir / 'us_county_modis_data.csv',
+        'corn': out_dir / 'corn_yield_data.csv',
+        'soybean': out_dir / 'soybeans_yield_data.csv',
+    }
+    for path in paths.values():
+        path.unlink(missing_ok=True)
+
+    months = np.arange(1, 13)
+    # One state at a time keeps generator memory bounded at large scales
+    for state_fp, state_counties in counties.groupby('state_fp', sort=False):
+        n = len(state_counties) * len(YEARS) * len(months)
+        base = state_counties.loc[state_counties.index.repeat(len(YEARS) * len(months))]
+        year = np.tile(np.repeat(YEARS, len(months)), len(state_counties))
+        month = np.tile(months, len(state_counties) * len(YEARS))
+        seasonal = 10 * np.sin((month - 4) / 12 * 2 * np.pi)
+
+        location = pd.DataFrame({
+            'county': base['county_name'].str.title().to_numpy(),
+            'state_fp': state_fp,
+            'county_fp': base['county_fp'].to_numpy(),
+            'latitude': base['latitude'].to_numpy(),
+            'longitude': base['longitude'].to_numpy(),
+            'date': year * 100 + month,
+        })
+        climate = location.assign(
+            T2M=base['t2m_base'].to_numpy() - 6 + seasonal + rng.normal(0, 1.5, n),
+            RH2M=base['rh_base'].to_numpy() + rng.normal(0, 4, n),
+            ALLSKY_SFC_SW_DWN=base['solar_base'].to_numpy() + seasonal / 2 + rng.normal(0, 1, n),
+        )
+        ndvi = (base['ndvi_base'].to_numpy() + seasonal / 40 + rng.normal(0, 0.05, n)).clip(0, 1)
+        satellite = location.assign(NDVI=ndvi, EVI=ndvi * 0.65, NDWI=ndvi + rng.normal(0, 0.02, n))
+
+        for key, frame in [('climate', climate), ('satellite', satellite)]:
+            frame.to_csv(paths[key], mode='a', header=not paths[key].exists(), index=False)
+
+    for crop in ['corn', 'soybean']:
+        rows = merged[merged['crop'] == crop]
+        pd.DataFrame({
+            'Program': 'SURVEY',
+            'Year': rows['year'],
+            'Period': 'YEAR',
+            'Geo Level': 'COUNTY',
+            'State': rows['state_name'],
+            'State ANSI': rows['state_fp'],
+            'County': rows['county_name'],
+            'County ANSI': rows['county_fp'],
+            'Commodity': crop.upper(),
+            'Value': rows['yield_value'],
+            'CV (%)': rows['yield_cv'],
+        }).to_csv(paths[crop], index=False)
+
+    return paths
+
+
+def generate(scale, out_dir, model, seed=42, raw=True, reference_dir='data'):
+    """
+    Generate one synthetic data directory.
+
+    Args:
+        scale: County count multiplier (1 ~ the shipped dataset)
+        out_dir: Destination directory
+        model: Fitted model used to fill predicted_cv_change
+        seed: Random seed
+        raw: Also write CropYieldDataMerger raw inputs
+        reference_dir: Directory to copy model-level CSVs from
+
+    Returns:
+        Dict of row counts per generated file
+    """
+    rng = np.random.default_rng(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    counties = make_counties(scale, rng)
+    merged = make_merged(counties, rng)
+    analysis = make_analysis(merged)
+    predictions = make_predictions(analysis, model)
+
+    merged.to_csv(out_dir / 'merged_crop_climate_data.csv', index=False)
+    analysis.to_csv(out_dir / 'volatility_final_analysis.csv', index=False)
+    predictions.to_csv(out_dir / 'model_predictions.csv', index=False)
+    write_summary(build_summary(predictions, analysis), out_dir / SUMMARY_DIR)
+    with open(out_dir / 'counties.geojson', 'w') as f:
+        json.dump(make_geojson(counties), f)
+
+    # Model-level tables do not grow with county count
+    for name in ['feature_importance.csv', 'model_comparison_metrics.csv']:
+        shutil.copy(Path(reference_dir) / name, out_dir / name)
+
+    if raw:
+        write_raw_inputs(counties, merged, out_dir, rng)
+
+    sizes = {
+        'counties': len(counties),
+        'merged_crop_climate_data': len(merged),
+        'volatility_final_analysis': len(analysis),
+        'model_predictions': len(predictions),
+    }
+    logger.info(f"Scale {scale}: {sizes} -> {out_dir}")
+    return sizes
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate synthetic benchmark datasets.")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--out', default='benchmarks/data')
+    parser.add_argument('--model', default='models/xgboost_model.pkl')
+    parser.add_argument('--raw-max-scale', type=float, default=10,
+                        help="Largest scale that also gets raw CropYieldDataMerger inputs")
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+
+def scale_dir(out, scale):
+    """Directory name for a scale, e.g. benchmarks/data/scale_10."""
+    return Path(out) / f'scale_{scale:g}'
+
+
+def main():
+    """Main execution function."""
+    from pipeline.score import load_model
+
+    args = parse_args()
+    model = load_model(args.model)
+    for scale in args.scales:
+        generate(scale, scale_dir(args.out, scale), model, seed=args.seed,
+                 raw=scale <= args.raw_max_scale)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
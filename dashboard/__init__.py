@@ -0,0 +1 @@
+"""Helpers shared by the Streamlit pages (app.py and pages/)."""
@@ -0,0 +1,149 @@
+"""
+Process-wide cached loaders shared by the pages and the server warm-up.
+
+Streamlit keys its caches by function, so a loader defined inside a page
+script can only be filled by that page. Defining the loaders here gives
+every page one shared copy of each table, model and index, and lets
+dashboard/warmup.py fill them in the background before the first visitor
+arrives. Nothing here draws Streamlit elements, so the loaders also run
+outside a script run.
+
+Pages keep their own error handling around these calls. Exceptions are
+not cached, except for the boundaries and hotspots, which return None on
+failure so an offline server does not retry the download on every rerun.
+"""
+
+import logging
+
+from dashboard import data, timing
+from dashboard.search import SearchIndex
+from pipeline.windows import YieldWindows
+
+logger = logging.getLogger(__name__)
+
+# Slider settings whose live-estimate tables are kept (about 10 KB each)
+SURROGATE_ENTRIES = 256
+
+
+@timing.cache_data('data.summary_cube')
+def summary_cube():
+    return data.read_summary_cube()
+
+
+@timing.cache_data('data.predictions')
+def predictions():
+    return data.read_predictions()
+
+
+@timing.cache_data('data.analysis')
+def analysis():
+    return data.read_analysis()
+
+
+@timing.cache_data('data.merged')
+def merged():
+    return data.read_merged()
+
+
+@timing.cache_data('data.feature_importance')
+def feature_importance():
+    return data.read_feature_importance()
+
+
+@timing.cache_data('data.model_metrics')
+def model_metrics():
+    return data.read_model_metrics()
+
+
+@timing.cache_resource('data.model')
+def model():
+    return data.read_model()
+
+
+# Content hash of the model file model() loaded, to key what is derived from it
+@timing.cache_data('data.model_version')
+def model_version():
+    from pipeline.analogs import data_version
+    from pipeline.routing import default_model_path
+
+    return data_version(default_model_path(data.MODEL_DIR))
+
+
+# Per-slider lookup tables behind the Modeler's live estimate (see pipeline/surrogate.py),
+# per model version and slider setting; returning to a setting reuses its tables
+@timing.cache_data('data.slider_surrogate', max_entries=SURROGATE_ENTRIES)
+def slider_surrogate(version, inputs):
+    from pipeline.surrogate import SliderSurrogate  # Pulls in xgboost; only the Modeler needs it
+
+    return SliderSurrogate.build(model(), inputs).to_dict()
+
+
+# Memory-mapped nearest-neighbor index over climate-change features
+@timing.cache_resource('data.analog_index')
+def analog_index():
+    try:
+        return data.read_analog_index()
+    except FileNotFoundError:
+        return None
+
+
+# PDP/ICE curves for the Analytics page, stored per model and analysis version
+@timing.cache_resource('data.dependence')
+def dependence():
+    try:
+        return data.read_dependence()
+    except FileNotFoundError:
+        return None
+
+
+# Smallest climate shift that makes each county-crop High Risk, stored like the PDP curves
+@timing.cache_resource('data.tipping')
+def tipping():
+    try:
+        return data.read_tipping()
+    except FileNotFoundError:
+        return None
+
+
+# P(risk category) per county-crop from resampled yearly yields
+@timing.cache_resource('data.risk_bootstrap')
+def risk_bootstrap():
+    try:
+        return data.read_risk_bootstrap()
+    except FileNotFoundError:
+        return None
+
+
+# Name index for the Risk Map search box; rebuilt only when the cube is rebuilt
+@timing.cache_resource('data.search_index')
+def search_index(_table, version):
+    return SearchIndex.from_frame(_table)
+
+
+# Cumulative yield grid behind the County Explorer rolling chart and period picker
+@timing.cache_resource('data.yield_windows')
+def yield_windows():
+    return YieldWindows(merged())
+
+
+@timing.cache_data('data.geojson')
+def geojson():
+    """County boundaries (local data/counties.geojson, else the online source), or None."""
+    try:
+        return data.read_geojson()
+    except Exception as e:
+        logger.warning(f"Could not load GeoJSON: {e}")
+        return None
+
+
+# Moran's I hotspots over the county neighbor matrix (see pipeline/spatial.py)
+@timing.cache_data('data.hotspots')
+def hotspots():
+    boundaries = geojson()
+    if boundaries is None:
+        return None
+    try:
+        return data.read_spatial(boundaries)
+    except Exception as e:
+        logger.warning(f"Could not compute hotspots: {e}")
+        return None
@@ -0,0 +1,223 @@
+"""
+File readers behind the pages' cached loaders (dashboard/cache.py).
+
+dashboard/cache.py wraps these in st.cache_data and the pages handle
+missing files themselves;
+keeping the reads here lets benchmarks and tooling load exactly what the
+pages load, from any data directory. DASHBOARD_DATA_DIR points the whole
+dashboard at another directory, e.g. a synthetic benchmark scale.
+
+Every page imports this module, so the spatial and analog-index modules
+(scipy, scikit-learn, requests) are imported only by the readers that
+need them.
+"""
+
+import os
+import pickle
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline import summary
+
+DATA_DIR = os.environ.get('DASHBOARD_DATA_DIR', 'data')
+MODEL_DIR = 'models'
+
+
+def read_predictions(data_dir=None):
+    """model_predictions.csv (Home, Risk Map, Model Performance)."""
+    return pd.read_csv(Path(data_dir or DATA_DIR) / 'model_predictions.csv')
+
+
+def read_analysis(data_dir=None):
+    """volatility_final_analysis.csv (Home, County Explorer, Analytics)."""
+    return pd.read_csv(Path(data_dir or DATA_DIR) / 'volatility_final_analysis.csv')
+
+
+def read_merged(data_dir=None):
+    """merged_crop_climate_data.csv (County Explorer)."""
+    return pd.read_csv(Path(data_dir or DATA_DIR) / 'merged_crop_climate_data.csv')
+
+
+def read_feature_importance(data_dir=None):
+    """feature_importance.csv (Analytics)."""
+    return pd.read_csv(Path(data_dir or DATA_DIR) / 'feature_importance.csv')
+
+
+def read_model_metrics(data_dir=None):
+    """model_comparison_metrics.csv with the model name column labelled 'Model'."""
+    metrics = pd.read_csv(Path(data_dir or DATA_DIR) / 'model_comparison_metrics.csv')
+    if 'Model' not in metrics.columns:
+        metrics.rename(columns={metrics.columns[0]: 'Model'}, inplace=True)
+    return metrics
+
+
+def read_model(model_dir=MODEL_DIR, filename=None):
+    """
+    Unpickle an exported model (Volatility Impact Modeler).
+
+    Without a filename, the routed per-region model is preferred over the
+    global XGBoost when both were exported (see pipeline/routing.py).
+    """
+    from pipeline.routing import default_model_path
+
+    path = Path(model_dir) / filename if filename else default_model_path(model_dir)
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def read_summary_cube(data_dir=None):
+    """
+    Summary tables from data/summary/ (Home, Risk Map, Analytics).
+
+    Rebuilt from the source CSVs when missing or older than them, so the
+    pages never show aggregates of a previous model run.
+    """
+    data_dir = Path(data_dir or DATA_DIR)
+    if not summary.summary_is_stale(data_dir):
+        return summary.read_summary(data_dir / summary.SUMMARY_DIR)
+    try:
+        return summary.build_from_data_dir(data_dir)
+    except OSError:
+        # Read-only deployment: build in memory only
+        return summary.build_summary(read_predictions(data_dir), read_analysis(data_dir))
+
+
+def read_geojson(data_dir=None):
+    """County boundaries (Risk Map): data_dir/counties.geojson if present, else the online file."""
+    from pipeline import spatial
+
+    local = Path(data_dir or DATA_DIR) / 'counties.geojson'
+    return spatial.load_geojson(local if local.exists() else spatial.GEOJSON_URL)
+
+
+def read_spatial(geojson, data_dir=None):
+    """
+    Moran's I tables from data/spatial/ (Risk Map hotspot overlay).
+
+    Rebuilt like the summary cube when missing or stale; the neighbor
+    matrix is reused when stored, otherwise built from geojson.
+    """
+    from pipeline import spatial
+
+    data_dir = Path(data_dir or DATA_DIR)
+    if not spatial.spatial_is_stale(data_dir):
+        return spatial.read_spatial(data_dir / spatial.SPATIAL_DIR)
+    stored = (data_dir / spatial.SPATIAL_DIR / spatial.NEIGHBORS_FILE).exists()
+    try:
+        return spatial.build_from_data_dir(data_dir, None if stored else geojson)
+    except OSError:
+        fips, weights = spatial.neighbor_matrix(geojson)
+        return spatial.build_spatial(read_predictions(data_dir), read_analysis(data_dir), fips, weights)
+
+
+def read_analog_index(data_dir=None):
+    """
+    Analog-county index from data/analogs/ (County Explorer, Modeler).
+
+    Memory-mapped when its version matches volatility_final_analysis.csv,
+    otherwise rebuilt (in memory only on a read-only deployment).
+    """
+    from pipeline import analogs
+
+    data_dir = Path(data_dir or DATA_DIR)
+    source = data_dir / 'volatility_final_analysis.csv'
+    path = data_dir / analogs.ANALOG_DIR / analogs.INDEX_FILE
+    version = analogs.data_version(source)
+    if path.exists():
+        index = analogs.AnalogIndex.load(path)
+        if index.version == version:
+            return index
+    index = analogs.AnalogIndex.build(pd.read_csv(source), version=version)
+    try:
+        index.save(path)
+    except OSError:
+        pass
+    return index
+
+
+def read_dependence(data_dir=None, model_dir=MODEL_DIR):
+    """
+    PDP and ICE curves from data/dependence/ (Analytics).
+
+    Loaded when their version matches the current model and
+    volatility_final_analysis.csv, otherwise rebuilt in one batched
+    predict (in memory only on a read-only deployment).
+    """
+    from pipeline import dependence
+    from pipeline.routing import default_model_path
+
+    data_dir = Path(data_dir or DATA_DIR)
+    source = data_dir / 'volatility_final_analysis.csv'
+    model_path = default_model_path(model_dir)
+    path = data_dir / dependence.DEPENDENCE_DIR / dependence.CURVES_FILE
+    version = dependence.curves_version(model_path, source)
+    if path.exists():
+        curves = dependence.DependenceCurves.load(path)
+        if curves.version == version:
+            return curves
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    curves = dependence.DependenceCurves.build(model, pd.read_csv(source), version=version)
+    try:
+        curves.save(path)
+    except OSError:
+        pass
+    return curves
+
+
+def read_tipping(data_dir=None, model_dir=MODEL_DIR):
+    """
+    Tipping points from data/tipping/ (County Explorer, Risk Map).
+
+    Loaded when their version matches the current model and
+    volatility_final_analysis.csv, otherwise searched again (in memory
+    only on a read-only deployment).
+    """
+    from pipeline import tipping
+    from pipeline.dependence import curves_version
+    from pipeline.routing import default_model_path
+
+    data_dir = Path(data_dir or DATA_DIR)
+    source = data_dir / 'volatility_final_analysis.csv'
+    model_path = default_model_path(model_dir)
+    path = data_dir / tipping.TIPPING_DIR / tipping.TIPPING_FILE
+    version = curves_version(model_path, source)
+    if path.exists():
+        points = tipping.TippingPoints.load(path)
+        if points.version == version:
+            return points
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    points = tipping.TippingPoints.build(model, pd.read_csv(source), version=version)
+    try:
+        points.save(path)
+    except OSError:
+        pass
+    return points
+
+
+def read_risk_bootstrap(data_dir=None):
+    """
+    Bootstrap risk-category probabilities from data/bootstrap/ (Risk Map, County Explorer).
+
+    Loaded when their version matches merged_crop_climate_data.csv,
+    otherwise resampled again (in memory only on a read-only deployment).
+    """
+    from pipeline import bootstrap
+    from pipeline.analogs import data_version
+
+    data_dir = Path(data_dir or DATA_DIR)
+    source = data_dir / 'merged_crop_climate_data.csv'
+    path = data_dir / bootstrap.BOOTSTRAP_DIR / bootstrap.BOOTSTRAP_FILE
+    version = data_version(source)
+    if path.exists():
+        risk_bootstrap = bootstrap.RiskBootstrap.load(path)
+        if risk_bootstrap.version == version:
+            return risk_bootstrap
+    risk_bootstrap = bootstrap.RiskBootstrap.build(pd.read_csv(source), version=version)
+    try:
+        risk_bootstrap.save(path)
+    except OSError:
+        pass
+    return risk_bootstrap
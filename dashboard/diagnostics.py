@@ -0,0 +1,75 @@
+"""
+Hidden diagnostics view: stage latencies, cache hit rates and memory.
+
+Not listed in the sidebar; app.py renders it instead of the home page
+when the URL has ?diagnostics=1.
+"""
+
+import streamlit as st
+
+from dashboard.timing import STATS, peak_rss_bytes, process_rss_bytes
+
+MB = 1024 ** 2
+
+
+def _streamlit_cache_bytes():
+    """Bytes held per st.cache_data / st.cache_resource function, from Streamlit's own stats."""
+    try:
+        from streamlit.runtime import get_instance
+        stats = get_instance().stats_mgr.get_stats()
+    except Exception:
+        return {}
+
+    sizes = {}
+    for stat in stats:
+        key = f'{stat.category_name}: {stat.cache_name}'
+        sizes[key] = sizes.get(key, 0) + stat.byte_length
+    return sizes
+
+
+def render():
+    """Draw the diagnostics view."""
+    st.title("Diagnostics")
+    st.caption("Aggregated over every session served by this process since start or last reset.")
+
+    col1, col2, col3 = st.columns(3)
+    rss, peak = process_rss_bytes(), peak_rss_bytes()
+    col1.metric("Process RSS", f"{rss / MB:,.0f} MB" if rss is not None else "n/a")
+    col2.metric("Peak RSS", f"{peak / MB:,.0f} MB" if peak is not None else "n/a")
+    sessions = STATS.session_summary()
+    col3.metric("Sessions Seen", len(sessions))
+
+    st.markdown("### Stage Latency")
+    stages = STATS.stage_summary()
+    if len(stages):
+        st.dataframe(
+            stages.style.format({'p50_ms': '{:.1f}', 'p95_ms': '{:.1f}', 'max_ms': '{:.1f}'}),
+            use_container_width=True, hide_index=True
+        )
+    else:
+        st.info("No page runs recorded yet. Open the dashboard pages, then come back.")
+
+    st.markdown("### Cache Hit Rates")
+    caches = STATS.cache_summary()
+    if len(caches):
+        st.dataframe(caches.style.format({'hit_rate': '{:.1%}'}),
+                     use_container_width=True, hide_index=True)
+
+    cache_bytes = _streamlit_cache_bytes()
+    if cache_bytes:
+        st.markdown("### Cache Memory")
+        st.dataframe(
+            [{'cache': name, 'MB': round(size / MB, 2)} for name, size in sorted(cache_bytes.items())],
+            use_container_width=True, hide_index=True
+        )
+
+    st.markdown("### Sessions")
+    if len(sessions):
+        sessions = sessions.assign(session_state_kb=sessions['session_state_bytes'] / 1024) \
+            .drop(columns='session_state_bytes')
+        st.dataframe(sessions.style.format({'last_run_ms': '{:.1f}', 'session_state_kb': '{:.1f}'}),
+                     use_container_width=True, hide_index=True)
+
+    if st.button("Reset counters"):
+        STATS.reset()
+        st.rerun()
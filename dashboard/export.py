@@ -0,0 +1,259 @@
+"""
+Static export of the read-only dashboard views.
+
+Pre-bakes everything the Home, Risk Map and County Explorer pages show
+into a directory of JSON files plus a small client-side viewer
+(dashboard/static/), so browsing needs only a static file server or CDN:
+
+    index.html, viewer.js, viewer.css, plotly.min.js
+    data/manifest.json        build time, counts, source file versions
+    data/summary/<table>.json summary cube tables (pipeline/summary.py)
+    data/counties.json        county list for the selector and search
+    data/county/<fips>.json   per county and crop: analysis metrics, climate
+                              indicators, prediction, yield history and
+                              3-year rolling volatility
+    data/geo/counties.json    county boundaries for the choropleth
+
+The Volatility Impact Modeler and the other model-driven pages still need
+the Streamlit app.
+
+Usage:
+    python -m dashboard.export --data-dir data --output site
+"""
+
+import argparse
+import json
+import logging
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from plotly.offline import get_plotlyjs
+
+from dashboard import data
+from pipeline.analogs import data_version
+from pipeline.spatial import load_geojson
+from pipeline.summary import TABLES
+from pipeline.volatility import YIELD_KEYS
+from pipeline.windows import YieldWindows
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).parent / 'static'
+VIEWER_FILES = ['index.html', 'viewer.js', 'viewer.css']
+ROLLING_YEARS = 3
+
+# Final-analysis columns copied into each county file (metrics and climate indicators)
+COUNTY_COLUMNS = [
+    'risk_category', 'yield_cv_change', 'early_yield_cv', 'late_yield_cv', 'early_yield_mean',
+    'T2M_mean_change', 'T2M_std_change', 'extreme_heat_days_change',
+    'NDVI_mean_change', 'NDVI_std_change', 'EVI_mean_change',
+    'RH2M_mean_change', 'ALLSKY_SFC_SW_DWN_mean_change', 'NDWI_mean_change',
+]
+
+# Decimal places kept for boundary coordinates (~10 m)
+COORDINATE_DIGITS = 4
+
+
+def _plain(value):
+    """JSON-ready copy: numpy scalars to Python, NaN to None."""
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_plain(v) for v in value]
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    return value
+
+
+def _write_json(path, payload):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(_plain(payload), f, separators=(',', ':'), allow_nan=False)
+    return path.stat().st_size
+
+
+def _fips(frame):
+    state = frame['state_fp'].astype(int).astype(str).str.zfill(2)
+    return state + frame['county_fp'].astype(int).astype(str).str.zfill(3)
+
+
+def _round_coordinates(coordinates, digits):
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        return [round(c, digits) for c in coordinates]
+    return [_round_coordinates(c, digits) for c in coordinates]
+
+
+def county_payloads(analysis, predictions, merged=None):
+    """
+    Per-county JSON payloads keyed by FIPS.
+
+    Args:
+        analysis: volatility_final_analysis.csv
+        predictions: model_predictions.csv
+        merged: merged_crop_climate_data.csv (optional; yield charts are
+            omitted without it)
+
+    Yields:
+        (fips, payload) pairs
+    """
+    analysis = analysis.assign(fips=_fips(analysis))
+    predicted = predictions.assign(fips=_fips(predictions)).groupby(['fips', 'crop'])['predicted_cv_change'].mean()
+    state_avg = analysis.groupby(['state_name', 'crop'])['yield_cv_change'].mean()
+
+    history, windows, rolling_years, rolling_std = {}, None, None, None
+    if merged is not None:
+        merged = merged.dropna(subset=['yield_value']).sort_values('year')
+        windows = YieldWindows(merged)
+        rolling_years, rolling = windows.rolling(ROLLING_YEARS)
+        rolling_std = rolling['std']
+        history = {
+            key: (group['year'].to_numpy(), group['yield_value'].to_numpy())
+            for key, group in merged.groupby(YIELD_KEYS, sort=False)
+        }
+
+    columns = [c for c in COUNTY_COLUMNS if c in analysis.columns]
+    for fips, county in analysis.groupby('fips', sort=False):
+        first = county.iloc[0]
+        crops = {}
+        for _, row in county.iterrows():
+            crop = row['crop']
+            entry = {column: row[column] for column in columns}
+            entry['predicted_cv_change'] = predicted.get((fips, crop), np.nan)
+            entry['state_avg_cv_change'] = state_avg.get((row['state_name'], crop), np.nan)
+
+            key = (row['state_fp'], row['county_fp'], crop)
+            if key in history:
+                years, yields = history[key]
+                observed = np.isin(rolling_years, years)
+                entry['history'] = {
+                    'year': years,
+                    'yield': yields,
+                    'rolling_std': rolling_std[windows.key_position(*key)][observed],
+                }
+            crops[crop] = entry
+
+        yield fips, {
+            'fips': fips,
+            'county_name': first['county_name'],
+            'state_name': first['state_name'],
+            'crops': crops,
+        }
+
+
+def export_geometry(geojson, fips_codes, digits=COORDINATE_DIGITS):
+    """Boundaries of the given counties only, with coordinates rounded."""
+    wanted = set(fips_codes)
+    return {
+        'type': 'FeatureCollection',
+        'features': [
+            {
+                'type': 'Feature',
+                'id': feature['id'],
+                'geometry': {
+                    'type': feature['geometry']['type'],
+                    'coordinates': _round_coordinates(feature['geometry']['coordinates'], digits),
+                },
+            }
+            for feature in geojson['features']
+            if feature['id'] in wanted and feature.get('geometry')
+        ],
+    }
+
+
+def export_site(data_dir=None, output_dir='site', geojson=None):
+    """
+    Write the static site for one data directory.
+
+    Args:
+        data_dir: Dashboard data directory (default: DASHBOARD_DATA_DIR or data/)
+        output_dir: Destination directory (replaced)
+        geojson: County boundaries (default: data.read_geojson; the map is
+            left out if they cannot be loaded)
+
+    Returns:
+        Dict with files written, total bytes and elapsed seconds
+    """
+    start = time.perf_counter()
+    data_dir = Path(data_dir or data.DATA_DIR)
+    output_dir = Path(output_dir)
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    (output_dir / 'data').mkdir(parents=True)
+
+    for name in VIEWER_FILES:
+        shutil.copy(STATIC_DIR / name, output_dir / name)
+    (output_dir / 'plotly.min.js').write_text(get_plotlyjs(), encoding='utf-8')
+
+    sizes = []
+    cube = data.read_summary_cube(data_dir)
+    for name in TABLES:
+        table = cube[name]
+        sizes.append(_write_json(output_dir / 'data' / 'summary' / f'{name}.json', table.to_dict('records')))
+
+    analysis = data.read_analysis(data_dir)
+    predictions = data.read_predictions(data_dir)
+    merged_path = data_dir / 'merged_crop_climate_data.csv'
+    merged = data.read_merged(data_dir) if merged_path.exists() else None
+
+    counties = []
+    for fips, payload in county_payloads(analysis, predictions, merged):
+        sizes.append(_write_json(output_dir / 'data' / 'county' / f'{fips}.json', payload))
+        counties.append({'fips': fips, 'county_name': payload['county_name'],
+                         'state_name': payload['state_name'], 'crops': list(payload['crops'])})
+    counties.sort(key=lambda c: (c['county_name'], c['state_name']))
+    sizes.append(_write_json(output_dir / 'data' / 'counties.json', counties))
+
+    if geojson is None:
+        try:
+            geojson = data.read_geojson(data_dir)
+        except Exception as e:
+            logger.warning(f"No county boundaries, exporting without the map: {e}")
+    if geojson is not None:
+        geometry = export_geometry(geojson, cube['county_risk']['fips'])
+        sizes.append(_write_json(output_dir / 'data' / 'geo' / 'counties.json', geometry))
+
+    sources = ['volatility_final_analysis.csv', 'model_predictions.csv', 'merged_crop_climate_data.csv']
+    manifest = {
+        'built_at': pd.Timestamp.now(tz='UTC').isoformat(),
+        'counties': len(counties),
+        'has_map': geojson is not None,
+        'has_history': merged is not None,
+        'sources': {name: data_version(data_dir / name) for name in sources if (data_dir / name).exists()},
+    }
+    sizes.append(_write_json(output_dir / 'data' / 'manifest.json', manifest))
+
+    elapsed = time.perf_counter() - start
+    result = {'files': len(sizes), 'data_bytes': sum(sizes), 'seconds': elapsed}
+    logger.info(f"Exported {result['files']} data files ({result['data_bytes'] / 1e6:.1f} MB) "
+                f"to {output_dir} in {elapsed:.1f}s")
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export the read-only dashboard views as a static site.")
+    parser.add_argument('--data-dir', default=None, help="Dashboard data directory (default: data/)")
+    parser.add_argument('--output', default='site')
+    parser.add_argument('--geojson', default=None, help="County boundaries path or URL")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    geojson = load_geojson(args.geojson) if args.geojson else None
+    result = export_site(args.data_dir, args.output, geojson=geojson)
+    print(f"{result['files']} data files, {result['data_bytes'] / 1e6:.1f} MB, {result['seconds']:.1f}s")
+    print(f"Serve with: python -m http.server --directory {args.output}")
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,137 @@
+"""
+In-memory name search for the Risk Map county table.
+
+The index is built over the distinct county and state names rather than
+over rows, so its size does not grow with crops or model versions; each
+name maps to the sorted row positions that carry it. Names are
+case-folded with punctuation collapsed to spaces and "saint" folded to
+"st", so "st louis", "St. Louis" and "SAINT LOUIS" all match "ST. LOUIS".
+
+Queries of three or more characters are substring matches found through a
+trigram index; shorter queries match word prefixes. When nothing matches,
+names are ranked by trigram similarity to the query instead, so typos
+("st lois") still find something.
+"""
+
+import re
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+SEARCH_COLUMNS = ('county_name', 'state_name')
+
+# Minimum trigram similarity for a fuzzy match, and how many names to return
+FUZZY_THRESHOLD = 0.35
+FUZZY_LIMIT = 10
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+_SAINT = re.compile(r'\bsaint\b')
+
+
+def normalize(text):
+    """Case-fold, collapse punctuation to single spaces and fold 'saint' to 'st'."""
+    text = _NON_ALNUM.sub(' ', str(text).casefold()).strip()
+    return _SAINT.sub('st', text)
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _padded_trigrams(text):
+    return _trigrams(f'  {text} ')
+
+
+class SearchIndex:
+    """Prefix + trigram index mapping name queries to row positions."""
+
+    def __init__(self, names, postings, n_rows):
+        """
+        Args:
+            names: Normalized distinct names
+            postings: For each name, sorted int array of row positions
+            n_rows: Rows in the indexed table
+        """
+        self.names = names
+        self.postings = postings
+        self.n_rows = n_rows
+
+        self._trigram_index = {}
+        for name_id, name in enumerate(names):
+            for gram in _trigrams(name):
+                self._trigram_index.setdefault(gram, set()).add(name_id)
+
+        self._padded = [_padded_trigrams(name) for name in names]
+        self._words = sorted(
+            (word, name_id) for name_id, name in enumerate(names) for word in set(name.split())
+        )
+        self._word_keys = [word for word, _ in self._words]
+
+    @classmethod
+    def from_frame(cls, frame, columns=SEARCH_COLUMNS):
+        """Index the given name columns of frame by row position."""
+        rows_by_name = {}
+        for column in columns:
+            codes, uniques = pd.factorize(frame[column])
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            for code, value in enumerate(uniques):
+                rows_by_name.setdefault(normalize(value), []).append(order[bounds[code]:bounds[code + 1]])
+
+        names = list(rows_by_name)
+        postings = [np.unique(np.concatenate(rows_by_name[name])) for name in names]
+        return cls(names, postings, len(frame))
+
+    def _substring_ids(self, query):
+        grams = _trigrams(query)
+        candidates = set.intersection(*(self._trigram_index.get(g, set()) for g in grams))
+        return [i for i in candidates if query in self.names[i]]
+
+    def _prefix_ids(self, query):
+        ids = set()
+        start = bisect_left(self._word_keys, query)
+        for word, name_id in self._words[start:]:
+            if not word.startswith(query):
+                break
+            ids.add(name_id)
+        return list(ids)
+
+    def _fuzzy_ids(self, query):
+        query_grams = _padded_trigrams(query)
+        candidates = set().union(*(self._trigram_index.get(g, set()) for g in _trigrams(query)))
+        scored = []
+        for i in candidates:
+            grams = self._padded[i]
+            score = len(query_grams & grams) / len(query_grams | grams)
+            if score >= FUZZY_THRESHOLD:
+                scored.append((score, i))
+        return [i for _, i in sorted(scored, reverse=True)[:FUZZY_LIMIT]]
+
+    def search(self, query, fuzzy=True):
+        """
+        Find rows whose county or state name matches query.
+
+        Args:
+            query: Free-text search box input
+            fuzzy: Fall back to similarity ranking when nothing matches
+
+        Returns:
+            (row_positions, used_fuzzy): sorted int array of row positions,
+            and whether the fuzzy fallback produced them
+        """
+        query = normalize(query)
+        if not query:
+            return np.arange(self.n_rows), False
+
+        ids = self._substring_ids(query) if len(query) >= 3 else self._prefix_ids(query)
+        used_fuzzy = False
+        if not ids and fuzzy and len(query) >= 3:
+            ids = self._fuzzy_ids(query)
+            used_fuzzy = bool(ids)
+
+        if not ids:
+            return np.empty(0, dtype=np.intp), False
+        if len(ids) == 1:
+            return self.postings[ids[0]], used_fuzzy
+        return np.unique(np.concatenate([self.postings[i] for i in ids])), used_fuzzy
@@ -0,0 +1,43 @@
+"""
+Start the dashboard with its caches warming in the background.
+
+Equivalent to `streamlit run app.py`, except that dashboard/warmup.py
+starts filling the shared page caches before the server accepts its
+first connection, so the first visitor does not pay for the imports,
+CSV reads and model unpickling.
+
+Usage:
+    python -m dashboard.serve
+    python -m dashboard.serve --port 8502 --headless
+"""
+
+import argparse
+import logging
+from pathlib import Path
+
+from streamlit.web import bootstrap
+
+from dashboard import warmup
+
+APP = Path(__file__).resolve().parent.parent / 'app.py'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the dashboard with a background cache warm-up.")
+    parser.add_argument('--port', type=int, default=None, help="Server port (default: Streamlit's, 8501)")
+    parser.add_argument('--headless', action='store_true', help="Do not open a browser")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    flag_options = {'server_port': args.port, 'server_headless': args.headless or None}
+    bootstrap.load_config_options(flag_options=flag_options)
+    warmup.start()
+    bootstrap.run(str(APP), 'python -m dashboard.serve', [], flag_options)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
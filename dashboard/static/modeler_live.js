@@ -0,0 +1,81 @@
+// Live estimate on the Volatility Impact Modeler while a slider is dragged.
+// The page inlines this into a components.html frame after window.SURROGATE,
+// the per-slider lookup tables from pipeline/surrogate.py, keyed by the
+// sliders' widget keys (schema.slider_key). The frame watches the page's
+// sliders (aria-valuenow changes on every pointer move) and sums the table
+// entries; the exact model replaces the estimate on release. When it cannot
+// see the sliders it says so instead of showing nothing.
+
+// Same bands as the Modeler gauge
+const LIVE_BANDS = [[5, 'LOW RISK', '#27ae60'], [10, 'MEDIUM RISK', '#f39c12'], [Infinity, 'HIGH RISK', '#e74c3c']];
+const UNAVAILABLE = '<span style="color:#888">Live estimate unavailable here; the prediction updates when you release a slider</span>';
+
+function estimate(surrogate, values) {
+  let total = surrogate.base;
+  for (const [label, value] of Object.entries(values)) {
+    const spec = surrogate.sliders[label];
+    if (!spec) continue;
+    const i = Math.min(Math.max(Math.round((value - spec.min) / spec.step), 0), spec.values.length - 1);
+    total += spec.values[i] - surrogate.base;
+  }
+  return total;
+}
+
+function sliderKey(surrogate, element) {
+  // Newer Streamlit versions put the widget key on the container (st-key-<key>);
+  // older ones expose only the label, so fall back to the label in the tables
+  const keyed = element.closest('[class*="st-key-"]');
+  const match = keyed && keyed.className.match(/(?:^|\s)st-key-(\S+)/);
+  if (match && surrogate.sliders[match[1]]) return match[1];
+  const label = element.querySelector('[data-testid="stWidgetLabel"]');
+  const text = label && label.innerText.trim();
+  return Object.keys(surrogate.sliders).find((key) => surrogate.sliders[key].label === text);
+}
+
+function sliderValues(surrogate, doc) {
+  const values = {};
+  doc.querySelectorAll('[data-testid="stSlider"]').forEach((element) => {
+    const key = sliderKey(surrogate, element);
+    const thumb = element.querySelector('[role="slider"]');
+    if (key && thumb) values[key] = parseFloat(thumb.getAttribute('aria-valuenow'));
+  });
+  return values;
+}
+
+function watch(surrogate, output) {
+  let parentDoc;
+  try {
+    parentDoc = window.parent.document;
+  } catch (e) {
+    output.innerHTML = UNAVAILABLE;  // Frame not same-origin; the exact value still updates
+    return;
+  }
+  let settled = null;
+  const update = () => {
+    const values = sliderValues(surrogate, parentDoc);
+    if (!Object.keys(values).length) {
+      output.innerHTML = UNAVAILABLE;  // No slider recognised (e.g. a changed page layout)
+      return;
+    }
+    const key = JSON.stringify(values);
+    if (settled === null) settled = key;
+    if (key === settled) {
+      output.innerHTML = '';  // At the rendered settings the gauge already shows the exact value
+      return;
+    }
+    const value = estimate(surrogate, values);
+    const [, level, color] = LIVE_BANDS.find(([upper]) => value < upper);
+    output.innerHTML = `<span style="color:${color};font-weight:600">${value.toFixed(2)}% · ${level}</span>` +
+      ' <span style="color:#888">live estimate, exact value on release</span>';
+  };
+  new MutationObserver(update).observe(parentDoc.body,
+    {subtree: true, attributes: true, attributeFilter: ['aria-valuenow']});
+  update();
+}
+
+if (typeof window !== 'undefined' && window.SURROGATE) {
+  watch(window.SURROGATE, document.getElementById('live'));
+}
+if (typeof module !== 'undefined') {
+  module.exports = {estimate, sliderValues};
+}
@@ -0,0 +1,200 @@
+// Client-side viewer for the static dashboard export (dashboard/export.py).
+// Renders the Home, Risk Map and County Explorer views from pre-baked JSON;
+// routes are #home, #map and #county/<fips>/<crop>.
+
+const RISK_COLORS = {
+  'High Risk (Increasing)': '#d62728',
+  'Medium Risk (Slight Increase)': '#ff9800',
+  'Low Risk (Stable)': '#1f77b4',
+  'Improving (Decreasing)': '#2ca02c',
+};
+const PLOT_CONFIG = {displayModeBar: false, responsive: true};
+const cache = {};
+
+function load(path) {
+  if (!cache[path]) {
+    cache[path] = fetch(`data/${path}`).then((response) => {
+      if (!response.ok) throw new Error(`${path}: ${response.status}`);
+      return response.json();
+    });
+  }
+  return cache[path];
+}
+
+function escapeHtml(text) {
+  return String(text).replace(/[&<>"']/g, (c) => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+}
+
+function fmt(value, digits = 2, suffix = '') {
+  return value === null || value === undefined ? 'n/a' : `${value.toFixed(digits)}${suffix}`;
+}
+
+function metric(label, value, note = '') {
+  return `<div class="metric"><div class="label">${escapeHtml(label)}</div>` +
+    `<div class="value">${escapeHtml(value)}</div><div class="note">${escapeHtml(note)}</div></div>`;
+}
+
+function table(rows, columns) {
+  const head = columns.map(([, title]) => `<th>${escapeHtml(title)}</th>`).join('');
+  const body = rows.map((row) => '<tr>' + columns.map(([key, , digits]) => {
+    const value = row[key];
+    return `<td>${escapeHtml(typeof value === 'number' && digits !== undefined ? value.toFixed(digits) : value ?? '')}</td>`;
+  }).join('') + '</tr>').join('');
+  return `<table><tr>${head}</tr>${body}</table>`;
+}
+
+// Same folding as dashboard/search.py: case, punctuation and "saint"
+function normalize(text) {
+  return String(text).toLowerCase().replace(/[^0-9a-z]+/g, ' ').trim().replace(/\bsaint\b/g, 'st');
+}
+
+async function renderHome(view) {
+  const [headline, riskCounts, topCounties] = await Promise.all(
+    ['headline', 'risk_counts', 'top_counties'].map((name) => load(`summary/${name}.json`)));
+  const head = headline[0];
+  const counts = riskCounts.filter((r) => r.source === 'analysis');
+  const top = topCounties.filter((r) => r.source === 'analysis' && r.scope === 'all');
+
+  view.innerHTML = '<h1>Crop Yield Volatility Risk Assessment</h1>' +
+    '<div class="metrics">' +
+    metric('High-Risk Counties', String(head.predicted_high_risk), 'Predicted by Model') +
+    metric('Total Counties', String(head.total_counties), 'Analyzed Across US') +
+    metric('Avg Predicted CV Change', fmt(head.predicted_mean_cv_change, 2, '%')) +
+    '</div><h2>Counties by Risk Category</h2><div id="pie"></div>' +
+    '<h2>Top 10 Counties by Volatility Increase</h2>' +
+    table(top, [['county_name', 'County'], ['state_name', 'State'], ['crop', 'Crop'], ['cv_change', 'CV Change (%)', 2]]);
+
+  Plotly.newPlot('pie', [{
+    type: 'pie', hole: 0.4, labels: counts.map((r) => r.level), values: counts.map((r) => r.count),
+    marker: {colors: counts.map((r) => RISK_COLORS[r.level] || '#95a5a6')},
+  }], {height: 450}, PLOT_CONFIG);
+}
+
+async function renderMap(view) {
+  const [manifest, headline, countyRisk, stateSummary, predictions] = await Promise.all([
+    load('manifest.json'), load('summary/headline.json'), load('summary/county_risk.json'),
+    load('summary/state_summary.json'), load('summary/prediction_table.json'),
+  ]);
+  const head = headline[0];
+  view.innerHTML = '<div class="metrics">' +
+    metric('High-Risk Counties', String(head.predicted_high_risk)) +
+    metric('Medium Risk (2-5%)', String(head.predicted_medium_risk)) +
+    metric('Low Risk (<2%)', String(head.predicted_low_risk)) +
+    metric('Avg CV Change', fmt(head.predicted_mean_cv_change, 2, '%')) +
+    '</div><h2>Predicted County Risk Choropleth Map</h2><div id="choropleth"></div>' +
+    '<h2>State-Level Risk Summary</h2><div class="row"><div id="state-risk"></div><div id="state-avg"></div></div>' +
+    '<h2>County-Level Details</h2><div class="controls"><label>Search by county or state name' +
+    '<input id="search" type="search"></label></div><div id="county-table"></div>';
+
+  if (manifest.has_map) {
+    const geo = await load('geo/counties.json');
+    Plotly.newPlot('choropleth', [{
+      type: 'choropleth', geojson: geo, featureidkey: 'id',
+      locations: countyRisk.map((r) => r.fips), z: countyRisk.map((r) => r.predicted_cv_change),
+      text: countyRisk.map((r) => `${r.county_name}, ${r.state_name}<br>Crop: ${r.crop}`),
+      colorscale: [[0, '#27ae60'], [0.4, '#FFD700'], [0.7, '#FF8C00'], [1, '#8B0000']],
+      colorbar: {title: 'CV Change (%)'}, marker: {line: {width: 0.3, color: 'white'}},
+    }], {geo: {scope: 'usa'}, height: 600, margin: {l: 0, r: 0, t: 0, b: 0}}, PLOT_CONFIG);
+  } else {
+    document.getElementById('choropleth').innerHTML = '<p class="note-box">No county boundaries in this export.</p>';
+  }
+
+  const states = stateSummary.filter((r) => r.source === 'predictions');
+  const highRisk = states.filter((r) => r.high_risk_count > 0)
+    .sort((a, b) => b.high_risk_count - a.high_risk_count).slice(0, 10).reverse();
+  const average = [...states].sort((a, b) => b.mean_cv_change - a.mean_cv_change).slice(0, 10).reverse();
+  const bars = (id, rows, key, title, colorscale) => Plotly.newPlot(id, [{
+    type: 'bar', orientation: 'h', x: rows.map((r) => r[key]), y: rows.map((r) => r.state_name),
+    marker: {color: rows.map((r) => r[key]), colorscale},
+  }], {title: {text: title}, height: 400, margin: {l: 140}}, PLOT_CONFIG);
+  bars('state-risk', highRisk, 'high_risk_count', 'Top High-Risk States', 'Reds');
+  bars('state-avg', average, 'mean_cv_change', 'Average Risk by State', 'RdYlGn');
+
+  const searchable = predictions.map((r) => `${normalize(r.county_name)} | ${normalize(r.state_name)}`);
+  const columns = [['county_name', 'County'], ['state_name', 'State'], ['crop', 'Crop'],
+    ['predicted_cv_change', 'Predicted CV Change', 2], ['yield_cv_change', 'Observed CV Change', 2], ['risk_level', 'Risk Level']];
+  const showTable = () => {
+    const query = normalize(document.getElementById('search').value);
+    const rows = query ? predictions.filter((_, i) => searchable[i].includes(query)) : predictions;
+    document.getElementById('county-table').innerHTML = table(rows.slice(0, 50), columns);
+  };
+  document.getElementById('search').addEventListener('input', showTable);
+  showTable();
+}
+
+async function renderCounty(view, fips, crop) {
+  const counties = await load('counties.json');
+  fips = fips || counties[0].fips;
+  const county = await load(`county/${fips}.json`);
+  crop = county.crops[crop] ? crop : Object.keys(county.crops)[0];
+  const entry = county.crops[crop];
+
+  const countyOptions = counties.map((c) =>
+    `<option value="${c.fips}"${c.fips === fips ? ' selected' : ''}>${escapeHtml(c.county_name)}, ${escapeHtml(c.state_name)}</option>`).join('');
+  const cropOptions = Object.keys(county.crops).map((c) =>
+    `<option${c === crop ? ' selected' : ''}>${escapeHtml(c)}</option>`).join('');
+  const change = entry.yield_cv_change;
+  const indicators = [
+    ['Avg Temperature Change', entry.T2M_mean_change, 2, '°C'], ['Temperature Variability', entry.T2M_std_change, 2, '°C'],
+    ['Extreme Heat Days', entry.extreme_heat_days_change, 1, ' days'], ['NDVI Change', entry.NDVI_mean_change, 3, ''],
+    ['NDVI Variability', entry.NDVI_std_change, 3, ''], ['EVI Change', entry.EVI_mean_change, 3, ''],
+    ['Humidity Change', entry.RH2M_mean_change, 2, '%'], ['Solar Radiation', entry.ALLSKY_SFC_SW_DWN_mean_change, 2, ''],
+    ['Water Stress (NDWI)', entry.NDWI_mean_change, 3, ''],
+  ];
+
+  view.innerHTML = '<h1>County-Level Deep Dive</h1><div class="controls">' +
+    `<label>Select County<select id="county">${countyOptions}</select></label>` +
+    `<label>Select Crop<select id="crop">${cropOptions}</select></label></div>` +
+    '<div class="metrics">' +
+    metric('Risk Category', entry.risk_category) +
+    metric('Volatility Change', fmt(change, 2, '%'), change > 0 ? '↑ from baseline' : '↓ from baseline') +
+    metric('Predicted Change', fmt(entry.predicted_cv_change, 2, '%'), 'Model prediction') +
+    metric('Current Volatility', fmt(entry.late_yield_cv, 2, '%'),
+      `${fmt(entry.late_yield_cv - entry.early_yield_cv)}% vs 2005-2014`) +
+    '</div>' +
+    (entry.history ? '<h2>Historical Yield Trends</h2><div class="row"><div id="trend"></div><div id="rolling"></div></div>' : '') +
+    '<h2>Climate Change Indicators</h2>' +
+    table(indicators.map(([label, value, digits, unit]) => ({label, value: fmt(value, digits, unit)})),
+      [['label', 'Indicator'], ['value', 'Change']]) +
+    `<h2>How Does ${escapeHtml(county.county_name)} Compare to ${escapeHtml(county.state_name)}?</h2><div id="compare"></div>`;
+
+  document.getElementById('county').addEventListener('change', (e) => { location.hash = `#county/${e.target.value}/${crop}`; });
+  document.getElementById('crop').addEventListener('change', (e) => { location.hash = `#county/${fips}/${e.target.value}`; });
+
+  if (entry.history) {
+    const {year, rolling_std: rollingStd} = entry.history;
+    const yields = entry.history.yield;
+    const mean = yields.reduce((a, b) => a + b, 0) / yields.length;
+    Plotly.newPlot('trend', [{type: 'scatter', mode: 'lines+markers', x: year, y: yields}], {
+      title: {text: `${crop} Yield Trend (2005-2023)`}, height: 380,
+      xaxis: {title: {text: 'Year'}}, yaxis: {title: {text: 'Yield (bu/acre)'}},
+      shapes: [{type: 'line', xref: 'x domain', x0: 0, x1: 1, y0: mean, y1: mean, line: {dash: 'dash', color: 'red'}}],
+    }, PLOT_CONFIG);
+    Plotly.newPlot('rolling', [{type: 'scatter', mode: 'lines+markers', x: year, y: rollingStd, line: {color: '#e74c3c'}}], {
+      title: {text: '3-Year Rolling Volatility'}, height: 380,
+      xaxis: {title: {text: 'Year'}}, yaxis: {title: {text: 'Standard Deviation (bu/acre)'}},
+    }, PLOT_CONFIG);
+  }
+
+  Plotly.newPlot('compare', [{
+    type: 'bar', x: [county.county_name, `${county.state_name} Average`], y: [change, entry.state_avg_cv_change],
+    marker: {color: [change, entry.state_avg_cv_change], colorscale: 'RdYlGn', reversescale: true},
+  }], {title: {text: `Volatility Change Comparison - ${crop}`}, height: 380}, PLOT_CONFIG);
+}
+
+async function route() {
+  const [name, ...args] = (location.hash.slice(1) || 'home').split('/');
+  document.querySelectorAll('nav a').forEach((a) => a.classList.toggle('active', a.getAttribute('href') === `#${name}`));
+  const view = document.getElementById('view');
+  try {
+    if (name === 'map') await renderMap(view);
+    else if (name === 'county') await renderCounty(view, args[0], args[1]);
+    else await renderHome(view);
+  } catch (error) {
+    view.innerHTML = `<p class="note-box">Could not load this view: ${escapeHtml(error.message)}</p>`;
+  }
+}
+
+load('manifest.json').then((m) => { document.getElementById('built').textContent = `Data built ${m.built_at.slice(0, 10)}`; });
+window.addEventListener('hashchange', route);
+route();
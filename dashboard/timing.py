@@ -0,0 +1,231 @@
+"""
+Lightweight per-rerun stage timing for the Streamlit pages.
+
+Streamlit imports this module once per server process, so every session
+records into the same module-level STATS. The hidden diagnostics view
+(dashboard/diagnostics.py, opened with ?diagnostics=1 on the home page)
+reads it to show p50/p95 per stage across all sessions.
+
+Pages mark stage boundaries without re-indenting their code:
+
+    run = timing.PageRun('risk_map')
+    predictions = load_data()
+    run.mark('load_data')        # time since the previous mark
+    ...
+    run.finish()                 # total rerun time + session memory sample
+
+and swap @st.cache_data / @st.cache_resource for the tracked versions to
+count cache hits and misses:
+
+    @timing.cache_data('risk_map.load_data')
+    def load_data(): ...
+"""
+
+import functools
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Durations kept per stage; older samples roll off
+WINDOW = 2000
+# Sessions kept for the diagnostics view; the least recently seen are dropped
+MAX_SESSIONS = 500
+
+
+def _session_id():
+    """Id of the session running the current script, or None outside Streamlit."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def _object_bytes(value):
+    """Approximate in-memory size of a session_state value."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=False).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return sys.getsizeof(value)
+
+
+def session_state_bytes():
+    """Approximate bytes held in the current session's st.session_state."""
+    try:
+        return sum(_object_bytes(v) for v in st.session_state.to_dict().values())
+    except Exception:
+        return 0
+
+
+def process_rss_bytes():
+    """Current resident set size of the server process (peak RSS where /proc is unavailable, else None)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    """Peak resident set size of the server process, or None where `resource` is unavailable (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class SpanStats:
+    """Thread-safe store of stage durations, cache counters and session samples."""
+
+    def __init__(self, window=WINDOW, max_sessions=MAX_SESSIONS):
+        self.window = window
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._durations = defaultdict(lambda: deque(maxlen=self.window))
+            self._cache_calls = defaultdict(int)
+            self._cache_misses = defaultdict(int)
+            self._sessions = OrderedDict()
+
+    def record_span(self, name, seconds):
+        with self._lock:
+            self._durations[name].append(seconds * 1000)
+
+    def record_cache_call(self, name):
+        with self._lock:
+            self._cache_calls[name] += 1
+
+    def record_cache_miss(self, name):
+        with self._lock:
+            self._cache_misses[name] += 1
+
+    def record_session(self, session_id, page, total_seconds, state_bytes):
+        with self._lock:
+            sample = self._sessions.setdefault(session_id, {'runs': 0})
+            sample.update(page=page, last_run_ms=total_seconds * 1000,
+                          session_state_bytes=state_bytes, last_seen=time.time())
+            sample['runs'] += 1
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def stage_summary(self):
+        """DataFrame of count and p50/p95/max milliseconds per stage, slowest p95 first."""
+        with self._lock:
+            durations = {name: np.array(values) for name, values in self._durations.items()}
+
+        rows = []
+        for name, values in durations.items():
+            if not len(values):
+                continue
+            p50, p95 = np.percentile(values, [50, 95])
+            rows.append({'stage': name, 'count': len(values), 'p50_ms': p50,
+                         'p95_ms': p95, 'max_ms': values.max()})
+
+        columns = ['stage', 'count', 'p50_ms', 'p95_ms', 'max_ms']
+        if not rows:
+            return pd.DataFrame(columns=columns)
+        return pd.DataFrame(rows, columns=columns).sort_values('p95_ms', ascending=False)
+
+    def cache_summary(self):
+        """DataFrame of calls, misses and hit rate per tracked cache."""
+        with self._lock:
+            calls = dict(self._cache_calls)
+            misses = dict(self._cache_misses)
+
+        rows = []
+        for name in sorted(set(calls) | set(misses)):
+            n_calls, n_misses = calls.get(name, 0), misses.get(name, 0)
+            rows.append({'cache': name, 'calls': n_calls, 'misses': n_misses,
+                         'hit_rate': 1 - n_misses / n_calls if n_calls else np.nan})
+        return pd.DataFrame(rows, columns=['cache', 'calls', 'misses', 'hit_rate'])
+
+    def session_summary(self):
+        """DataFrame with the latest sample per session."""
+        with self._lock:
+            sessions = {sid: dict(sample) for sid, sample in self._sessions.items()}
+
+        columns = ['session', 'page', 'runs', 'last_run_ms', 'session_state_bytes', 'last_seen']
+        if not sessions:
+            return pd.DataFrame(columns=columns)
+        frame = pd.DataFrame.from_dict(sessions, orient='index').rename_axis('session').reset_index()
+        frame['last_seen'] = pd.to_datetime(frame['last_seen'], unit='s')
+        return frame[columns].sort_values('last_seen', ascending=False)
+
+
+STATS = SpanStats()
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as stage `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STATS.record_span(name, time.perf_counter() - start)
+
+
+class PageRun:
+    """Stage checkpoints for one rerun of a page script."""
+
+    def __init__(self, page):
+        self.page = page
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, stage):
+        """Record the time since the previous mark (or page start) as `page.stage`."""
+        now = time.perf_counter()
+        STATS.record_span(f'{self.page}.{stage}', now - self._last)
+        self._last = now
+
+    def finish(self):
+        """Record the whole rerun and a memory sample for this session."""
+        total = time.perf_counter() - self._start
+        STATS.record_span(f'{self.page}.total', total)
+        STATS.record_session(_session_id(), self.page, total, session_state_bytes())
+
+
+def _tracked(cache_decorator, name, kwargs):
+    def decorator(func):
+        # Only runs when Streamlit misses its cache
+        @functools.wraps(func)
+        def on_miss(*args, **kw):
+            STATS.record_cache_miss(name)
+            return func(*args, **kw)
+
+        cached = cache_decorator(**kwargs)(on_miss)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kw):
+            STATS.record_cache_call(name)
+            with span(f'cache.{name}'):
+                return cached(*args, **kw)
+
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
+
+def cache_data(name, **kwargs):
+    """st.cache_data that also counts calls and misses under `name`."""
+    return _tracked(st.cache_data, name, kwargs)
+
+
+def cache_resource(name, **kwargs):
+    """st.cache_resource that also counts calls and misses under `name`."""
+    return _tracked(st.cache_resource, name, kwargs)
@@ -0,0 +1,110 @@
+"""
+Background warm-up of the shared page caches at server start.
+
+Without it the first visitor of a freshly started server pays for every
+import and cache miss of the page they open: the summary cube, the CSVs,
+the XGBoost model, the analog index and the county boundaries. start()
+fills the loaders in dashboard/cache.py from a daemon thread, so those
+costs are paid while the server is idle. Visitors who arrive before it
+finishes wait on the same cache entry instead of loading it twice.
+
+dashboard/serve.py calls start() before the server accepts connections;
+app.py also calls it, so `streamlit run app.py` warms the other pages as
+soon as the first session opens the home page.
+"""
+
+import importlib
+import logging
+import threading
+import time
+
+from dashboard import timing
+
+logger = logging.getLogger(__name__)
+
+# Modules the pages import on first use (map rendering, chart export, model unpickling)
+IMPORTS = ['plotly.express', 'plotly.offline', 'folium', 'streamlit_folium', 'xgboost']
+
+# dashboard/cache.py loaders, in the order the most visited pages need them
+LOADERS = [
+    'summary_cube', 'search_index', 'model', 'predictions', 'analysis', 'analog_index',
+    'merged', 'yield_windows', 'tipping', 'risk_bootstrap', 'feature_importance', 'model_metrics',
+    'dependence', 'geojson', 'hotspots',
+]
+
+# Seconds start() waits for the Streamlit runtime, so the caches use its storage
+RUNTIME_WAIT = 30
+
+_lock = threading.Lock()
+_thread = None
+
+
+def warm():
+    """
+    Import the page modules and fill every shared cache.
+
+    Failures (a missing file, no network for the boundaries) are logged
+    and skipped; the page reports them when it is opened.
+
+    Returns:
+        Dict of seconds per step, keyed 'import.<module>' or the loader name
+    """
+    # Imported here, not at module level: creating the st.cache_data loaders
+    # before the runtime exists would bind them to a fallback storage manager
+    from dashboard import cache
+
+    def search_index():
+        cube = cache.summary_cube()
+        return cache.search_index(cube['prediction_table'], cube['headline'].iloc[0]['built_at'])
+
+    # Streamlit warns once per cache call made outside a script run
+    logging.getLogger('streamlit.runtime.scriptrunner.script_run_context').setLevel(logging.ERROR)
+
+    timings = {}
+    for name in IMPORTS:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Warm-up could not import {name}: {e}")
+        timings[f'import.{name}'] = time.perf_counter() - start
+
+    for name in LOADERS:
+        loader = search_index if name == 'search_index' else getattr(cache, name)
+        start = time.perf_counter()
+        try:
+            with timing.span(f'warmup.{name}'):
+                loader()
+        except Exception as e:
+            logger.warning(f"Warm-up skipped {name}: {e}")
+        timings[name] = time.perf_counter() - start
+
+    logger.info(f"Warm-up finished in {sum(timings.values()):.1f}s")
+    return timings
+
+
+def _warm_when_ready(wait):
+    from streamlit.runtime import Runtime
+
+    deadline = time.monotonic() + wait
+    while not Runtime.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    warm()
+
+
+def start(wait=RUNTIME_WAIT):
+    """
+    Run warm() in a daemon thread, once per process.
+
+    Args:
+        wait: Seconds to wait for the Streamlit runtime to start first
+
+    Returns:
+        The warm-up thread
+    """
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_warm_when_ready, args=(wait,), name='dashboard-warmup', daemon=True)
+            _thread.start()
+    return _thread
@@ -2,98 +2,107 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import requests
-import folium
-from streamlit_folium import st_folium
-import json
+
+from dashboard import cache, timing
 
 st.set_page_config(page_title="Risk Map", page_icon="", layout="wide")
+run = timing.PageRun('risk_map')
 
 # Load data
-@st.cache_data
 def load_data():
     try:
-        predictions = pd.read_csv('data/model_predictions.csv')
-        return predictions
+        return cache.summary_cube()
     except FileNotFoundError:
         st.error("Data file not found!")
         return None
 
-# Load US counties GeoJSON
-@st.cache_data
-def load_geojson():
-    """Load US counties GeoJSON from online source"""
-    try:
-        url = "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json"
-        response = requests.get(url)
-        return response.json()
-    except Exception as e:
-        st.warning(f"Could not load GeoJSON: {e}")
-        return None
+HOTSPOT_SOURCES = {'Predicted change': 'predictions', 'Historical change': 'analysis'}
+HOTSPOT_COLORS = {
+    'Hot Spot': '#c0392b',
+    'Cold Spot': '#2471a3',
+    'High-Low Outlier': '#e67e22',
+    'Low-High Outlier': '#8e44ad',
+}
 
 st.title("Geographic Risk Distribution")
 
 # Load data
-predictions = load_data()
-if predictions is None:
+cube = load_data()
+if cube is None:
     st.stop()
 
-counties_geojson = load_geojson()
-
-# Use all data without filters
-filtered_data = predictions.copy()
-
-# Classify risk
-filtered_data['risk_level'] = pd.cut(
-    filtered_data['predicted_cv_change'],
-    bins=[-float('inf'), 0, 2, 5, float('inf')],
-    labels=['Improving', 'Low Risk', 'Medium Risk', 'High Risk']
-)
+counties_geojson = cache.geojson()
+if counties_geojson is None:
+    st.warning("Could not load county GeoJSON; see the server log. The map is unavailable.")
+spatial_tables = cache.hotspots() if counties_geojson is not None else None
+tipping_points = cache.tipping() if counties_geojson is not None else None
+risk_bootstrap = cache.risk_bootstrap() if counties_geojson is not None else None
+run.mark('load_data')
 
-# Create FIPS code for choropleth matching (5 digits: state + county)
-filtered_data['fips'] = filtered_data['state_fp'].astype(str).str.zfill(2) + \
-                        filtered_data['county_fp'].astype(str).str.zfill(3)
+# Use all data without filters; risk_level and fips come precomputed
+# (see pipeline/summary.py), sorted by predicted change
+filtered_data = cube['prediction_table']
+headline = cube['headline'].iloc[0]
+search_index = cache.search_index(filtered_data, headline['built_at'])
 
-# Create FIPS code (5 digits: state + county)
-filtered_data['fips'] = filtered_data['state_fp'].astype(str).str.zfill(2) + \
-                        filtered_data['county_fp'].astype(str).str.zfill(3)
+run.mark('prepare')
 
 # Summary metrics
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    # Use the same predicted_high_risk column as app.py
-    if 'predicted_high_risk' in filtered_data.columns:
-        high_risk = (filtered_data['predicted_high_risk'] == True).sum()
-    else:
-        high_risk = len(filtered_data[filtered_data['predicted_cv_change'] > 5])
-    st.metric("High-Risk Counties", high_risk)
+    # Same predicted_high_risk count as app.py
+    st.metric("High-Risk Counties", int(headline['predicted_high_risk']))
 
 with col2:
-    medium_risk = len(filtered_data[(filtered_data['predicted_cv_change'] >= 2) & (filtered_data['predicted_cv_change'] <= 5)])
-    st.metric("Medium Risk (2-5%)", medium_risk)
+    st.metric("Medium Risk (2-5%)", int(headline['predicted_medium_risk']))
 
 with col3:
-    low_risk = len(filtered_data[filtered_data['predicted_cv_change'] < 2])
-    st.metric("Low Risk (<2%)", low_risk)
+    st.metric("Low Risk (<2%)", int(headline['predicted_low_risk']))
 
 with col4:
-    avg_pred = filtered_data['predicted_cv_change'].mean()
+    avg_pred = headline['predicted_mean_cv_change']
     st.metric("Avg CV Change", f"{avg_pred:.2f}%")
 
 st.markdown("---")
 
+run.mark('metrics')
+
 # Main visualization
 st.markdown("### Predicted County Risk Choropleth Map")
 
+hotspot_choice = 'None'
+if spatial_tables is not None:
+    hotspot_choice = st.radio(
+        "Hotspot overlay (local Moran's I)",
+        ['None'] + list(HOTSPOT_SOURCES),
+        horizontal=True
+    )
+
+tipping_choice = 'None'
+if tipping_points is not None:
+    from pipeline.tipping import direction_label
+    
+    tipping_options = {direction_label(feature): feature for feature in tipping_points.directions}
+    tipping_choice = st.selectbox(
+        "Tipping-point layer: climate shift that would make each county High Risk (> 5%)",
+        ['None'] + list(tipping_options)
+    )
+
+shade_confidence = False
+if risk_bootstrap is not None:
+    shade_confidence = st.checkbox(
+        "Shade by confidence in the historical risk category (bootstrap of yearly yields)",
+        value=False
+    )
+
 if counties_geojson is not None:
-    # Aggregate by county (in case multiple crops per county)
-    county_agg = filtered_data.groupby('fips').agg({
-        'predicted_cv_change': 'mean',
-        'county_name': 'first',
-        'state_name': 'first',
-        'crop': lambda x: ', '.join(x.unique())
-    }).reset_index()
+    # Only needed for the map, which is skipped without boundaries
+    import folium
+    from streamlit_folium import st_folium
+
+    # Per-county mean (in case multiple crops per county)
+    county_agg = cube['county_risk']
     
     # Create colormap function
     def get_color(cv_change):
@@ -116,6 +125,11 @@ if counties_geojson is not None:
     # Create a dictionary for quick lookup
     county_data = county_agg.set_index('fips')[['predicted_cv_change', 'county_name', 'state_name', 'crop']].to_dict('index')
     
+    # Probability of each county's historical risk category, averaged over its crops
+    confidence = {}
+    if risk_bootstrap is not None:
+        confidence = risk_bootstrap.county_confidence().set_index('fips')['p_category'].to_dict()
+    
     # Calculate min and max for proper binning
     min_val = county_agg['predicted_cv_change'].min()
     max_val = county_agg['predicted_cv_change'].max()
@@ -136,9 +150,11 @@ if counties_geojson is not None:
         fips = feature['id']
         if fips in county_data:
             cv_change = county_data[fips]['predicted_cv_change']
+            # Uncertain categories fade toward the basemap
+            opacity = 0.15 + 0.7 * confidence[fips] if shade_confidence and fips in confidence else 0.7
             return {
                 'fillColor': get_color(cv_change),
-                'fillOpacity': 0.7,
+                'fillOpacity': opacity,
                 'color': 'white',
                 'weight': 0.3,
                 'opacity': 0.3
@@ -190,6 +206,7 @@ if counties_geojson is not None:
                 Crop: {data['crop']}<br>
                 CV Change: <b>{data['predicted_cv_change']:.2f}%</b><br>
                 Risk Level: <span style="color: {risk_color}; font-weight: bold;">● {risk_label}</span>
+                {f"<br>Historical category confidence: {confidence[fips]:.0%}" if fips in confidence else ""}
             </div>
             """
             
@@ -214,6 +231,99 @@ if counties_geojson is not None:
     """
     m.get_root().html.add_child(folium.Element(legend_html))
     
+    # Outline significant spatial clusters of the chosen value
+    if hotspot_choice != 'None':
+        hotspots = spatial_tables['hotspots']
+        hotspots = hotspots[(hotspots['source'] == HOTSPOT_SOURCES[hotspot_choice]) &
+                            (hotspots['cluster'] != 'Not Significant')]
+        hotspot_by_fips = hotspots.set_index('fips')[['cluster', 'value']].to_dict('index')
+        
+        hotspot_features = []
+        for feature in counties_geojson['features']:
+            fips = feature['id']
+            if fips in hotspot_by_fips:
+                names = county_data.get(fips, {})
+                hotspot_features.append({
+                    'type': 'Feature',
+                    'id': fips,
+                    'geometry': feature['geometry'],
+                    'properties': {
+                        'county': f"{names.get('county_name', fips)}, {names.get('state_name', '')}",
+                        'cluster': hotspot_by_fips[fips]['cluster'],
+                        'value': f"{hotspot_by_fips[fips]['value']:.2f}%"
+                    }
+                })
+        
+        hotspot_layer = folium.FeatureGroup(name=f"Hotspots: {hotspot_choice}")
+        folium.GeoJson(
+            {'type': 'FeatureCollection', 'features': hotspot_features},
+            style_function=lambda feature: {
+                'fillColor': HOTSPOT_COLORS[feature['properties']['cluster']],
+                'fillOpacity': 0.15,
+                'color': HOTSPOT_COLORS[feature['properties']['cluster']],
+                'weight': 2.5,
+                'opacity': 0.9
+            },
+            tooltip=folium.GeoJsonTooltip(fields=['county', 'cluster', 'value'],
+                                          aliases=['County', 'Cluster', 'CV Change'])
+        ).add_to(hotspot_layer)
+        hotspot_layer.add_to(m)
+    
+    # Shade counties by the climate shift that would make them High Risk
+    if tipping_choice != 'None':
+        tipping_feature = tipping_options[tipping_choice]
+        max_shift = abs(tipping_points.directions[tipping_feature])
+        tipping_by_fips = tipping_points.county_layer(tipping_feature).set_index('fips').to_dict('index')
+        tipping_colormap = LinearColormap(
+            colors=['#8B0000', '#FF8C00', '#FFF3B0'],
+            vmin=0,
+            vmax=max_shift,
+            caption=f"Shift to High Risk: {tipping_choice}"
+        )
+        
+        tipping_features = []
+        for feature in counties_geojson['features']:
+            fips = feature['id']
+            if fips in tipping_by_fips:
+                row = tipping_by_fips[fips]
+                if pd.isna(row['shift']):
+                    label = f"Beyond {max_shift:g}"
+                elif row['shift'] == 0:
+                    label = "Already High Risk"
+                else:
+                    label = f"{row['shift']:.2f}"
+                tipping_features.append({
+                    'type': 'Feature',
+                    'id': fips,
+                    'geometry': feature['geometry'],
+                    'properties': {
+                        'county': f"{row['county_name']}, {row['state_name']}",
+                        'crop': row['crop'],
+                        'shift': label,
+                        'color': '#d5d8dc' if pd.isna(row['shift']) else tipping_colormap(row['shift'])
+                    }
+                })
+        
+        tipping_layer = folium.FeatureGroup(name=f"Tipping point: {tipping_choice}")
+        folium.GeoJson(
+            {'type': 'FeatureCollection', 'features': tipping_features},
+            style_function=lambda feature: {
+                'fillColor': feature['properties']['color'],
+                'fillOpacity': 0.85,
+                'color': 'white',
+                'weight': 0.3
+            },
+            tooltip=folium.GeoJsonTooltip(fields=['county', 'crop', 'shift'],
+                                          aliases=['County', 'First crop to tip', 'Shift needed'])
+        ).add_to(tipping_layer)
+        tipping_layer.add_to(m)
+        tipping_colormap.add_to(m)
+    
+    if hotspot_choice != 'None' or tipping_choice != 'None':
+        folium.LayerControl(collapsed=False).add_to(m)
+    
+    run.mark('folium_build')
+
     # Display the map - disable returned_objects to prevent reruns on interaction
     st_folium(m, width=1400, height=600, returned_objects=[])
     
@@ -225,6 +335,37 @@ if counties_geojson is not None:
     - **Green**: Improving (volatility decreasing)
     """)
     
+    if shade_confidence:
+        st.caption("Confidence shading: fill opacity follows how often each county's historical risk category "
+                   "survives resampling its yearly yields (averaged over crops). Faint counties have categories "
+                   "resting on few or noisy seasons.")
+    
+    if tipping_choice != 'None':
+        st.caption(f"Tipping-point layer: how much {tipping_choice.split(' (')[0].lower()} would have to change, "
+                   "other factors as observed, before the model predicts High Risk. Darker counties are "
+                   "closer; grey counties stay below 5% across the whole range searched.")
+    
+    if hotspot_choice != 'None':
+        global_row = spatial_tables['global_morans'].set_index('source').loc[HOTSPOT_SOURCES[hotspot_choice]]
+        cluster_counts = hotspots['cluster'].value_counts()
+        
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            st.metric(
+                "Global Moran's I",
+                f"{global_row['morans_i']:.3f}",
+                delta=f"p = {global_row['p_value']:.3f}",
+                delta_color="off"
+            )
+        with col2:
+            st.markdown(" · ".join(
+                f"<span style='color: {HOTSPOT_COLORS[name]}; font-weight: bold;'>▢ {name}</span>: "
+                f"{cluster_counts.get(name, 0)}"
+                for name in HOTSPOT_COLORS
+            ), unsafe_allow_html=True)
+            st.caption("Outlined counties are significant (p < 0.05, 999 permutations) clusters of "
+                       "similar (hot/cold spots) or contrasting (outliers) values among neighboring counties.")
+    
 else:
     st.warning("Could not load map data. Showing alternative visualization...")
     
@@ -283,16 +424,20 @@ else:
         fig_pie.update_traces(textposition='inside', textinfo='percent+label')
         st.plotly_chart(fig_pie, use_container_width=True)
 
+run.mark('map_render')
+
 st.markdown("---")
 
 # State summary
 st.markdown("### State-Level Risk Summary")
+state_summary = cube['state_summary'][cube['state_summary']['source'] == 'predictions']
 
 col1, col2 = st.columns(2)
 
 with col1:
     st.markdown("#### Top High-Risk States")
-    state_risk = filtered_data[filtered_data['predicted_cv_change'] > 5].groupby('state_name').size().sort_values(ascending=False).head(10)
+    state_risk = state_summary[state_summary['high_risk_count'] > 0] \
+        .set_index('state_name')['high_risk_count'].sort_values(ascending=False).head(10)
     
     if len(state_risk) > 0:
         fig = px.bar(
@@ -310,7 +455,7 @@ with col1:
 
 with col2:
     st.markdown("#### Average Risk by State")
-    state_avg = filtered_data.groupby('state_name')['predicted_cv_change'].mean().sort_values(ascending=False).head(10)
+    state_avg = state_summary.set_index('state_name')['mean_cv_change'].sort_values(ascending=False).head(10)
     
     fig = px.bar(
         x=state_avg.values,
@@ -323,6 +468,8 @@ with col2:
     fig.update_layout(showlegend=False, height=400)
     st.plotly_chart(fig, use_container_width=True)
 
+run.mark('state_charts')
+
 st.markdown("---")
 
 # Detailed table
@@ -331,10 +478,10 @@ st.markdown("### County-Level Details")
 # Add search
 search = st.text_input("Search by county or state name")
 if search:
-    table_data = filtered_data[
-        filtered_data['county_name'].str.contains(search, case=False, na=False) |
-        filtered_data['state_name'].str.contains(search, case=False, na=False)
-    ]
+    row_ids, fuzzy = search_index.search(search)
+    table_data = filtered_data.iloc[row_ids]
+    if fuzzy:
+        st.caption(f"No exact matches for \"{search}\" - showing the closest county and state names.")
 else:
     table_data = filtered_data
 
@@ -343,12 +490,12 @@ display_cols = ['county_name', 'state_name', 'crop', 'predicted_cv_change',
                 'yield_cv_change', 'risk_level']
 
 if len(table_data) > 0:
-    # Sort by predicted change
-    table_data = table_data.sort_values('predicted_cv_change', ascending=False)
-    
+    # Already sorted by predicted change
     st.dataframe(
         table_data[display_cols].head(50),
         use_container_width=True,
         height=400
     )
 
+run.mark('county_table')
+run.finish()
@@ -3,14 +3,16 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from dashboard import cache, timing
+
 st.set_page_config(page_title="County Explorer", page_icon="", layout="wide")
+run = timing.PageRun('county_explorer')
 
 # Load data
-@st.cache_data
 def load_data():
     try:
-        analysis = pd.read_csv('data/volatility_final_analysis.csv')
-        merged_data = pd.read_csv('data/merged_crop_climate_data.csv')
+        analysis = cache.analysis()
+        merged_data = cache.merged()
         return analysis, merged_data
     except FileNotFoundError as e:
         st.error(f"Data file not found: {e}")
@@ -22,6 +24,8 @@ st.title("County-Level Deep Dive")
 analysis, merged_data = load_data()
 if analysis is None:
     st.stop()
+windows = cache.yield_windows()
+run.mark('load_data')
 
 # County selection
 col1, col2 = st.columns(2)
@@ -102,6 +106,26 @@ with col4:
         delta=f"{late_cv - early_cv:.2f}% vs 2005-2014"
     )
 
+# How often the risk category survives resampling the few yearly yields behind it
+risk_bootstrap = cache.risk_bootstrap()
+bootstrap_row = None
+if risk_bootstrap is not None:
+    bootstrap_row = risk_bootstrap.lookup(selected_data['state_fp'], selected_data['county_fp'], selected_crop)
+if bootstrap_row is not None and not pd.isna(bootstrap_row['p_category']):
+    from pipeline.bootstrap import CATEGORIES, PROBABILITY_COLUMNS
+    
+    st.markdown("#### How Stable Is This Category?")
+    cols = st.columns(len(CATEGORIES))
+    for col, category, column in zip(cols, reversed(CATEGORIES), reversed(PROBABILITY_COLUMNS)):
+        with col:
+            st.metric(f"P({category.split(' (')[0]})", f"{bootstrap_row[column]:.0%}")
+    st.caption(f"Share of {risk_bootstrap.draws:,} bootstrap resamples of the "
+               f"{int(bootstrap_row['early_n_years'])} early and {int(bootstrap_row['late_n_years'])} late yearly "
+               f"yields landing in each category. The reported category comes out in "
+               f"{bootstrap_row['p_category']:.0%} of them.")
+
+run.mark('selection_metrics')
+
 st.markdown("---")
 
 # Historical yield trends
@@ -141,11 +165,14 @@ if merged_data is not None:
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
-            # Calculate rolling volatility
-            hist_data['rolling_std'] = hist_data['yield_value'].rolling(window=3, min_periods=1).std()
+            # 3-year rolling volatility, read from the precomputed window grid
+            key = windows.key_position(selected_data['state_fp'], selected_data['county_fp'], selected_crop)
+            years, rolling = windows.rolling(3)
+            rolling_data = pd.DataFrame({'year': years, 'rolling_std': rolling['std'][key]})
+            rolling_data = rolling_data[rolling_data['year'].isin(hist_data['year'])]
             
             fig = px.line(
-                hist_data,
+                rolling_data,
                 x='year',
                 y='rolling_std',
                 title="3-Year Rolling Volatility",
@@ -159,6 +186,62 @@ if merged_data is not None:
             )
             st.plotly_chart(fig, use_container_width=True)
 
+run.mark('yield_history')
+
+# Baseline vs comparison periods, recomputed for every county-crop from the window grid
+st.markdown("### Compare Periods")
+
+first_year, last_year = int(windows.years[0]), int(windows.years[-1])
+col1, col2 = st.columns(2)
+with col1:
+    baseline = st.slider("Baseline period", first_year, last_year,
+                         (max(first_year, 2005), min(last_year, 2014)))
+with col2:
+    comparison = st.slider("Comparison period", first_year, last_year,
+                           (max(first_year, 2015), last_year))
+
+periods = windows.compare(baseline, comparison)
+selected_period = periods[
+    (periods['state_fp'] == selected_data['state_fp']) &
+    (periods['county_fp'] == selected_data['county_fp']) &
+    (periods['crop'] == selected_crop)
+]
+
+col1, col2 = st.columns([1, 2])
+
+with col1:
+    if len(selected_period) > 0:
+        period_row = selected_period.iloc[0]
+        st.metric(f"Baseline CV ({baseline[0]}-{baseline[1]})", f"{period_row['early_yield_cv']:.2f}%")
+        st.metric(f"Comparison CV ({comparison[0]}-{comparison[1]})", f"{period_row['late_yield_cv']:.2f}%",
+                  delta=f"{period_row['yield_cv_change']:.2f}%", delta_color="inverse")
+        st.metric("Risk Category", period_row['risk_category'])
+    else:
+        st.info("Not enough yield history for this county and crop")
+
+with col2:
+    period_counts = periods['risk_category'].value_counts()
+    fig = px.bar(
+        x=period_counts.index,
+        y=period_counts.values,
+        labels={'x': 'Risk Category', 'y': 'County-Crops'},
+        color=period_counts.index,
+        color_discrete_map={
+            'High Risk (Increasing)': '#e74c3c',
+            'Medium Risk (Slight Increase)': '#f39c12',
+            'Low Risk (Stable)': '#3498db',
+            'Improving (Decreasing)': '#27ae60',
+            'Insufficient Data': '#95a5a6'
+        },
+        title="Risk Categories for All County-Crops"
+    )
+    fig.update_layout(showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
+
+st.markdown("---")
+
+run.mark('compare_periods')
+
 st.markdown("---")
 
 # Climate trends
@@ -224,7 +307,69 @@ fig = px.bar(
 fig.update_layout(showlegend=False)
 st.plotly_chart(fig, use_container_width=True)
 
+run.mark('climate_drivers')
 
+# Analog counties: nearest real counties by climate change, same crop
+analog_index = cache.analog_index()
+if analog_index is not None:
+    st.markdown("---")
+    st.markdown("### Counties With Similar Climate Change")
+    
+    analogs = analog_index.query(
+        selected_data, selected_crop,
+        exclude=(selected_data['state_fp'], selected_data['county_fp'])
+    )
+    
+    if len(analogs) > 0:
+        col1, col2 = st.columns([1, 2])
+        
+        with col1:
+            analog_mean = analogs['yield_cv_change'].mean()
+            st.metric(
+                "Analogs' Avg Volatility Change",
+                f"{analog_mean:.2f}%",
+                delta=f"{cv_change - analog_mean:+.2f}% this county vs analogs",
+                delta_color="off"
+            )
+            st.caption(f"The {len(analogs)} {selected_crop} counties whose temperature, heat, humidity "
+                       "and vegetation changes are closest to this county's")
+        
+        with col2:
+            st.dataframe(
+                analogs[['county_name', 'state_name', 'yield_cv_change', 'risk_category', 'distance']],
+                use_container_width=True,
+                hide_index=True
+            )
+
+run.mark('analogs')
+
+# Tipping points: climate shift along each direction before the model predicts High Risk
+tipping_points = cache.tipping()
+tipping_row = None
+if tipping_points is not None:
+    tipping_row = tipping_points.lookup(selected_data['state_fp'], selected_data['county_fp'], selected_crop)
+if tipping_row is not None:
+    from pipeline.tipping import direction_label, tipping_column
+
+    st.markdown("---")
+    st.markdown("### How Far From High Risk?")
+    st.caption(f"Additional change in one climate factor, others as observed, before the predicted volatility "
+               f"change exceeds 5%. The model predicts {tipping_row['predicted_cv_change']:.2f}% at the "
+               "observed climate.")
+
+    cols = st.columns(len(tipping_points.directions))
+    for col, (feature, max_shift) in zip(cols, tipping_points.directions.items()):
+        shift = tipping_row[tipping_column(feature)]
+        if pd.isna(shift):
+            value = f"Beyond {max_shift:+g}"
+        elif shift == 0:
+            value = "Already High"
+        else:
+            value = f"{shift:+.2f}"
+        with col:
+            st.metric(direction_label(feature), value)
+
+run.mark('tipping_points')
 
 # Comparison to state average
 st.markdown("---")
@@ -253,4 +398,7 @@ st.plotly_chart(fig, use_container_width=True)
 if cv_change > state_avg:
     st.warning(f"This county is experiencing **{cv_change - state_avg:.2f}% more** volatility increase than the state average")
 else:
-    st.success(f"This county is performing **{state_avg - cv_change:.2f}% better** than the state average")
\ No newline at end of file
+    st.success(f"This county is performing **{state_avg - cv_change:.2f}% better** than the state average")
+
+run.mark('climate_comparison')
+run.finish()
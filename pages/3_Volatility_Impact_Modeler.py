@@ -1,18 +1,24 @@
+import json
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.graph_objects as go
-import pickle
-from pathlib import Path
+import streamlit.components.v1 as components
+
+from dashboard import cache, timing
+from pipeline.routing import REGIONS, model_input
+from pipeline.schema import slider_args
+
+LIVE_SCRIPT = Path(__file__).resolve().parent.parent / 'dashboard' / 'static' / 'modeler_live.js'
 
 st.set_page_config(page_title="Volatility Impact Modeler", page_icon="", layout="wide")
+run = timing.PageRun('modeler')
 
 # Load model
-@st.cache_resource
 def load_model():
     try:
-        with open('models/xgboost_model.pkl', 'rb') as f:
-            model = pickle.load(f)
+        model = cache.model()
         return model
     except FileNotFoundError:
         st.error("Model file not found! Please ensure xgboost_model.pkl is in the 'models/' folder.")
@@ -24,6 +30,7 @@ st.title("Volatility Impact Modeler")
 model = load_model()
 if model is None:
     st.warning("Model not loaded. Showing demo predictions.")
+run.mark('load_model')
 
 st.markdown("---")
 
@@ -35,87 +42,60 @@ with col_input:
     
     st.markdown("#### Temperature Changes")
     temp_mean_change = st.slider(
-        "Average Temperature Change (°C)",
-        min_value=-2.0,
-        max_value=5.0,
+        **slider_args('T2M_mean_change'),
         value=1.0,
-        step=0.1,
         help="Change in average growing season temperature"
     )
     
     temp_std_change = st.slider(
-        "Temperature Variability Change (°C)",
-        min_value=-1.0,
-        max_value=5.0,
+        **slider_args('T2M_std_change'),
         value=2.0,
-        step=0.1,
         help="Change in temperature standard deviation - KEY DRIVER!"
     )
     
     temp_max_change = st.slider(
-        "Maximum Temperature Change (°C)",
-        min_value=-2.0,
-        max_value=8.0,
+        **slider_args('T2M_max_change'),
         value=2.0,
-        step=0.1,
         help="Change in peak temperature"
     )
     
     extreme_heat_change = st.slider(
-        "Extreme Heat Days Change",
-        min_value=-5,
-        max_value=15,
+        **slider_args('extreme_heat_days_change'),
         value=3,
-        step=1,
         help="Change in number of days above 30°C"
     )
     
     st.markdown("#### Vegetation & Environment")
     
     ndvi_mean_change = st.slider(
-        "NDVI Change",
-        min_value=-0.2,
-        max_value=0.2,
+        **slider_args('NDVI_mean_change'),
         value=-0.05,
-        step=0.01,
         help="Change in vegetation health index"
     )
     
     ndvi_std_change = st.slider(
-        "NDVI Variability Change",
-        min_value=-0.1,
-        max_value=0.2,
+        **slider_args('NDVI_std_change'),
         value=0.05,
-        step=0.01,
         help="Change in vegetation health variability"
     )
     
     humidity_change = st.slider(
-        "Humidity Change (%)",
-        min_value=-15.0,
-        max_value=15.0,
+        **slider_args('RH2M_mean_change'),
         value=-2.0,
-        step=0.5,
         help="Change in relative humidity"
     )
     
     st.markdown("#### Baseline Conditions")
     
     early_yield_mean = st.slider(
-        "Historical Average Yield (bu/acre)",
-        min_value=50.0,
-        max_value=200.0,
+        **slider_args('early_yield_mean'),
         value=140.0,
-        step=5.0,
         help="Baseline yield level"
     )
     
     early_yield_cv = st.slider(
-        "Historical Volatility (CV %)",
-        min_value=0.0,
-        max_value=30.0,
+        **slider_args('early_yield_cv'),
         value=10.0,
-        step=1.0,
         help="Baseline volatility - higher = historically more volatile"
     )
     
@@ -125,25 +105,37 @@ with col_input:
         help="Different crops respond differently to climate stress"
     )
 
+    # Only a per-region model (pipeline/routing.py) distinguishes regions
+    region = None
+    if getattr(model, 'uses_region', False):
+        region = st.selectbox(
+            "Farm Production Region",
+            ["All regions"] + list(REGIONS),
+            help="Routes the prediction to the model trained on this region"
+        )
+        region = None if region == "All regions" else region
+
+run.mark('inputs')
+
 with col_output:
     st.markdown("### Predicted Outcome")
     
-    # Create feature vector for prediction
-    features = pd.DataFrame({
-        'T2M_mean_change': [temp_mean_change],
-        'T2M_std_change': [temp_std_change],
-        'T2M_max_change': [temp_max_change],
-        'extreme_heat_days_change': [extreme_heat_change],
-        'RH2M_mean_change': [humidity_change],
-        'ALLSKY_SFC_SW_DWN_mean_change': [0],  # Assumed constant
-        'NDVI_mean_change': [ndvi_mean_change],
-        'NDVI_std_change': [ndvi_std_change],
-        'EVI_mean_change': [ndvi_mean_change * 0.8],  # Correlated with NDVI
-        'NDWI_mean_change': [ndvi_mean_change * 0.9],  # Correlated with NDVI
-        'early_yield_mean': [early_yield_mean],
-        'early_yield_cv': [early_yield_cv],
-        'crop_soybean': [1 if crop_type == "Soybean" else 0]
-    })
+    # Create feature vector for prediction (solar radiation held constant,
+    # EVI/NDWI derived from NDVI - see pipeline/schema.py)
+    inputs = {
+        'T2M_mean_change': temp_mean_change,
+        'T2M_std_change': temp_std_change,
+        'T2M_max_change': temp_max_change,
+        'extreme_heat_days_change': extreme_heat_change,
+        'RH2M_mean_change': humidity_change,
+        'NDVI_mean_change': ndvi_mean_change,
+        'NDVI_std_change': ndvi_std_change,
+        'early_yield_mean': early_yield_mean,
+        'early_yield_cv': early_yield_cv,
+        'crop_soybean': 1 if crop_type == "Soybean" else 0,
+        'region': region
+    }
+    features = model_input(model, pd.DataFrame([inputs]), fill_derived=True)
     
     # Make prediction
     if model is not None:
@@ -156,6 +148,23 @@ with col_output:
         # Fallback calculation if model not loaded
         prediction = temp_std_change * 2 + extreme_heat_change * 0.5 + early_yield_cv * 0.3
     
+    run.mark('predict')
+
+    # Per-slider lookup tables evaluated in the browser while a slider is
+    # dragged (pipeline/surrogate.py); the gauge below is the exact model
+    if model is not None:
+        try:
+            surrogate = cache.slider_surrogate(cache.model_version(), inputs)
+            components.html(
+                "<div id='live' style='font-family: sans-serif; font-size: 15px'></div>"
+                f"<script>window.SURROGATE = {json.dumps(surrogate)};</script>"
+                f"<script>{LIVE_SCRIPT.read_text()}</script>",
+                height=28
+            )
+        except Exception as e:
+            st.caption(f"Live estimate unavailable: {e}")
+        run.mark('surrogate')
+
     # Display prediction with big metric
     st.markdown("#### Predicted Volatility Change")
     
@@ -264,5 +273,35 @@ fig = px.bar(
     )
 st.plotly_chart(fig, use_container_width=True)
 
+run.mark('charts')
 
+# Real counties whose observed climate change is closest to this scenario
+analog_index = cache.analog_index()
+if analog_index is not None:
+    st.markdown("---")
+    st.markdown("#### Real Counties Like This Scenario")
+    
+    analogs = analog_index.query(features.iloc[0], crop_type)
+    
+    if len(analogs) > 0:
+        col1, col2 = st.columns([1, 2])
+        
+        with col1:
+            st.metric(
+                "Analogs' Observed CV Change",
+                f"{analogs['yield_cv_change'].mean():.2f}%",
+                delta=f"vs {prediction:.2f}% predicted",
+                delta_color="off"
+            )
+            st.caption(f"Average over the {len(analogs)} {crop_type.lower()} counties whose 2005-2014 to "
+                       "2015-2023 climate changes are closest to the sliders")
+        
+        with col2:
+            st.dataframe(
+                analogs[['county_name', 'state_name', 'yield_cv_change', 'risk_category', 'distance']],
+                use_container_width=True,
+                hide_index=True
+            )
 
+run.mark('analogs')
+run.finish()
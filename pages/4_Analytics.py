@@ -1,28 +1,32 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from dashboard import cache, timing
+from pipeline.dependence import ICE_ROWS
+
 st.set_page_config(page_title="Analytics", page_icon="", layout="wide")
+run = timing.PageRun('analytics')
 
 # Load data
-@st.cache_data
 def load_data():
     try:
-        analysis = pd.read_csv('data/volatility_final_analysis.csv')
-        feature_imp = pd.read_csv('data/feature_importance.csv')
-        return analysis, feature_imp
+        analysis = cache.analysis()
+        feature_imp = cache.feature_importance()
+        state_summary = cache.summary_cube()['state_summary']
+        return analysis, feature_imp, state_summary
     except FileNotFoundError as e:
         st.error(f"Data file not found: {e}")
-        return None, None
+        return None, None, None
 
 st.title("Analysis & Insights")
 
 # Load data
-analysis, feature_imp = load_data()
+analysis, feature_imp, state_summary = load_data()
 if analysis is None:
     st.stop()
+run.mark('load_data')
 
 # Key findings banner
 st.info("""
@@ -81,6 +85,8 @@ with col2:
     - NDVI variability captures stress
     """)
 
+run.mark('feature_importance')
+
 st.markdown("---")
 
 # Correlation Analysis
@@ -137,14 +143,72 @@ with col2:
 st.markdown("---")
 
 
+run.mark('correlations')
+
+# Partial dependence: the model's average response to each feature, with per-county ICE curves
+st.markdown("## How Each Feature Moves the Prediction")
+
+curves = cache.dependence()
+if curves is None:
+    st.warning("Partial-dependence curves not available (model or analysis file missing)")
+else:
+    pdp, ice = curves.pdp, curves.ice
+    features = list(pdp['feature'].unique())
+    n_cols = 5
+    fig = make_subplots(
+        rows=-(-len(features) // n_cols), cols=n_cols,
+        subplot_titles=[f.replace('_', ' ').title() for f in features],
+        vertical_spacing=0.12
+    )
+    for i, feature in enumerate(features):
+        curve = pdp[pdp['feature'] == feature]
+        fig.add_trace(
+            go.Scatter(x=curve['grid_value'], y=curve['pdp'], mode='lines',
+                       line=dict(color='#e74c3c'), showlegend=False),
+            row=i // n_cols + 1, col=i % n_cols + 1
+        )
+    fig.update_layout(height=600, title_text="Partial Dependence: Mean Predicted CV Change (%) Across All Counties")
+    st.plotly_chart(fig, use_container_width=True)
+
+    labels = {f.replace('_', ' ').title(): f for f in features}
+    feature = labels[st.selectbox("Feature detail (ICE curves)", list(labels))]
+    centered = st.checkbox("Center ICE curves at the lowest grid value", value=False)
+    lines = ice[ice['feature'] == feature].sort_values(['row', 'grid_value'])
+    curve = pdp[pdp['feature'] == feature]
+    if centered:
+        lines = lines.assign(prediction=lines['prediction'] - lines.groupby('row')['prediction'].transform('first'))
+        curve = curve.assign(**{c: curve[c] - curve[c].iloc[0] for c in ['pdp', 'pdp_corn', 'pdp_soybean']})
+
+    fig = go.Figure()
+    for _, line in lines.groupby('row'):
+        fig.add_trace(go.Scatter(x=line['grid_value'], y=line['prediction'], mode='lines',
+                                 line=dict(color='rgba(120,120,120,0.2)', width=1),
+                                 hoverinfo='skip', showlegend=False))
+    fig.add_trace(go.Scatter(x=curve['grid_value'], y=curve['pdp'], mode='lines+markers',
+                             name='All counties', line=dict(color='#e74c3c', width=3)))
+    fig.add_trace(go.Scatter(x=curve['grid_value'], y=curve['pdp_corn'], mode='lines',
+                             name='Corn', line=dict(color='#f39c12', dash='dash')))
+    fig.add_trace(go.Scatter(x=curve['grid_value'], y=curve['pdp_soybean'], mode='lines',
+                             name='Soybean', line=dict(color='#27ae60', dash='dash')))
+    fig.update_layout(
+        height=450,
+        title=f"{feature.replace('_', ' ').title()}: partial dependence and {lines['row'].nunique()} ICE curves",
+        xaxis_title=feature,
+        yaxis_title="Change from lowest grid value (%)" if centered else "Predicted CV Change (%)"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"Each grey line is one of a sample of {ICE_ROWS} county-crops, re-scored with only this "
+               "feature changed; the red line is the average over all counties.")
+
+st.markdown("---")
+
+run.mark('partial_dependence')
+
 # Geographic patterns
 st.markdown("## Geographic Patterns")
 
 # Top and bottom states
-state_summary = analysis.groupby('state_name').agg({
-    'yield_cv_change': 'mean',
-    'county_fp': 'count'
-}).reset_index()
+state_summary = state_summary[state_summary['source'] == 'analysis'][['state_name', 'mean_cv_change', 'count']]
 state_summary.columns = ['State', 'Avg CV Change', 'Counties']
 state_summary = state_summary[state_summary['Counties'] >= 3]  # At least 3 counties
 
@@ -182,6 +246,8 @@ with col2:
     fig.update_layout(yaxis={'categoryorder': 'total descending'})
     st.plotly_chart(fig, use_container_width=True)
 
+run.mark('state_summary')
+
 st.markdown("---")
 
 # Climate change indicators
@@ -214,4 +280,5 @@ st.plotly_chart(fig, use_container_width=True)
 
 st.markdown("---")
 
-
+run.mark('climate_distributions')
+run.finish()
@@ -4,17 +4,16 @@ import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 
+from dashboard import cache, timing
+
 st.set_page_config(page_title="Model Performance", page_icon="", layout="wide")
+run = timing.PageRun('model_performance')
 
 # --- Load data ---
-@st.cache_data
 def load_data():
     try:
-        metrics = pd.read_csv('data/model_comparison_metrics.csv')
-        if 'Model' not in metrics.columns:
-            metrics.rename(columns={metrics.columns[0]: 'Model'}, inplace=True)
-
-        predictions = pd.read_csv('data/model_predictions.csv')
+        metrics = cache.model_metrics()
+        predictions = cache.predictions()
         return metrics, predictions
 
     except FileNotFoundError as e:
@@ -36,6 +35,7 @@ def load_data():
 st.title("Model Performance")
 # --- Load metrics & predictions ---
 metrics, predictions = load_data()
+run.mark('load_data')
 
 # --- Overview ---
 st.markdown("## Model Comparison")
@@ -98,5 +98,5 @@ fig = px.bar(
 )
 st.plotly_chart(fig, use_container_width=True)
 
-
-
+run.mark('charts')
+run.finish()
@@ -0,0 +1 @@
+"""Offline data and modeling pipeline behind the dashboard's data/ and models/ files."""
@@ -0,0 +1,171 @@
+"""
+Analog-county search: which real counties saw climate change like this?
+
+One KD-tree per crop over the standardized climate-change features of
+volatility_final_analysis.csv (the seven the Volatility Impact Modeler
+exposes). Queries come from a county's own features (County Explorer) or
+from slider values (Modeler) and return the nearest real county-crops with
+their observed yield_cv_change.
+
+The index is built once per version of the analysis file (a hash of its
+contents) and stored uncompressed with joblib in data/analogs/, so loading
+it memory-maps the tree arrays instead of reading them into each process.
+
+Usage:
+    python -m pipeline.analogs --data-dir data
+"""
+
+import argparse
+import hashlib
+import logging
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+logger = logging.getLogger(__name__)
+
+ANALOG_DIR = 'analogs'
+INDEX_FILE = 'index.joblib'
+
+# Climate-change inputs the Modeler sliders set directly
+ANALOG_FEATURES = [
+    'T2M_mean_change',
+    'T2M_std_change',
+    'T2M_max_change',
+    'extreme_heat_days_change',
+    'RH2M_mean_change',
+    'NDVI_mean_change',
+    'NDVI_std_change',
+]
+
+# Per-row columns returned with each analog
+ROW_COLUMNS = ['state_fp', 'county_fp', 'county_name', 'state_name', 'crop',
+               'yield_cv_change', 'risk_category']
+
+K = 10
+LEAF_SIZE = 40
+
+
+def data_version(path):
+    """Content hash identifying one version of a data file."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class AnalogIndex:
+    """Per-crop KD-trees over standardized climate-change features."""
+
+    def __init__(self, trees, rows, mean, scale, version=None, features=ANALOG_FEATURES):
+        """
+        Args:
+            trees: crop -> KDTree over that crop's standardized feature rows
+            rows: crop -> DataFrame of ROW_COLUMNS in tree order
+            mean, scale: Standardization applied to features before querying
+            version: data_version of the analysis file the index was built from
+            features: Feature column order
+        """
+        self.trees = trees
+        self.rows = rows
+        self.mean = mean
+        self.scale = scale
+        self.version = version
+        self.features = features
+
+    @classmethod
+    def build(cls, analysis, version=None, features=ANALOG_FEATURES, leaf_size=LEAF_SIZE):
+        """Index every county-crop of the final analysis with complete features."""
+        clean = analysis.dropna(subset=features + ['crop']).reset_index(drop=True)
+        values = clean[features].to_numpy(dtype=float)
+        mean = values.mean(axis=0)
+        scale = values.std(axis=0)
+        scale[scale == 0] = 1.0
+        standardized = (values - mean) / scale
+
+        trees, rows = {}, {}
+        for crop, positions in clean.groupby('crop').indices.items():
+            trees[crop] = KDTree(standardized[positions], leaf_size=leaf_size)
+            rows[crop] = clean.loc[positions, [c for c in ROW_COLUMNS if c in clean.columns]].reset_index(drop=True)
+
+        logger.info(f"Built analog index: {len(clean)} county-crops, crops {sorted(trees)}")
+        return cls(trees, rows, mean, scale, version, features)
+
+    def save(self, path):
+        """Write the index uncompressed so load() can memory-map it."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump({
+            'trees': self.trees, 'rows': self.rows, 'mean': self.mean, 'scale': self.scale,
+            'version': self.version, 'features': self.features,
+        }, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Read an index written by save(); tree arrays are memory-mapped read-only by default."""
+        state = joblib.load(path, mmap_mode='r' if mmap else None)
+        return cls(state['trees'], state['rows'], state['mean'], state['scale'],
+                   state['version'], state['features'])
+
+    def query(self, features, crop, k=K, exclude=None):
+        """
+        Nearest real county-crops of one crop to a feature vector.
+
+        Args:
+            features: Mapping or Series with the index's feature names
+            crop: Crop to search ('corn', 'soybean'; case-insensitive)
+            k: Number of analogs
+            exclude: (state_fp, county_fp) to leave out, e.g. the county itself
+
+        Returns:
+            DataFrame of ROW_COLUMNS plus 'distance' (standardized units),
+            nearest first; empty if the crop is not indexed
+        """
+        crop = crop.lower()
+        if crop not in self.trees:
+            return pd.DataFrame(columns=ROW_COLUMNS + ['distance'])
+
+        rows = self.rows[crop]
+        point = (np.array([float(features[c]) for c in self.features]) - self.mean) / self.scale
+        n = min(k + (exclude is not None), len(rows))
+        distance, position = self.trees[crop].query(point[None, :], k=n)
+
+        analogs = rows.iloc[position[0]].assign(distance=distance[0])
+        if exclude is not None:
+            state_fp, county_fp = exclude
+            analogs = analogs[~((analogs['state_fp'] == state_fp) & (analogs['county_fp'] == county_fp))]
+        return analogs.head(k).reset_index(drop=True)
+
+
+def build_from_data_dir(data_dir='data'):
+    """Build the index for the current analysis file and write it to data_dir/analogs/."""
+    data_dir = Path(data_dir)
+    source = data_dir / 'volatility_final_analysis.csv'
+    index = AnalogIndex.build(pd.read_csv(source), version=data_version(source))
+    index.save(data_dir / ANALOG_DIR / INDEX_FILE)
+    return index
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the analog-county nearest-neighbor index.")
+    parser.add_argument('--data-dir', default='data')
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    index = build_from_data_dir(args.data_dir)
+    for crop, rows in index.rows.items():
+        print(f"{crop}: {len(rows)} county-crops")
+    print(f"Version: {index.version}")
+    return index
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,101 @@
+"""
+Incremental annual refresh.
+
+Merges a single new season of climate, satellite and yield data, appends it
+to the merged dataset and folds it into the volatility analysis without
+reprocessing earlier years.
+
+Usage:
+    python -m pipeline.annual_update --climate climate_2024.csv \
+        --satellite modis_2024.csv --corn corn_2024.csv --soybean soybeans_2024.csv
+
+--retrain also warm-starts the exported model (routed or global, as
+routing.default_model_path() picks) on the recomputed rows
+(pipeline/retrain.py).
+"""
+
+import argparse
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline import retrain, spatial, summary
+from pipeline.merger import CropYieldDataMerger
+from pipeline.volatility import VolatilityAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fold a new season into the volatility analysis.")
+    parser.add_argument('--climate', required=True, help="NASA POWER records for the new season")
+    parser.add_argument('--satellite', required=True, help="MODIS records for the new season")
+    parser.add_argument('--corn', required=True, help="NASS corn yields for the new season")
+    parser.add_argument('--soybean', required=True, help="NASS soybean yields for the new season")
+    parser.add_argument('--daily-climate', help="Daily NASA POWER records for the new season (adds pipeline/daily.py features)")
+    parser.add_argument('--merged', default='data/merged_crop_climate_data.csv')
+    parser.add_argument('--final', default='data/volatility_final_analysis.csv')
+    parser.add_argument('--state-prefix', default='data/volatility',
+                        help="Prefix of the running-state CSV files")
+    parser.add_argument('--rebuild-state', action='store_true',
+                        help="Rebuild the running state from the full merged dataset first")
+    parser.add_argument('--retrain', action='store_true',
+                        help="Warm-start the exported model on the recomputed rows")
+    parser.add_argument('--model', default=None,
+                        help="Model --retrain continues (default: routing.default_model_path())")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+
+    analyzer = VolatilityAnalyzer()
+    state_file = Path(f'{args.state_prefix}_yield_state.csv')
+
+    if args.rebuild_state or not state_file.exists():
+        # One-time full pass; later refreshes only touch the new season
+        logger.info("Building running state from full merged dataset...")
+        analyzer = VolatilityAnalyzer(args.merged)
+        analyzer.build_running_state()
+    else:
+        analyzer.load_running_state(args.state_prefix)
+
+    merger = CropYieldDataMerger()
+    merger.load_data(
+        climate_path=args.climate,
+        satellite_path=args.satellite,
+        corn_yield_path=args.corn,
+        soybean_yield_path=args.soybean,
+        daily_climate_path=args.daily_climate
+    )
+    new_rows = merger.merge_datasets()
+
+    # State before the merged CSV: a failure in between is completed by a rerun,
+    # which skips the seasons already folded and appends only the missing rows
+    updated = analyzer.update_incremental(new_rows, final_path=args.final)
+    analyzer.save_running_state(args.state_prefix)
+    merger.append_merged_data(args.merged)
+
+    # Refresh the dashboard summary cube and hotspots next to the final analysis
+    data_dir = Path(args.final).parent
+    if (data_dir / 'model_predictions.csv').exists():
+        summary.build_from_data_dir(data_dir)
+        if (data_dir / spatial.SPATIAL_DIR / spatial.NEIGHBORS_FILE).exists():
+            spatial.build_from_data_dir(data_dir)
+
+    print(f"\nUpdated {len(updated)} county-crop rows in {args.final}")
+    print(updated['risk_category'].value_counts())
+
+    if args.retrain:
+        report = retrain.retrain(updated, pd.read_csv(args.final), model_path=args.model)
+        print(f"\nWarm-start retrain {'promoted' if report['promoted'] else 'rejected'}: "
+              f"held-out RMSE {report['rmse_before']:.3f} -> {report.get('rmse_after', report['rmse_before']):.3f}")
+
+    return updated
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,238 @@
+"""
+Bootstrap stability of the historical risk categories.
+
+risk_category compares the yield CV of the early (through 2014) and late
+(from 2015) periods, often from only 4-9 yearly yields per period, so a
+single unusual season can move a county-crop across a threshold.
+RiskBootstrap resamples each county-crop's yearly yields with
+replacement within each period, recomputes the CV change and counts how
+often each category comes out. The result is P(category) per county-crop
+and the probability of the category actually reported.
+
+The yields are laid out as a dense county-crop x year array per period,
+with each row's observed years packed to the left. One draw of random
+positions (draws x county-crops x years) resamples every county-crop at
+once, and masked moments give the CVs. Draws are processed in chunks of
+CHUNK_DRAWS to bound memory. County-crops with fewer than three years in
+a period are Insufficient Data, as in VolatilityAnalyzer, and get no
+probabilities.
+
+The table is stored in data/bootstrap/ with the version of the merged
+yields it came from, and rebuilt when they change.
+
+Usage:
+    python -m pipeline.bootstrap --data-dir data --draws 2000
+"""
+
+import argparse
+import logging
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from pipeline.analogs import data_version
+from pipeline.volatility import IMPROVING_LABEL, INSUFFICIENT_LABEL, RISK_THRESHOLDS, YIELD_KEYS, classify_risk
+from pipeline.windows import MIN_WINDOW_YEARS
+
+logger = logging.getLogger(__name__)
+
+BOOTSTRAP_DIR = 'bootstrap'
+BOOTSTRAP_FILE = 'risk_probabilities.joblib'
+
+DRAWS = 2000
+CHUNK_DRAWS = 250
+# Same split as VolatilityAnalyzer (early: through EARLY_END, late: from LATE_START)
+EARLY_END = 2014
+LATE_START = 2015
+
+# Categories from lowest to highest; index = number of RISK_THRESHOLDS exceeded
+CATEGORIES = [IMPROVING_LABEL] + [label for _, label in reversed(RISK_THRESHOLDS)]
+PROBABILITY_COLUMNS = ['p_improving', 'p_low', 'p_medium', 'p_high']
+
+
+def _packed(keys, years, values, n_keys):
+    """
+    Dense (county-crop, year) array of one period's yields.
+
+    Each row's values are centered on the row mean (so sums of squares
+    stay accurate in float32) and packed left; the last column is an
+    always-zero slot that unused positions point to.
+
+    Returns:
+        (packed, counts, center)
+    """
+    counts = np.bincount(keys, minlength=n_keys)
+    center = np.bincount(keys, weights=values, minlength=n_keys) / np.maximum(counts, 1)
+    order = np.lexsort((years, keys))
+    keys, values = keys[order], values[order]
+    # Position of each value within its row
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    positions = np.arange(len(keys)) - starts[keys]
+    packed = np.zeros((n_keys, int(counts.max(initial=0)) + 1), dtype=np.float32)
+    packed[keys, positions] = values - center[keys]
+    return packed, counts, center
+
+
+def _cv(total, sumsq, counts, center):
+    """CV (%) from sums of centered values (sample std, as pandas)."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / counts
+        std = np.sqrt(np.maximum((sumsq - total * mean) / (counts - 1), 0))
+        return std / (mean + center) * 100
+
+
+def _resampled_cv(packed, counts, center, rng, draws):
+    """
+    CV (%) of draws bootstrap resamples of every row at once.
+
+    Returns:
+        (draws, rows) array
+    """
+    n_rows, width = packed.shape
+    # Per slot: range of random positions, last valid position and flat offset of the row;
+    # slots past a row's count draw from an empty range and read the zero column
+    valid = np.arange(width - 1) < counts[:, None]
+    scale = np.where(valid, counts[:, None], 0).astype(np.float32)
+    last = np.where(valid, counts[:, None] - 1, 0).astype(np.int32)
+    offset = (np.arange(n_rows)[:, None] * width + np.where(valid, 0, width - 1)).astype(np.int32)
+
+    positions = rng.random((draws, n_rows, width - 1), dtype=np.float32)
+    positions *= scale
+    picks = positions.astype(np.int32)
+    np.minimum(picks, last, out=picks)
+    picks += offset
+    sample = packed.ravel()[picks]
+    return _cv(sample.sum(axis=2), np.einsum('drw,drw->dr', sample, sample), counts, center)
+
+
+class RiskBootstrap:
+    """P(risk category) per county-crop from resampled yearly yields."""
+
+    def __init__(self, table, draws, version=None):
+        """
+        Args:
+            table: DataFrame of YIELD_KEYS, names, early/late_n_years,
+                risk_category, PROBABILITY_COLUMNS and p_category (NaN
+                for Insufficient Data)
+            draws: Resamples per county-crop
+            version: data_version of the merged yields
+        """
+        self.table = table
+        self.draws = draws
+        self.version = version
+
+    @classmethod
+    def build(cls, merged_data, draws=DRAWS, seed=42, chunk_draws=CHUNK_DRAWS, version=None):
+        """
+        Resample every county-crop's early and late yields draws times.
+
+        Args:
+            merged_data: Merged county-crop-year rows with yield_value
+        """
+        start = time.perf_counter()
+        data = merged_data.dropna(subset=['yield_value'])
+        groups = data.groupby(YIELD_KEYS, sort=True)
+        key_codes = groups.ngroup().to_numpy()
+        table = groups[['county_name', 'state_name']].first().reset_index()
+        n_keys = len(table)
+
+        years = data['year'].to_numpy()
+        values = data['yield_value'].to_numpy(dtype=np.float32)
+        early, late = years <= EARLY_END, years >= LATE_START
+        early_packed, early_n, early_center = _packed(key_codes[early], years[early], values[early], n_keys)
+        late_packed, late_n, late_center = _packed(key_codes[late], years[late], values[late], n_keys)
+        sufficient = (early_n >= MIN_WINDOW_YEARS) & (late_n >= MIN_WINDOW_YEARS)
+
+        # Point estimate from the observed yields, as in VolatilityAnalyzer
+        observed = np.full(n_keys, np.nan)
+        early_cv = _cv(early_packed.sum(axis=1), (early_packed ** 2).sum(axis=1), early_n, early_center)
+        late_cv = _cv(late_packed.sum(axis=1), (late_packed ** 2).sum(axis=1), late_n, late_center)
+        observed[sufficient] = (late_cv - early_cv)[sufficient]
+
+        rng = np.random.default_rng(seed)
+        thresholds = np.array([threshold for threshold, _ in RISK_THRESHOLDS], dtype=np.float32)
+        counts = np.zeros((n_keys, len(CATEGORIES)))
+        for offset in range(0, draws, chunk_draws):
+            size = min(chunk_draws, draws - offset)
+            change = (_resampled_cv(late_packed, late_n, late_center, rng, size) -
+                      _resampled_cv(early_packed, early_n, early_center, rng, size))
+            category = (change[..., None] > thresholds).sum(axis=2)
+            for c in range(len(CATEGORIES)):
+                counts[:, c] += (category == c).sum(axis=0)
+
+        probabilities = counts / draws
+        probabilities[~sufficient] = np.nan
+        observed_category = np.nan_to_num((observed[:, None] > thresholds).sum(axis=1)).astype(int)
+
+        table['early_n_years'] = early_n
+        table['late_n_years'] = late_n
+        table['yield_cv_change'] = observed
+        table['risk_category'] = np.where(sufficient, classify_risk(observed), INSUFFICIENT_LABEL)
+        for c, column in enumerate(PROBABILITY_COLUMNS):
+            table[column] = probabilities[:, c]
+        table['p_category'] = probabilities[np.arange(n_keys), observed_category]
+        logger.info(f"Bootstrapped {int(sufficient.sum())} county-crops x {draws} draws "
+                    f"in {time.perf_counter() - start:.2f}s")
+        return cls(table, draws, version)
+
+    def county_confidence(self):
+        """
+        Per-county confidence for the Risk Map.
+
+        Returns:
+            DataFrame of fips and p_category averaged over the county's crops
+        """
+        frame = self.table.dropna(subset=['p_category'])
+        fips = frame['state_fp'].astype(str).str.zfill(2) + frame['county_fp'].astype(str).str.zfill(3)
+        return frame.groupby(fips)['p_category'].mean().rename_axis('fips').reset_index()
+
+    def lookup(self, state_fp, county_fp, crop):
+        """Row of the table for one county-crop, or None."""
+        rows = self.table[(self.table['state_fp'] == state_fp) & (self.table['county_fp'] == county_fp) &
+                          (self.table['crop'] == crop)]
+        return rows.iloc[0] if len(rows) else None
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump({'table': self.table, 'draws': self.draws, 'version': self.version}, path)
+
+    @classmethod
+    def load(cls, path):
+        state = joblib.load(path)
+        return cls(state['table'], state['draws'], state['version'])
+
+
+def build_from_data_dir(data_dir='data', draws=DRAWS):
+    """Bootstrap the merged yields in data_dir and write the table to data_dir/bootstrap/."""
+    data_dir = Path(data_dir)
+    source = data_dir / 'merged_crop_climate_data.csv'
+    bootstrap = RiskBootstrap.build(pd.read_csv(source), draws=draws, version=data_version(source))
+    bootstrap.save(data_dir / BOOTSTRAP_DIR / BOOTSTRAP_FILE)
+    return bootstrap
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bootstrap risk-category probabilities from yearly yields.")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--draws', type=int, default=DRAWS, help="Resamples per county-crop")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    bootstrap = build_from_data_dir(args.data_dir, args.draws)
+    table = bootstrap.table.dropna(subset=['p_category'])
+    print(table.groupby('risk_category')['p_category'].describe()[['count', 'mean', '25%', '50%']].to_string())
+    print(f"\nCounty-crops whose reported category comes out in under half the draws: "
+          f"{(table['p_category'] < 0.5).sum()} of {len(table)}")
+    return bootstrap
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
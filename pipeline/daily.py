@@ -0,0 +1,214 @@
+"""
+Daily-resolution growing-season heat features per county-year.
+
+The monthly POWER records behind CropYieldDataMerger.prepare_climate_data
+can only count growing-season *months* above 30 C (its
+extreme_heat_days column). This module works from daily POWER records
+(T2M_MAX, T2M_MIN) instead. It holds them as dense
+county x year x season-day arrays and computes, in whole-array passes:
+
+    extreme_heat_days_daily   days with T2M_MAX above HEAT_THRESHOLD
+    growing_degree_days       degree days between GDD_BASE and GDD_CAP
+    killing_degree_days       degree days above KDD_THRESHOLD
+    longest_hot_run           longest run of consecutive hot days
+    hot_spells                runs of at least HOT_SPELL_DAYS hot days
+    days_observed             season days with both temperatures present
+
+Degree days use the single-sine method. Each day's temperature follows a
+sine curve between T2M_MIN and T2M_MAX, and the area above each threshold
+is integrated. Missing days count as not hot and add no degree days.
+
+Usage:
+    python -m pipeline.daily --input data/us_county_daily_climate_data.csv \\
+        --output data/daily_climate_features.csv
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Growing season (April-October) as day offsets from April 1; no leap days fall in it
+SEASON_MONTHS = range(4, 11)
+MONTH_OFFSETS = np.array([0, 0, 0, 0, 0, 30, 61, 91, 122, 153, 183, 0, 0])
+SEASON_DAYS = 214
+
+HEAT_THRESHOLD = 30.0
+GDD_BASE = 10.0
+GDD_CAP = 30.0
+KDD_THRESHOLD = 29.0
+HOT_SPELL_DAYS = 3
+
+# Counties per vectorized pass; bounds the temporaries to a few hundred MB
+CHUNK = 512
+
+FEATURES = ['extreme_heat_days_daily', 'growing_degree_days', 'killing_degree_days',
+            'longest_hot_run', 'hot_spells', 'days_observed']
+
+
+def degree_days_above(tmin, tmax, threshold):
+    """
+    Single-sine degree days above threshold, per day.
+
+    Args:
+        tmin, tmax: Daily minimum and maximum temperature arrays (same shape)
+        threshold: Base temperature
+
+    Returns:
+        Array of degree days (NaN where either temperature is missing)
+    """
+    mean = (tmax + tmin) / 2
+    half_range = np.maximum((tmax - tmin) / 2, 1e-6)
+    # Angle at which the sine curve crosses the threshold, clipped for days wholly above or below
+    theta = np.arcsin(np.clip((threshold - mean) / half_range, -1, 1))
+    degree_days = ((mean - threshold) * (np.pi / 2 - theta) + half_range * np.cos(theta)) / np.pi
+    # Rounding leaves tiny negatives on days wholly below the threshold
+    return np.maximum(degree_days, 0)
+
+
+def run_lengths(mask):
+    """
+    Length of the run of True values ending at each position along the last axis.
+
+    [T, T, F, T, T, T] -> [1, 2, 0, 1, 2, 3]
+    """
+    count = np.cumsum(mask, axis=-1, dtype=np.int16)
+    # Running count at the last False, carried forward
+    reset = np.maximum.accumulate(np.where(mask, 0, count), axis=-1)
+    return count - reset
+
+
+def season_day(dates):
+    """Day offset from April 1 for YYYYMMDD integers; -1 outside the growing season."""
+    dates = np.asarray(dates, dtype=np.int64)
+    month = dates // 100 % 100
+    day = dates % 100
+    offset = MONTH_OFFSETS[month] + day - 1
+    in_season = (month >= SEASON_MONTHS.start) & (month < SEASON_MONTHS.stop)
+    return np.where(in_season, offset, -1)
+
+
+class DailyClimate:
+    """Dense county x year x season-day temperature arrays."""
+
+    def __init__(self, keys, years, tmax, tmin):
+        """
+        Args:
+            keys: DataFrame of state_fp, county_fp, one row per array row
+            years: Sorted year per array column
+            tmax, tmin: (counties, years, SEASON_DAYS) daily temperatures in C
+                (NaN where missing)
+        """
+        self.keys = keys.reset_index(drop=True)
+        self.years = np.asarray(years)
+        self.tmax = tmax
+        self.tmin = tmin
+
+    @classmethod
+    def from_frame(cls, daily):
+        """
+        Scatter long-format daily POWER records into the dense arrays.
+
+        Args:
+            daily: DataFrame with state_fp, county_fp, date (YYYYMMDD),
+                T2M_MAX and T2M_MIN; days outside April-October are ignored
+        """
+        offset = season_day(daily['date'].to_numpy())
+        daily = daily[offset >= 0]
+        offset = offset[offset >= 0]
+
+        state_fp = daily['state_fp'].astype(int).to_numpy()
+        county_fp = daily['county_fp'].astype(int).to_numpy()
+        county_code, county_keys = pd.factorize(state_fp * 1000 + county_fp, sort=True)
+        year_code, years = pd.factorize(daily['date'].to_numpy() // 10000, sort=True)
+
+        shape = (len(county_keys), len(years), SEASON_DAYS)
+        arrays = []
+        for column in ['T2M_MAX', 'T2M_MIN']:
+            values = np.full(shape, np.nan, dtype=np.float32)
+            values[county_code, year_code, offset] = daily[column].to_numpy()
+            arrays.append(values)
+
+        county_keys = pd.Series(county_keys)
+        keys = pd.DataFrame({
+            'state_fp': (county_keys // 1000).astype(str).str.zfill(2),
+            'county_fp': (county_keys % 1000).astype(str).str.zfill(3),
+        })
+        logger.info(f"Daily climate grid: {shape[0]} counties x {shape[1]} years x {shape[2]} days")
+        return cls(keys, years, *arrays)
+
+    def features(self, chunk=CHUNK):
+        """
+        Heat features per county-year (see module docstring).
+
+        Returns:
+            DataFrame with state_fp, county_fp, year and FEATURES, one row per
+            county-year with at least one observed day
+        """
+        start = time.perf_counter()
+        n_counties, n_years, _ = self.tmax.shape
+        out = {name: np.empty((n_counties, n_years), dtype=np.float32) for name in FEATURES}
+
+        for lo in range(0, n_counties, chunk):
+            rows = slice(lo, lo + chunk)
+            tmax, tmin = self.tmax[rows], self.tmin[rows]
+            observed = ~(np.isnan(tmax) | np.isnan(tmin))
+            hot = tmax > HEAT_THRESHOLD
+
+            gdd = degree_days_above(tmin, tmax, GDD_BASE) - degree_days_above(tmin, tmax, GDD_CAP)
+            kdd = degree_days_above(tmin, tmax, KDD_THRESHOLD)
+            runs = run_lengths(hot)
+
+            out['extreme_heat_days_daily'][rows] = hot.sum(axis=-1)
+            out['growing_degree_days'][rows] = np.nansum(gdd, axis=-1)
+            out['killing_degree_days'][rows] = np.nansum(kdd, axis=-1)
+            out['longest_hot_run'][rows] = runs.max(axis=-1)
+            # Every run of HOT_SPELL_DAYS or more passes through that length exactly once
+            out['hot_spells'][rows] = (runs == HOT_SPELL_DAYS).sum(axis=-1)
+            out['days_observed'][rows] = observed.sum(axis=-1)
+
+        features = pd.DataFrame({
+            'state_fp': np.repeat(self.keys['state_fp'].to_numpy(), n_years),
+            'county_fp': np.repeat(self.keys['county_fp'].to_numpy(), n_years),
+            'year': np.tile(self.years, n_counties),
+            **{name: values.ravel() for name, values in out.items()},
+        })
+        features = features[features['days_observed'] > 0].reset_index(drop=True)
+        counts = ['extreme_heat_days_daily', 'longest_hot_run', 'hot_spells', 'days_observed']
+        features[counts] = features[counts].astype(int)
+
+        logger.info(f"Daily heat features for {len(features)} county-years "
+                    f"in {time.perf_counter() - start:.2f}s")
+        return features
+
+
+def build_from_csv(input_path, output_path):
+    """Read daily POWER records, write per-county-year features."""
+    daily = pd.read_csv(input_path, usecols=['state_fp', 'county_fp', 'date', 'T2M_MAX', 'T2M_MIN'])
+    features = DailyClimate.from_frame(daily).features()
+    features.to_csv(output_path, index=False)
+    logger.info(f"Saved {len(features)} county-years to {output_path}")
+    return features
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compute daily-resolution heat features per county-year.")
+    parser.add_argument('--input', default='data/us_county_daily_climate_data.csv',
+                        help="Daily POWER records (state_fp, county_fp, date, T2M_MAX, T2M_MIN)")
+    parser.add_argument('--output', default='data/daily_climate_features.csv')
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    return build_from_csv(args.input, args.output)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,163 @@
+"""
+Partial-dependence (PDP) and individual conditional expectation (ICE) curves.
+
+For each of the 13 model features, every county-crop row of
+volatility_final_analysis.csv is re-scored with that feature swept over
+a grid of its observed values (GRID_POINTS quantiles from the 5th to the
+95th percentile; 0/1 for crop_soybean), the other features kept as
+observed. The sweeps for all features are stacked into one
+(features x grid points x rows) matrix and scored in a single batched
+predict. The mean over rows is the PDP, overall and per crop. A fixed
+sample of ICE_ROWS rows keeps its individual curves.
+
+The curves are stored in data/dependence/ with the version of the model
+and analysis file they came from, and rebuilt when either changes.
+
+Usage:
+    python -m pipeline.dependence --data-dir data
+"""
+
+import argparse
+import logging
+import pickle
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from pipeline.analogs import data_version
+from pipeline.routing import ROUTE_COLUMN, default_model_path, model_input
+from pipeline.schema import FEATURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+DEPENDENCE_DIR = 'dependence'
+CURVES_FILE = 'curves.joblib'
+
+GRID_POINTS = 20
+GRID_QUANTILES = (0.05, 0.95)
+ICE_ROWS = 100
+
+
+def curves_version(model_path, analysis_path):
+    """Version of the curves: the model's and the analysis file's content hashes."""
+    return f'{data_version(model_path)}-{data_version(analysis_path)}'
+
+
+def feature_grid(values, grid_points=GRID_POINTS):
+    """Sweep values for one feature: observed quantiles, or the distinct values of a dummy."""
+    values = values[~np.isnan(values)]
+    distinct = np.unique(values)
+    if len(distinct) <= 2:
+        return distinct
+    return np.unique(np.quantile(values, np.linspace(*GRID_QUANTILES, grid_points)))
+
+
+class DependenceCurves:
+    """PDP and sampled ICE curves for every model feature."""
+
+    def __init__(self, pdp, ice, version=None):
+        """
+        Args:
+            pdp: DataFrame of feature, grid_value, pdp, pdp_corn, pdp_soybean
+            ice: DataFrame of feature, grid_value, row, prediction (ICE_ROWS rows)
+            version: curves_version of the model and analysis they came from
+        """
+        self.pdp = pdp
+        self.ice = ice
+        self.version = version
+
+    @classmethod
+    def build(cls, model, analysis, version=None, grid_points=GRID_POINTS, ice_rows=ICE_ROWS, seed=42):
+        """
+        Score every feature sweep of every row in one predict call.
+
+        Args:
+            model: Any exported model (plain or routed)
+            analysis: volatility_final_analysis rows; rows missing a feature are skipped
+        """
+        start = time.perf_counter()
+        X = model_input(model, analysis)
+        complete = X[FEATURE_COLUMNS].notna().all(axis=1).to_numpy()
+        X = X[complete].reset_index(drop=True)
+        values = X[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+        n_rows = len(values)
+
+        grids = [feature_grid(values[:, j], grid_points) for j in range(len(FEATURE_COLUMNS))]
+        sweep_feature = np.concatenate([np.full(len(grid), j) for j, grid in enumerate(grids)])
+        sweep_value = np.concatenate(grids).astype(np.float32)
+
+        # (sweeps, rows, features): every row repeated per sweep, one column overwritten
+        stacked = np.broadcast_to(values, (len(sweep_value), n_rows, values.shape[1])).copy()
+        stacked[np.arange(len(sweep_value)), :, sweep_feature] = sweep_value[:, None]
+        frame = pd.DataFrame(stacked.reshape(-1, values.shape[1]), columns=FEATURE_COLUMNS)
+        if ROUTE_COLUMN in X.columns:
+            frame[ROUTE_COLUMN] = np.tile(X[ROUTE_COLUMN].to_numpy(), len(sweep_value))
+        del stacked
+
+        predictions = np.asarray(model.predict(frame), dtype=np.float32).reshape(len(sweep_value), n_rows)
+        soybean = values[:, FEATURE_COLUMNS.index('crop_soybean')] > 0.5
+
+        pdp = pd.DataFrame({
+            'feature': np.array(FEATURE_COLUMNS)[sweep_feature],
+            'grid_value': sweep_value,
+            'pdp': predictions.mean(axis=1),
+            'pdp_corn': predictions[:, ~soybean].mean(axis=1) if (~soybean).any() else np.nan,
+            'pdp_soybean': predictions[:, soybean].mean(axis=1) if soybean.any() else np.nan,
+        })
+
+        sample = np.sort(np.random.default_rng(seed).choice(n_rows, size=min(ice_rows, n_rows), replace=False))
+        ice = pd.DataFrame({
+            'feature': np.repeat(pdp['feature'].to_numpy(), len(sample)),
+            'grid_value': np.repeat(sweep_value, len(sample)),
+            'row': np.tile(sample, len(sweep_value)),
+            'prediction': predictions[:, sample].ravel(),
+        })
+        logger.info(f"PDP/ICE for {len(FEATURE_COLUMNS)} features x {n_rows} rows "
+                    f"({len(frame):,} predictions) in {time.perf_counter() - start:.2f}s")
+        return cls(pdp, ice, version)
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump({'pdp': self.pdp, 'ice': self.ice, 'version': self.version}, path)
+
+    @classmethod
+    def load(cls, path):
+        state = joblib.load(path)
+        return cls(state['pdp'], state['ice'], state['version'])
+
+
+def build_from_data_dir(data_dir='data', model_path=None):
+    """Build the curves for the current model and analysis file and write them to data_dir/dependence/."""
+    data_dir = Path(data_dir)
+    model_path = Path(model_path or default_model_path())
+    source = data_dir / 'volatility_final_analysis.csv'
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    curves = DependenceCurves.build(model, pd.read_csv(source), version=curves_version(model_path, source))
+    curves.save(data_dir / DEPENDENCE_DIR / CURVES_FILE)
+    return curves
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build partial-dependence and ICE curves for every model feature.")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--model', default=None, help="Pickled model (default: routing.default_model_path())")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    curves = build_from_data_dir(args.data_dir, args.model)
+    print(curves.pdp.groupby('feature')['pdp'].agg(['min', 'max']).to_string())
+    print(f"Version: {curves.version}")
+    return curves
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,549 @@
+"""
+Merge NASA POWER climate, MODIS satellite and USDA NASS yield data.
+
+merge_datasets() holds every input in memory at once. For nationwide
+daily-resolution runs, merge_datasets_chunked() streams the CSVs in
+fixed-size chunks and spills each chunk's rows to one partition per
+state. It then runs the same preparation and joins one state at a time,
+so peak memory is bounded by the largest state rather than the nation.
+
+Usage:
+    python -m pipeline.merger
+    python -m pipeline.merger --chunked --chunksize 500000
+"""
+
+import argparse
+import io
+import logging
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.daily import FEATURES as DAILY_FEATURES, DailyClimate
+
+logger = logging.getLogger(__name__)
+
+DAILY_CLIMATE_PATH = 'data/us_county_daily_climate_data.csv'
+
+# Rows read per CSV chunk in chunked mode
+CHUNK_ROWS = 500_000
+
+# Bytes read per step when scanning the end of the merged CSV for rows already appended
+TAIL_BLOCK = 1 << 20
+
+MERGE_KEYS = ['state_fp', 'county_fp', 'crop', 'year']
+
+# Daily POWER columns used by pipeline/daily.py
+DAILY_COLUMNS = ['state_fp', 'county_fp', 'date', 'T2M_MAX', 'T2M_MIN']
+
+# State column of each input, used to partition it
+STATE_COLUMNS = {
+    'climate': 'state_fp',
+    'satellite': 'state_fp',
+    'daily': 'state_fp',
+    'corn': 'State ANSI',
+    'soybean': 'State ANSI',
+}
+
+
+def _tail_keys(path, min_year, block=TAIL_BLOCK):
+    """
+    MERGE_KEYS of the rows from min_year on at the end of a merged CSV.
+
+    Seasons are appended in order, so rows of a season already appended
+    sit at the end of the file. It is read backwards in blocks until a
+    row older than min_year turns up, which keeps the cost proportional
+    to the new seasons rather than to the whole history.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    keys = pd.DataFrame()
+    with open(path, 'rb') as f:
+        end = f.seek(0, io.SEEK_END)
+        start, tail = end, b''
+        while start > 0:
+            start = max(start - block, 0)
+            f.seek(start)
+            tail = f.read(end - start)
+            # Drop the partial first line (the header when the start of the file is reached)
+            lines = tail.split(b'\n', 1)[1] if b'\n' in tail else b''
+            if not lines.strip():
+                continue
+            keys = pd.read_csv(io.BytesIO(lines), names=header, usecols=MERGE_KEYS)
+            if keys['year'].min() < min_year:
+                break
+    if not len(keys):
+        return pd.DataFrame(columns=MERGE_KEYS, dtype=int)
+    keys = keys[keys['year'] >= min_year]
+    return keys[MERGE_KEYS].astype({'state_fp': int, 'county_fp': int, 'year': int})
+
+
+class CropYieldDataMerger:
+    """Merge climate, satellite, and yield data for crop yield volatility analysis."""
+
+    def __init__(self):
+        self.climate_data = None
+        self.daily_climate = None
+        self.satellite_data = None
+        self.yield_data = None
+        self.merged_data = None
+
+    def load_data(
+        self,
+        climate_path: str,
+        satellite_path: str,
+        corn_yield_path: str,
+        soybean_yield_path: str,
+        daily_climate_path: str = None
+    ):
+        """Load all datasets (daily climate records are optional, see pipeline/daily.py)."""
+        logger.info("Loading datasets...")
+
+        # Load climate data
+        self.climate_data = pd.read_csv(climate_path)
+        logger.info(f"Loaded climate data: {len(self.climate_data)} records")
+
+        if daily_climate_path is not None:
+            daily = pd.read_csv(daily_climate_path, usecols=DAILY_COLUMNS)
+            self.daily_climate = DailyClimate.from_frame(daily)
+            logger.info(f"Loaded daily climate data: {len(daily)} records")
+
+        # Load satellite data
+        self.satellite_data = pd.read_csv(satellite_path)
+        logger.info(f"Loaded satellite data: {len(self.satellite_data)} records")
+
+        # Load and combine yield data
+        corn = pd.read_csv(corn_yield_path)
+        soybean = pd.read_csv(soybean_yield_path)
+
+        # Add crop identifier
+        corn['crop'] = 'corn'
+        soybean['crop'] = 'soybean'
+
+        # Combine both crops
+        self.yield_data = pd.concat([corn, soybean], ignore_index=True)
+        logger.info(f"Loaded yield data: {len(self.yield_data)} records (corn: {len(corn)}, soybean: {len(soybean)})")
+
+        return self
+
+    def prepare_climate_data(self):
+        """Aggregate climate data to growing season features."""
+        logger.info("Preparing climate data...")
+
+        # Standardize FIPS codes to strings
+        self.climate_data['state_fp'] = self.climate_data['state_fp'].astype(str).str.zfill(2)
+        self.climate_data['county_fp'] = self.climate_data['county_fp'].astype(str).str.zfill(3)
+
+        # Parse date and extract year/month
+        self.climate_data['date_str'] = self.climate_data['date'].astype(str)
+        self.climate_data['year'] = self.climate_data['date_str'].str[:4].astype(int)
+        self.climate_data['month'] = self.climate_data['date_str'].str[4:6].astype(int)
+
+        # Filter to growing season (April-October)
+        growing_season = self.climate_data[
+            (self.climate_data['month'] >= 4) &
+            (self.climate_data['month'] <= 10)
+        ].copy()
+
+        logger.info(f"Filtered to growing season: {len(growing_season)} records")
+
+        # Aggregate by county and year
+        climate_features = growing_season.groupby(
+            ['state_fp', 'county_fp', 'year']
+        ).agg({
+            'T2M': ['mean', 'max', 'min', 'std'],
+            'RH2M': ['mean', 'std'],
+            'ALLSKY_SFC_SW_DWN': ['mean', 'std'],
+            'latitude': 'first',
+            'longitude': 'first',
+            'county': 'first'
+        }).reset_index()
+
+        # Flatten column names
+        climate_features.columns = ['_'.join(col).strip('_') for col in climate_features.columns.values]
+
+        # Add extreme temperature features
+        extreme_heat = growing_season[growing_season['T2M'] > 30].groupby(
+            ['state_fp', 'county_fp', 'year']
+        ).size().reset_index(name='extreme_heat_days')
+
+        climate_features = climate_features.merge(
+            extreme_heat,
+            on=['state_fp', 'county_fp', 'year'],
+            how='left'
+        )
+        climate_features['extreme_heat_days'] = climate_features['extreme_heat_days'].fillna(0)
+
+        # True daily heat days, degree days and hot runs next to the monthly
+        # extreme_heat_days the model was trained on
+        if self.daily_climate is not None:
+            climate_features = climate_features.merge(
+                self.daily_climate.features(),
+                on=['state_fp', 'county_fp', 'year'],
+                how='left'
+            )
+
+        logger.info(f"Created climate features: {len(climate_features)} county-year combinations")
+
+        return climate_features
+
+    def prepare_satellite_data(self):
+        """Aggregate satellite data to growing season features."""
+        logger.info("Preparing satellite data...")
+
+        # Standardize FIPS codes to strings
+        self.satellite_data['state_fp'] = self.satellite_data['state_fp'].astype(str).str.zfill(2)
+        self.satellite_data['county_fp'] = self.satellite_data['county_fp'].astype(str).str.zfill(3)
+
+        # Parse date and extract year/month
+        self.satellite_data['date_str'] = self.satellite_data['date'].astype(str)
+        self.satellite_data['year'] = self.satellite_data['date_str'].str[:4].astype(int)
+        self.satellite_data['month'] = self.satellite_data['date_str'].str[4:6].astype(int)
+
+        # Filter to growing season (April-October)
+        growing_season = self.satellite_data[
+            (self.satellite_data['month'] >= 4) &
+            (self.satellite_data['month'] <= 10)
+        ].copy()
+
+        logger.info(f"Filtered to growing season: {len(growing_season)} records")
+
+        # Aggregate by county and year
+        satellite_features = growing_season.groupby(
+            ['state_fp', 'county_fp', 'year']
+        ).agg({
+            'NDVI': ['mean', 'max', 'min', 'std'],
+            'EVI': ['mean', 'std'],
+            'NDWI': ['mean', 'std']
+        }).reset_index()
+
+        # Flatten column names
+        satellite_features.columns = ['_'.join(col).strip('_') for col in satellite_features.columns.values]
+
+        logger.info(f"Created satellite features: {len(satellite_features)} county-year combinations")
+
+        return satellite_features
+
+    def prepare_yield_data(self):
+        """Clean and prepare yield data."""
+        logger.info("Preparing yield data...")
+
+        # Keep only county-level data
+        yield_clean = self.yield_data[
+            self.yield_data['Geo Level'] == 'COUNTY'
+        ].copy()
+        yield_clean['County ANSI'] = yield_clean['County ANSI'].fillna(0).astype(int)
+        yield_clean['county_fp'] = yield_clean['County ANSI'].astype(str).str.zfill(3)
+        yield_clean['state_fp'] = yield_clean['State ANSI'].astype(str).str.zfill(2)
+
+        # Remove rows with missing FIPS codes
+        yield_clean = yield_clean[
+            (yield_clean['County ANSI'] != 0) &
+            (yield_clean['county_fp'] != '000')
+        ]
+
+        # Select relevant columns
+        yield_clean = yield_clean[[
+            'Year', 'state_fp', 'county_fp', 'State', 'County',
+            'crop', 'Value', 'CV (%)'
+        ]].copy()
+
+        # Rename columns
+        yield_clean.columns = [
+            'year', 'state_fp', 'county_fp', 'state_name', 'county_name',
+            'crop', 'yield_value', 'yield_cv'
+        ]
+
+        logger.info(f"Cleaned yield data: {len(yield_clean)} records")
+        logger.info(f"  Corn records: {len(yield_clean[yield_clean['crop'] == 'corn'])}")
+        logger.info(f"  Soybean records: {len(yield_clean[yield_clean['crop'] == 'soybean'])}")
+
+        return yield_clean
+
+    def merge_datasets(self):
+        """Merge all datasets together."""
+        logger.info("Merging all datasets...")
+
+        # Prepare each dataset
+        climate_features = self.prepare_climate_data()
+        satellite_features = self.prepare_satellite_data()
+        yield_clean = self.prepare_yield_data()
+
+        # Merge climate and satellite
+        logger.info("Merging climate and satellite data...")
+        climate_satellite = climate_features.merge(
+            satellite_features,
+            on=['state_fp', 'county_fp', 'year'],
+            how='inner'
+        )
+        logger.info(f"Climate + Satellite merged: {len(climate_satellite)} records")
+
+        # Merge with yield data
+        logger.info("Merging with yield data...")
+        final_data = climate_satellite.merge(
+            yield_clean,
+            on=['state_fp', 'county_fp', 'year'],
+            how='inner'
+        )
+
+        logger.info(f"Final merged dataset: {len(final_data)} records")
+        logger.info(f"  Unique counties: {final_data['county_fp'].nunique()}")
+        logger.info(f"  Year range: {final_data['year'].min()} to {final_data['year'].max()}")
+        logger.info(f"  Corn records: {len(final_data[final_data['crop'] == 'corn'])}")
+        logger.info(f"  Soybean records: {len(final_data[final_data['crop'] == 'soybean'])}")
+
+        self.merged_data = final_data
+        return final_data
+
+    def partition_by_state(self, sources, spill_dir, chunksize=CHUNK_ROWS):
+        """
+        Stream CSVs in chunks and spill their rows into per-state partitions.
+
+        Args:
+            sources: Dict of input name (a STATE_COLUMNS key) -> CSV path
+            spill_dir: Directory for the partitions, laid out as
+                <name>/<state_fp>/<chunk>.pkl
+            chunksize: Rows held in memory per chunk
+
+        Returns:
+            Sorted list of the state codes seen in any input
+        """
+        spill_dir = Path(spill_dir)
+        states = set()
+        for name, path in sources.items():
+            column = STATE_COLUMNS[name]
+            n_rows = 0
+            usecols = DAILY_COLUMNS if name == 'daily' else None
+            for i, chunk in enumerate(pd.read_csv(path, usecols=usecols, chunksize=chunksize)):
+                chunk = chunk.dropna(subset=[column])
+                for state, part in chunk.groupby(chunk[column].astype(int), sort=False):
+                    state_dir = spill_dir / name / f'{state:02d}'
+                    state_dir.mkdir(parents=True, exist_ok=True)
+                    part.to_pickle(state_dir / f'{i:06d}.pkl')
+                    states.add(f'{state:02d}')
+                n_rows += len(chunk)
+            logger.info(f"Partitioned {name}: {n_rows} records")
+        return sorted(states)
+
+    @staticmethod
+    def _read_partition(spill_dir, name, state):
+        """One input's rows for one state, or None if it has none."""
+        paths = sorted((Path(spill_dir) / name / state).glob('*.pkl'))
+        if not paths:
+            return None
+        return pd.concat([pd.read_pickle(path) for path in paths], ignore_index=True)
+
+    def merge_datasets_chunked(
+        self,
+        climate_path: str,
+        satellite_path: str,
+        corn_yield_path: str,
+        soybean_yield_path: str,
+        daily_climate_path: str = None,
+        output_path: str = None,
+        chunksize: int = CHUNK_ROWS,
+        spill_dir: str = None,
+        keep_in_memory: bool = None
+    ):
+        """
+        Out-of-core equivalent of load_data() + merge_datasets().
+
+        Growing-season filtering, aggregation and joins run per state
+        partition, and each state's merged rows are written out as soon
+        as they are ready. With output_path, only the current state is
+        held in memory unless keep_in_memory asks for the whole result.
+
+        Args:
+            climate_path, satellite_path, corn_yield_path, soybean_yield_path,
+            daily_climate_path: Inputs as for load_data()
+            output_path: Merged CSV to stream the results to (optional)
+            chunksize: Rows per CSV chunk while partitioning
+            spill_dir: Parent directory for the temporary partitions
+                (default: the system temp directory)
+            keep_in_memory: Also collect the merged dataset (default: only
+                when there is no output_path)
+
+        Returns:
+            The merged dataset (also kept in self.merged_data) when kept in
+            memory, else output_path
+        """
+        sources = {
+            'climate': climate_path,
+            'satellite': satellite_path,
+            'corn': corn_yield_path,
+            'soybean': soybean_yield_path,
+        }
+        if daily_climate_path is not None:
+            sources['daily'] = daily_climate_path
+        if keep_in_memory is None:
+            keep_in_memory = output_path is None
+        if output_path is not None:
+            Path(output_path).unlink(missing_ok=True)
+
+        parts = []
+        columns = None
+        n_states = n_records = 0
+        with tempfile.TemporaryDirectory(dir=spill_dir) as tmp:
+            states = self.partition_by_state(sources, tmp, chunksize=chunksize)
+            for state in states:
+                partitions = {name: self._read_partition(tmp, name, state) for name in sources}
+                yields = [frame.assign(crop=crop) for crop, frame in
+                          [('corn', partitions['corn']), ('soybean', partitions['soybean'])] if frame is not None]
+                if partitions['climate'] is None or partitions['satellite'] is None or not yields:
+                    logger.info(f"State {state}: missing an input, skipped")
+                    continue
+
+                self.climate_data = partitions['climate']
+                self.satellite_data = partitions['satellite']
+                self.yield_data = pd.concat(yields, ignore_index=True)
+                daily = partitions.get('daily')
+                self.daily_climate = DailyClimate.from_frame(daily) if daily is not None else None
+
+                part = self.merge_datasets()
+                if output_path is not None:
+                    # A state without daily records lacks the daily features; fix the header up front
+                    header = columns is None
+                    if header:
+                        columns = self._chunked_columns(part.columns, 'daily' in sources)
+                    part.reindex(columns=columns).to_csv(output_path, mode='a', header=header, index=False)
+                if keep_in_memory:
+                    parts.append(part)
+                n_states += 1
+                n_records += len(part)
+                logger.info(f"State {state}: {len(part)} merged records")
+
+        self.climate_data = self.satellite_data = self.yield_data = self.daily_climate = None
+        logger.info(f"Chunked merge: {n_records} records from {n_states} states")
+        if not keep_in_memory:
+            self.merged_data = None
+            return Path(output_path)
+        self.merged_data = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+        if columns is not None:
+            self.merged_data = self.merged_data.reindex(columns=columns)
+        return self.merged_data
+
+    @staticmethod
+    def _chunked_columns(columns, daily):
+        """Merged CSV header: the columns of a state, plus every daily feature when daily records are merged."""
+        columns = [c for c in columns if c not in DAILY_FEATURES]
+        if not daily:
+            return columns
+        # Same place as in prepare_climate_data(): right after the monthly extreme_heat_days
+        at = columns.index('extreme_heat_days') + 1
+        return columns[:at] + DAILY_FEATURES + columns[at:]
+
+    def save_merged_data(self, output_path: str):
+        """Save merged dataset to CSV."""
+        if self.merged_data is None:
+            raise ValueError("No merged data to save. Run merge_datasets() first.")
+
+        self.merged_data.to_csv(output_path, index=False)
+        logger.info(f"Saved merged data to {output_path}")
+
+    def append_merged_data(self, output_path: str):
+        """Append merged rows (e.g. a single new season) to an existing merged CSV."""
+        if self.merged_data is None:
+            raise ValueError("No merged data to save. Run merge_datasets() first.")
+
+        if not Path(output_path).exists():
+            return self.save_merged_data(output_path)
+
+        # Match the existing column order
+        columns = pd.read_csv(output_path, nrows=0).columns
+        keys = self.merged_data[MERGE_KEYS].astype({'state_fp': int, 'county_fp': int, 'year': int})
+        existing = pd.MultiIndex.from_frame(_tail_keys(output_path, keys['year'].min()))
+        # A rerun, or a retry after a failure, must not duplicate seasons already appended
+        present = pd.MultiIndex.from_frame(keys).isin(existing)
+        if present.any():
+            logger.warning(f"Skipping {int(present.sum())} records already in {output_path}")
+        self.merged_data[~present].reindex(columns=columns).to_csv(
+            output_path, mode='a', header=False, index=False
+        )
+        logger.info(f"Appended {int((~present).sum())} records to {output_path}")
+
+    def get_summary_statistics(self):
+        """Print summary statistics of merged data."""
+        if self.merged_data is None:
+            raise ValueError("No merged data. Run merge_datasets() first.")
+
+        print("\n" + "="*60)
+        print("MERGED DATASET SUMMARY")
+        print("="*60)
+
+        print(f"\nTotal records: {len(self.merged_data):,}")
+        print(f"Unique counties: {self.merged_data['county_fp'].nunique()}")
+        print(f"Year range: {self.merged_data['year'].min()} - {self.merged_data['year'].max()}")
+
+        print("\n--- By Crop ---")
+        print(self.merged_data['crop'].value_counts())
+
+        print("\n--- By State (Top 10) ---")
+        print(self.merged_data['state_name'].value_counts().head(10))
+
+        print("\n--- Yield Statistics ---")
+        print(self.merged_data.groupby('crop')['yield_value'].describe())
+
+        print("\n--- Climate Statistics ---")
+        print(self.merged_data[['T2M_mean', 'RH2M_mean', 'extreme_heat_days']].describe())
+
+        print("\n--- Satellite Statistics ---")
+        print(self.merged_data[['NDVI_mean', 'EVI_mean', 'NDWI_mean']].describe())
+
+        print("\n--- Missing Values ---")
+        print(self.merged_data.isnull().sum()[self.merged_data.isnull().sum() > 0])
+
+        print("\n--- Sample Data ---")
+        print(self.merged_data.head(10))
+
+        return self.merged_data
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Merge climate, satellite and yield data.")
+    parser.add_argument('--chunked', action='store_true',
+                        help="Process one state partition at a time to bound memory")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_ROWS, help="Rows per CSV chunk in chunked mode")
+    parser.add_argument('--spill-dir', default=None, help="Where chunked mode keeps its temporary partitions")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+
+    # Initialize merger
+    merger = CropYieldDataMerger()
+    inputs = dict(
+        climate_path='data/us_county_climate_data.csv',
+        satellite_path='data/us_county_modis_data.csv',
+        corn_yield_path='data/corn_yield_data.csv',
+        soybean_yield_path='data/soybeans_yield_data.csv',
+        daily_climate_path=DAILY_CLIMATE_PATH if Path(DAILY_CLIMATE_PATH).exists() else None
+    )
+
+    if args.chunked:
+        # Streams each state's rows to the merged CSV as it finishes, without
+        # holding the whole result (so no summary statistics)
+        return merger.merge_datasets_chunked(
+            **inputs, output_path='data/merged_crop_climate_data.csv',
+            chunksize=args.chunksize, spill_dir=args.spill_dir
+        )
+
+    # Load all data
+    merger.load_data(**inputs)
+
+    # Merge datasets
+    merged_data = merger.merge_datasets()
+
+    # Save merged data
+    merger.save_merged_data('data/merged_crop_climate_data.csv')
+
+    # Print summary
+    merger.get_summary_statistics()
+
+    return merged_data
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    merged_data = main()
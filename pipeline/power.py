@@ -0,0 +1,303 @@
+"""
+Regional bulk download of monthly POWER climate, interpolated to counties.
+
+The notebook's NASAPowerDataFetcher makes one point request per county,
+which is about 3,100 requests for the contiguous US. POWER's regional
+endpoint returns every grid point in a box of up to REGION_MAX_DEGREES
+on a side. RegionalFetcher tiles the counties' extent into such blocks
+and makes one request per block and variable. For the contiguous US
+that is 21 blocks x 3 variables = 63 requests. Each parsed block is
+cached under the cache directory, so reruns and overlapping extents
+reuse earlier downloads.
+
+The blocks are assembled into one (time, lat, lon) array per variable.
+Each county is then bilinearly interpolated from the four grid points
+around its center. bilinear_weights() builds the interpolation as a
+sparse counties x cells matrix, so grid.county_series() interpolates
+every county and month in one product.
+
+A local stand-in server that serves synthetic blocks in the same
+format is in benchmarks/power_server.py.
+
+Usage:
+    python -m pipeline.power --geojson data/counties.geojson --start 2005 --end 2023 \\
+        --output data/us_county_climate_data.csv
+    python -m pipeline.power --base-url http://127.0.0.1:8765/api/temporal/monthly/regional \\
+        --save-grid data/power_grid.npz
+"""
+
+import argparse
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import requests
+from scipy import sparse
+
+from pipeline.grid import POWER_DLAT, POWER_DLON, VARIABLES, Grid, county_centers, county_records, save_values
+from pipeline.spatial import load_geojson
+
+logger = logging.getLogger(__name__)
+
+REGIONAL_URL = "https://power.larc.nasa.gov/api/temporal/monthly/regional"
+
+# POWER accepts regional boxes between 2 and 10 degrees on a side, one parameter per request
+REGION_MIN_DEGREES = 2.0
+REGION_MAX_DEGREES = 10.0
+
+# Missing-value marker in POWER responses
+FILL_VALUE = -999
+
+CACHE_DIR = 'data/power'
+
+
+def region_blocks(lat_min, lat_max, lon_min, lon_max, size=REGION_MAX_DEGREES):
+    """
+    Tile a lat/lon extent into request boxes.
+
+    Boxes are aligned to multiples of size, so extents that overlap
+    request (and cache) the same boxes. Each box is at least
+    REGION_MIN_DEGREES on a side.
+
+    Returns:
+        List of (lat_min, lat_max, lon_min, lon_max) tuples
+    """
+    lat_edges = np.arange(np.floor(lat_min / size) * size, lat_max, size)
+    lon_edges = np.arange(np.floor(lon_min / size) * size, lon_max, size)
+    blocks = []
+    for lat0 in lat_edges:
+        for lon0 in lon_edges:
+            lat1 = min(lat0 + size, max(lat_max, lat0 + REGION_MIN_DEGREES))
+            lon1 = min(lon0 + size, max(lon_max, lon0 + REGION_MIN_DEGREES))
+            blocks.append((float(lat0), float(lat1), float(lon0), float(lon1)))
+    return blocks
+
+
+def parse_regional(response, variable):
+    """
+    Grid points and monthly values of one regional response.
+
+    Args:
+        response: POWER regional JSON (a FeatureCollection of points)
+        variable: Parameter to read
+
+    Returns:
+        (lat, lon, times, values): point coordinates (points,), YYYYMM
+        integers (times,) and a (points, times) float32 array with NaN for
+        FILL_VALUE. Annual entries (month 13) are dropped.
+    """
+    features = response.get('features', [])
+    if not features:
+        empty = np.empty(0)
+        return empty, empty, np.empty(0, dtype=int), np.empty((0, 0), dtype=np.float32)
+
+    series = [feature['properties']['parameter'][variable] for feature in features]
+    times = np.array(sorted(int(key) for key in series[0] if int(key) % 100 <= 12))
+    keys = [str(t) for t in times]
+    values = np.array([[point.get(key, FILL_VALUE) for key in keys] for point in series], dtype=np.float32)
+    values[values == FILL_VALUE] = np.nan
+
+    coordinates = np.array([feature['geometry']['coordinates'][:2] for feature in features], dtype=float)
+    return coordinates[:, 1], coordinates[:, 0], times, values
+
+
+def bilinear_weights(grid, lat, lon):
+    """
+    Sparse bilinear interpolation from grid cell centers to points.
+
+    Points outside the cell-center hull take the nearest edge values.
+    Combined with grid.county_series(), which renormalizes over non-NaN
+    cells, a missing corner is dropped instead of voiding the point.
+
+    Args:
+        grid: Grid the values are on (at least 2 x 2 cells)
+        lat, lon: Point coordinates (points,)
+
+    Returns:
+        (points x grid.n_cells) CSR matrix, four entries per row summing to 1
+    """
+    y = np.clip((np.asarray(lat) - grid.lat[0]) / grid.dlat, 0, grid.ny - 1)
+    x = np.clip((np.asarray(lon) - grid.lon[0]) / grid.dlon, 0, grid.nx - 1)
+    i = np.minimum(np.floor(y).astype(int), grid.ny - 2)
+    j = np.minimum(np.floor(x).astype(int), grid.nx - 2)
+    fy, fx = y - i, x - j
+
+    rows = np.repeat(np.arange(len(y)), 4)
+    cols = np.column_stack([i * grid.nx + j, i * grid.nx + j + 1,
+                            (i + 1) * grid.nx + j, (i + 1) * grid.nx + j + 1]).ravel()
+    weights = np.column_stack([(1 - fy) * (1 - fx), (1 - fy) * fx, fy * (1 - fx), fy * fx]).ravel()
+    return sparse.csr_matrix((weights, (rows, cols)), shape=(len(y), grid.n_cells))
+
+
+class RegionalFetcher:
+    """Fetch, cache and assemble regional POWER blocks."""
+
+    def __init__(self, base_url=REGIONAL_URL, cache_dir=CACHE_DIR, max_retries=3, retry_delay=5):
+        """
+        Args:
+            base_url: Regional endpoint (a stand-in server's URL for offline runs)
+            cache_dir: Directory of parsed blocks; None disables caching
+            max_retries: Maximum number of attempts per block
+            retry_delay: Delay in seconds between attempts
+        """
+        self.base_url = base_url
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.session = requests.Session()
+        self.requests_made = 0
+
+    def _cache_path(self, block, variable, start_year, end_year):
+        lat0, lat1, lon0, lon1 = block
+        return self.cache_dir / f'{variable}_{lat0:g}_{lat1:g}_{lon0:g}_{lon1:g}_{start_year}_{end_year}.npz'
+
+    def _request(self, block, variable, start_year, end_year):
+        lat0, lat1, lon0, lon1 = block
+        params = {
+            'parameters': variable,
+            'community': 'AG',
+            'latitude-min': lat0,
+            'latitude-max': lat1,
+            'longitude-min': lon0,
+            'longitude-max': lon1,
+            'start': start_year,
+            'end': end_year,
+            'format': 'JSON',
+        }
+        for attempt in range(self.max_retries):
+            try:
+                self.requests_made += 1
+                response = self.session.get(self.base_url, params=params, timeout=120)
+                response.raise_for_status()
+                return response.json()
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Block {block} {variable} attempt {attempt + 1}/{self.max_retries} failed: {e}")
+                if attempt < self.max_retries - 1:
+                    time.sleep(self.retry_delay)
+        raise RuntimeError(f"Could not fetch {variable} for block {block}")
+
+    def fetch_block(self, block, variable, start_year, end_year):
+        """
+        One block's (lat, lon, times, values), from the cache when present.
+
+        Raises:
+            RuntimeError: If every attempt fails
+        """
+        path = self._cache_path(block, variable, start_year, end_year) if self.cache_dir else None
+        if path is not None and path.exists():
+            with np.load(path) as stored:
+                return stored['lat'], stored['lon'], stored['time'], stored['values']
+
+        lat, lon, times, values = parse_regional(self._request(block, variable, start_year, end_year), variable)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            np.savez_compressed(path, lat=lat, lon=lon, time=times, values=values)
+        return lat, lon, times, values
+
+    def fetch_grid(self, lat_min, lat_max, lon_min, lon_max, start_year, end_year, variables=VARIABLES):
+        """
+        Download an extent and assemble it onto one grid.
+
+        The grid is read off the returned point coordinates, so it follows
+        whatever lattice the server uses.
+
+        Returns:
+            (grid, times, {variable: (times, ny, nx) float32 array}); cells
+            no block covered are NaN
+        """
+        start = time.perf_counter()
+        blocks = region_blocks(lat_min, lat_max, lon_min, lon_max)
+        fetched = {name: [self.fetch_block(block, name, start_year, end_year) for block in blocks]
+                   for name in variables}
+
+        parts = [part for name in variables for part in fetched[name] if len(part[0])]
+        if not parts:
+            raise RuntimeError("No grid points returned for the requested extent")
+        lat = np.unique(np.round(np.concatenate([part[0] for part in parts]), 6))
+        lon = np.unique(np.round(np.concatenate([part[1] for part in parts]), 6))
+        times = np.unique(np.concatenate([part[2] for part in parts]))
+        dlat = np.diff(lat).min() if len(lat) > 1 else POWER_DLAT
+        dlon = np.diff(lon).min() if len(lon) > 1 else POWER_DLON
+        grid = Grid(lat[0] - dlat / 2, lon[0] - dlon / 2, dlat, dlon,
+                    round((lat[-1] - lat[0]) / dlat) + 1, round((lon[-1] - lon[0]) / dlon) + 1)
+
+        values = {}
+        for name in variables:
+            field = np.full((len(times), grid.ny, grid.nx), np.nan, dtype=np.float32)
+            for block_lat, block_lon, block_times, block_values in fetched[name]:
+                if not len(block_lat):
+                    continue
+                i = np.round((block_lat - lat[0]) / dlat).astype(int)
+                j = np.round((block_lon - lon[0]) / dlon).astype(int)
+                t = np.searchsorted(times, block_times)
+                field[t[None, :], i[:, None], j[:, None]] = block_values
+            values[name] = field
+
+        logger.info(f"Assembled {grid} from {len(blocks)} blocks x {len(variables)} variables "
+                    f"({self.requests_made} requests) in {time.perf_counter() - start:.1f}s")
+        return grid, times, values
+
+
+def fetch_county_climate(geojson, start_year, end_year, fetcher=None, grid_path=None):
+    """
+    County records interpolated from regional blocks.
+
+    Args:
+        geojson: County boundaries; each county is sampled at its mean
+            boundary vertex (see grid.county_centers)
+        start_year, end_year: Inclusive year range
+        fetcher: RegionalFetcher (default: the public endpoint, default cache)
+        grid_path: Also write the assembled grid here (grid.save_values), e.g.
+            for area weighting with pipeline.grid
+
+    Returns:
+        DataFrame with grid.RECORD_COLUMNS
+    """
+    fetcher = fetcher or RegionalFetcher()
+    _, centers = county_centers(geojson)
+    fips = np.array(sorted(centers))
+    points = np.array([centers[code] for code in fips])
+
+    # One grid step of padding keeps every county inside the interpolation hull
+    grid, times, values = fetcher.fetch_grid(points[:, 1].min() - POWER_DLAT, points[:, 1].max() + POWER_DLAT,
+                                             points[:, 0].min() - POWER_DLON, points[:, 0].max() + POWER_DLON,
+                                             start_year, end_year)
+    if grid_path is not None:
+        save_values(grid_path, grid, times, values)
+        logger.info(f"Saved grid to {grid_path}")
+
+    start = time.perf_counter()
+    weights = bilinear_weights(grid, points[:, 1], points[:, 0])
+    records = county_records(geojson, fips, weights, times, values)
+    logger.info(f"Interpolated {len(fips)} counties x {len(times)} months in {time.perf_counter() - start:.2f}s")
+    return records
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Download regional POWER blocks and interpolate to counties.")
+    parser.add_argument('--geojson', default='data/counties.geojson', help="County boundaries path or URL")
+    parser.add_argument('--start', type=int, default=2005, help="First year")
+    parser.add_argument('--end', type=int, default=2023, help="Last year")
+    parser.add_argument('--base-url', default=REGIONAL_URL,
+                        help="Regional endpoint (e.g. a benchmarks.power_server stand-in)")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="Directory of cached blocks")
+    parser.add_argument('--save-grid', help="Also write the assembled grid (.npz) for pipeline.grid")
+    parser.add_argument('--output', default='data/us_county_climate_data.csv')
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    geojson = load_geojson(args.geojson)
+    fetcher = RegionalFetcher(base_url=args.base_url, cache_dir=args.cache_dir)
+    records = fetch_county_climate(geojson, args.start, args.end, fetcher=fetcher, grid_path=args.save_grid)
+    records.to_csv(args.output, index=False)
+    print(f"Saved {len(records)} county-month records to {args.output}")
+    return records
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
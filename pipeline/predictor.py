@@ -0,0 +1,790 @@
+"""Train and compare models predicting yield volatility change."""
+
+import argparse
+import itertools
+import pickle
+import time
+import warnings
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold, cross_val_score
+from xgboost import XGBRegressor
+
+from pipeline.retrain import holdout_mask
+from pipeline.routing import (MIN_ROWS, ROUTE_COLUMN, ROUTED_MODEL_FILE, ROUTING_COMPARISON_FILE, ROUTING_MODES,
+                              fit_routed, state_regions)
+from pipeline.schema import BASELINE_FEATURES, CLIMATE_FEATURES, SATELLITE_FEATURES
+
+# Hyperparameter grids for search mode. XGBoost n_estimators is an upper
+# bound; early stopping on each validation fold picks the actual count.
+XGB_PARAM_GRID = {
+    'max_depth': [3, 5, 7],
+    'learning_rate': [0.05, 0.1],
+    'min_child_weight': [1, 3],
+    'subsample': [0.8],
+    'colsample_bytree': [0.8],
+}
+RF_PARAM_GRID = {
+    'n_estimators': [100, 300],
+    'max_depth': [8, 10, None],
+    'min_samples_split': [5],
+    'min_samples_leaf': [1, 2],
+}
+XGB_MAX_ESTIMATORS = 1000
+XGB_EARLY_STOPPING_ROUNDS = 30
+
+
+def _expand_grid(grid):
+    """Expand a parameter grid dict into a list of parameter dicts."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+def _build_model(family, params, n_jobs=1, **overrides):
+    """Construct a histogram-based XGBoost or a Random Forest regressor."""
+    if family == 'XGBoost':
+        return XGBRegressor(
+            tree_method='hist',
+            random_state=42,
+            n_jobs=n_jobs,
+            **{'n_estimators': XGB_MAX_ESTIMATORS, **params, **overrides}
+        )
+    return RandomForestRegressor(random_state=42, n_jobs=n_jobs, **params, **overrides)
+
+
+def _score_fold(family, params, X, y, train_idx, val_idx):
+    """Fit one configuration on one CV fold; return (R², best iteration, seconds)."""
+    start = time.perf_counter()
+    X_fit, X_val = X.iloc[train_idx], X.iloc[val_idx]
+    y_fit, y_val = y.iloc[train_idx], y.iloc[val_idx]
+
+    if family == 'XGBoost':
+        model = _build_model(family, params, early_stopping_rounds=XGB_EARLY_STOPPING_ROUNDS)
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+        best_iteration = model.best_iteration
+    else:
+        model = _build_model(family, params)
+        model.fit(X_fit, y_fit)
+        best_iteration = np.nan
+
+    score = r2_score(y_val, model.predict(X_val))
+    return score, best_iteration, time.perf_counter() - start
+
+
+class VolatilityPredictor:
+    """Predict crop yield volatility using climate and satellite data."""
+
+    def __init__(self, data_path='volatility_final_analysis.csv'):
+        """Load and prepare data."""
+        print("="*80)
+        print("CROP YIELD VOLATILITY PREDICTION MODEL")
+        print("="*80)
+        print("\n1. Loading data...")
+
+        self.data = pd.read_csv(data_path)
+        print(f"   Loaded {len(self.data)} records")
+
+        self.models = {}
+        self.results = {}
+        self.X_train = None
+        self.X_test = None
+        self.y_train = None
+        self.y_test = None
+        self.feature_names = None
+        self.search_results = None
+        self.routing_comparison = None
+
+    def prepare_features(self):
+        """Prepare features and target for modeling."""
+        print("\n2. Preparing features...")
+
+        # Combine all features (crop dummy is added below)
+        all_features = CLIMATE_FEATURES + SATELLITE_FEATURES + BASELINE_FEATURES
+
+        # Check for missing values
+        clean_data = self.data[all_features + ['yield_cv_change', 'crop']].dropna()
+        print(f"   Removed {len(self.data) - len(clean_data)} rows with missing values")
+        print(f"   Final dataset: {len(clean_data)} samples")
+
+        # Prepare features
+        X = clean_data[all_features].copy()
+
+        # Add crop type as dummy variable
+        crop_dummies = pd.get_dummies(clean_data['crop'], prefix='crop', drop_first=True)
+        X = pd.concat([X, crop_dummies], axis=1)
+
+        # Target variable
+        y = clean_data['yield_cv_change'].copy()
+
+        self.feature_names = X.columns.tolist()
+
+        print(f"   Features: {len(self.feature_names)}")
+        print(f"   Target: yield_cv_change (volatility change %)")
+
+        # Train-test split (80-20) by the stable county-crop hash of pipeline/retrain.py,
+        # so the exported models never see the rows warm-start retraining is judged on
+        # (rows shuffled as train_test_split would, since cross_val_score folds are contiguous)
+        test = holdout_mask(self.data.loc[clean_data.index])
+        order = np.random.default_rng(42).permutation(len(X))
+        X_shuffled, y_shuffled, test = X.iloc[order], y.iloc[order], test[order]
+        self.X_train, self.X_test = X_shuffled[~test], X_shuffled[test]
+        self.y_train, self.y_test = y_shuffled[~test], y_shuffled[test]
+
+        print(f"   Training samples: {len(self.X_train)}")
+        print(f"   Test samples: {len(self.X_test)}")
+
+        return X, y
+
+    def train_models(self, search=False, **search_kwargs):
+        """Train all three models (tuning RF/XGBoost via search_models() if search=True)."""
+        if search:
+            return self._train_searched_models(**search_kwargs)
+
+        print("\n3. Training models...")
+        print("-" * 80)
+
+        # Model 1: Linear Regression (Baseline)
+        print("\n   Model 1: Linear Regression (Baseline)")
+        lr_model = LinearRegression()
+        lr_model.fit(self.X_train, self.y_train)
+        self.models['Linear Regression'] = lr_model
+        self._evaluate_model('Linear Regression', lr_model)
+
+        # Model 2: Random Forest (Primary)
+        print("\n   Model 2: Random Forest (Primary Model)")
+        rf_model = RandomForestRegressor(
+            n_estimators=100,
+            max_depth=10,
+            min_samples_split=5,
+            min_samples_leaf=2,
+            random_state=42,
+            n_jobs=-1
+        )
+        rf_model.fit(self.X_train, self.y_train)
+        self.models['Random Forest'] = rf_model
+        self._evaluate_model('Random Forest', rf_model)
+
+        # Model 3: XGBoost (Best Performance)
+        print("\n   Model 3: XGBoost (Advanced Model)")
+        xgb_model = XGBRegressor(
+            n_estimators=100,
+            learning_rate=0.1,
+            max_depth=5,
+            min_child_weight=3,
+            subsample=0.8,
+            colsample_bytree=0.8,
+            random_state=42,
+            n_jobs=-1
+        )
+        xgb_model.fit(self.X_train, self.y_train)
+        self.models['XGBoost'] = xgb_model
+        self._evaluate_model('XGBoost', xgb_model)
+
+        print("\n" + "-" * 80)
+
+    def search_models(self, n_folds=5, prune_after=2, keep_fraction=0.25, n_jobs=-1):
+        """
+        Cross-validated hyperparameter search over XGBoost and Random Forest.
+
+        Every (configuration, fold) fit runs as a separate job across cores.
+        All configurations are scored on the first prune_after folds; only the
+        best keep_fraction of each model family runs the remaining folds.
+        XGBoost uses histogram tree building and stops early on each
+        validation fold.
+
+        Args:
+            n_folds: Number of CV folds
+            prune_after: Folds every configuration runs before pruning
+            keep_fraction: Share of configurations per family kept after pruning
+            n_jobs: Parallel jobs (-1 for all cores)
+
+        Returns:
+            DataFrame with one row per configuration
+        """
+        print("\n3. Searching hyperparameters...")
+        print("-" * 80)
+
+        configs = [('XGBoost', params) for params in _expand_grid(XGB_PARAM_GRID)]
+        configs += [('Random Forest', params) for params in _expand_grid(RF_PARAM_GRID)]
+        folds = list(KFold(n_splits=n_folds, shuffle=True, random_state=42).split(self.X_train))
+
+        scores = {i: [] for i in range(len(configs))}
+        iterations = {i: [] for i in range(len(configs))}
+        seconds = {i: [] for i in range(len(configs))}
+
+        def run(config_ids, fold_ids):
+            tasks = [(i, f) for i in config_ids for f in fold_ids]
+            outputs = Parallel(n_jobs=n_jobs)(
+                delayed(_score_fold)(configs[i][0], configs[i][1],
+                                     self.X_train, self.y_train, *folds[f])
+                for i, f in tasks
+            )
+            for (i, _), (score, best_iteration, elapsed) in zip(tasks, outputs):
+                scores[i].append(score)
+                iterations[i].append(best_iteration)
+                seconds[i].append(elapsed)
+
+        search_start = time.perf_counter()
+        run(range(len(configs)), range(prune_after))
+
+        # Prune within each family so RF and XGBoost both keep candidates
+        survivors = []
+        for family in ['XGBoost', 'Random Forest']:
+            ids = [i for i, (fam, _) in enumerate(configs) if fam == family]
+            ranked = sorted(ids, key=lambda i: np.mean(scores[i]), reverse=True)
+            survivors += ranked[:max(1, int(np.ceil(len(ids) * keep_fraction)))]
+
+        run(survivors, range(prune_after, n_folds))
+        search_seconds = time.perf_counter() - search_start
+
+        self.search_results = pd.DataFrame([
+            {
+                'model': family,
+                'params': params,
+                'cv_r2_mean': np.mean(scores[i]),
+                'cv_r2_std': np.std(scores[i]),
+                'cv_scores': scores[i],
+                'folds_run': len(scores[i]),
+                'pruned': i not in survivors,
+                'best_iteration': np.nanmean(iterations[i]) if family == 'XGBoost' else np.nan,
+                'wall_time_s': np.sum(seconds[i]),
+            }
+            for i, (family, params) in enumerate(configs)
+        ]).sort_values(['pruned', 'cv_r2_mean'], ascending=[True, False]).reset_index(drop=True)
+
+        print(f"   Evaluated {len(configs)} configurations, {len(configs) - len(survivors)} pruned "
+              f"after {prune_after} folds")
+        print(f"   Search wall time: {search_seconds:.1f}s")
+        print("\n" + self.search_results[['model', 'params', 'cv_r2_mean', 'folds_run',
+                                          'wall_time_s']].head(10).to_string(index=False))
+
+        return self.search_results
+
+    def _train_searched_models(self, **search_kwargs):
+        """Train Linear Regression and the best searched RF/XGBoost configurations."""
+        results = self.search_models(**search_kwargs)
+
+        print("\n   Model 1: Linear Regression (Baseline)")
+        lr_model = LinearRegression()
+        lr_model.fit(self.X_train, self.y_train)
+        self.models['Linear Regression'] = lr_model
+        self._evaluate_model('Linear Regression', lr_model)
+
+        for family in ['Random Forest', 'XGBoost']:
+            best = results[(results['model'] == family) & ~results['pruned']].iloc[0]
+            print(f"\n   {family} (searched): {best['params']}")
+
+            overrides = {}
+            if family == 'XGBoost':
+                # Refit on all training rows with the early-stopped tree count
+                overrides['n_estimators'] = int(round(best['best_iteration'])) + 1
+            model = _build_model(family, best['params'], n_jobs=-1, **overrides)
+            model.fit(self.X_train, self.y_train)
+            self.models[family] = model
+            self._evaluate_model(family, model, cv_scores=best['cv_scores'])
+
+        print("\n" + "-" * 80)
+
+    def train_routed_model(self, by='region_crop', min_rows=MIN_ROWS, n_folds=5, n_jobs=-1):
+        """
+        Fit per-group XGBoost models behind a RoutedModel (see pipeline/routing.py).
+
+        The group models of each CV fold, and then of the full training
+        split, are fitted in parallel across a process pool. The result is
+        evaluated like the other models, as 'Routed XGBoost'. The global
+        XGBoost is cross-validated on the same folds, and the comparison
+        (self.routing_comparison) decides whether export_models() ships
+        the routed model.
+
+        Args:
+            by: 'crop', 'region' or 'region_crop'
+            min_rows: Groups with fewer training rows use the global fallback
+            n_folds: CV folds
+            n_jobs: Parallel fits (-1 for all cores)
+        """
+        print(f"\n   Routed XGBoost (by {by}, groups of {min_rows}+ rows)")
+        X_train = self.X_train.assign(**{ROUTE_COLUMN: state_regions(self.data.loc[self.X_train.index, 'state_fp'])})
+        X_test = self.X_test.assign(**{ROUTE_COLUMN: state_regions(self.data.loc[self.X_test.index, 'state_fp'])})
+
+        start = time.perf_counter()
+        cv_scores, global_scores = [], []
+        for fit_idx, val_idx in KFold(n_splits=n_folds, shuffle=True, random_state=42).split(X_train):
+            X_fit, X_val = X_train.iloc[fit_idx], X_train.iloc[val_idx]
+            fold_model = fit_routed(X_fit, self.y_train.iloc[fit_idx], by=by, region=X_fit[ROUTE_COLUMN],
+                                    min_rows=min_rows, n_jobs=n_jobs)
+            cv_scores.append(r2_score(self.y_train.iloc[val_idx], fold_model.predict(X_val)))
+            # The exported global XGBoost on the same folds, for a like-for-like comparison
+            global_model = clone(self.models['XGBoost']).fit(self.X_train.iloc[fit_idx], self.y_train.iloc[fit_idx])
+            global_scores.append(r2_score(self.y_train.iloc[val_idx], global_model.predict(self.X_train.iloc[val_idx])))
+
+        model = fit_routed(self.X_train, self.y_train, by=by, region=X_train[ROUTE_COLUMN],
+                           min_rows=min_rows, n_jobs=n_jobs)
+        print(f"      {len(model.models)} group models + global fallback, "
+              f"trained with CV in {time.perf_counter() - start:.1f}s")
+        self.models['Routed XGBoost'] = model
+        self._evaluate_model('Routed XGBoost', model, cv_scores=cv_scores, X_train=X_train, X_test=X_test)
+
+        self.routing_comparison = pd.DataFrame([
+            {'model': name, 'routing': by, 'cv_r2_mean': np.mean(scores), 'cv_r2_std': np.std(scores),
+             'test_r2': self.results[name]['test_r2'], 'test_rmse': self.results[name]['test_rmse']}
+            for name, scores in [('XGBoost', global_scores), ('Routed XGBoost', cv_scores)]
+        ])
+        routed_wins = np.mean(cv_scores) > np.mean(global_scores)
+        self.routing_comparison['preferred'] = [not routed_wins, routed_wins]
+        print(f"      Same-fold CV R²: routed {np.mean(cv_scores):.4f} vs global {np.mean(global_scores):.4f} "
+              f"-> {'routed' if routed_wins else 'global'} model preferred")
+        return model
+
+    def _evaluate_model(self, name, model, cv_scores=None, X_train=None, X_test=None):
+        """
+        Evaluate a single model (reusing CV scores from a search if given).
+
+        X_train/X_test override the stored splits, e.g. with the region
+        column a RoutedModel needs.
+        """
+        # Predictions
+        y_train_pred = model.predict(self.X_train if X_train is None else X_train)
+        y_test_pred = model.predict(self.X_test if X_test is None else X_test)
+
+        # Metrics
+        train_r2 = r2_score(self.y_train, y_train_pred)
+        test_r2 = r2_score(self.y_test, y_test_pred)
+        test_rmse = np.sqrt(mean_squared_error(self.y_test, y_test_pred))
+        test_mae = mean_absolute_error(self.y_test, y_test_pred)
+
+        # Cross-validation
+        if cv_scores is None:
+            cv_scores = cross_val_score(model, self.X_train, self.y_train,
+                                        cv=5, scoring='r2', n_jobs=-1)
+        cv_scores = np.asarray(cv_scores)
+
+        # Store results
+        self.results[name] = {
+            'train_r2': train_r2,
+            'test_r2': test_r2,
+            'test_rmse': test_rmse,
+            'test_mae': test_mae,
+            'cv_r2_mean': cv_scores.mean(),
+            'cv_r2_std': cv_scores.std(),
+            'predictions': y_test_pred
+        }
+
+        # Print results
+        print(f"      Train R²: {train_r2:.4f}")
+        print(f"      Test R²:  {test_r2:.4f}")
+        print(f"      Test RMSE: {test_rmse:.4f}")
+        print(f"      Test MAE:  {test_mae:.4f}")
+        print(f"      CV R² (5-fold): {cv_scores.mean():.4f} (+/- {cv_scores.std():.4f})")
+
+    def compare_models(self):
+        """Compare all models side by side."""
+        print("\n4. Model Comparison")
+        print("-" * 80)
+
+        comparison_df = pd.DataFrame({
+            'Model': list(self.results.keys()),
+            'Test R²': [r['test_r2'] for r in self.results.values()],
+            'Test RMSE': [r['test_rmse'] for r in self.results.values()],
+            'Test MAE': [r['test_mae'] for r in self.results.values()],
+            'CV R² Mean': [r['cv_r2_mean'] for r in self.results.values()]
+        }).sort_values('Test R²', ascending=False)
+
+        print("\n" + comparison_df.to_string(index=False))
+
+        best_model = comparison_df.iloc[0]['Model']
+        print(f"\n   ✓ Best Model: {best_model}")
+
+        return comparison_df
+
+    def analyze_feature_importance(self):
+        """Analyze feature importance from Random Forest and XGBoost."""
+        print("\n5. Feature Importance Analysis")
+        print("-" * 80)
+
+        # Random Forest importance
+        rf_importance = pd.DataFrame({
+            'Feature': self.feature_names,
+            'Importance': self.models['Random Forest'].feature_importances_
+        }).sort_values('Importance', ascending=False)
+
+        print("\n   Random Forest - Top 10 Features:")
+        print(rf_importance.head(10).to_string(index=False))
+
+        # XGBoost importance
+        xgb_importance = pd.DataFrame({
+            'Feature': self.feature_names,
+            'Importance': self.models['XGBoost'].feature_importances_
+        }).sort_values('Importance', ascending=False)
+
+        print("\n   XGBoost - Top 10 Features:")
+        print(xgb_importance.head(10).to_string(index=False))
+
+        return rf_importance, xgb_importance
+
+    def analyze_linear_coefficients(self):
+        """Analyze coefficients from Linear Regression."""
+        print("\n6. Linear Regression Coefficients")
+        print("-" * 80)
+
+        coefficients = pd.DataFrame({
+            'Feature': self.feature_names,
+            'Coefficient': self.models['Linear Regression'].coef_
+        }).sort_values('Coefficient', key=abs, ascending=False)
+
+        print("\n   Top 10 Most Influential Features:")
+        print(coefficients.head(10).to_string(index=False))
+
+        print("\n   Interpretation:")
+        top_feature = coefficients.iloc[0]
+        print(f"   - For every 1-unit increase in {top_feature['Feature']},")
+        print(f"     yield volatility changes by {top_feature['Coefficient']:.3f}%")
+
+        return coefficients
+
+    def predict_high_risk_counties(self, threshold=5.0):
+        """Identify counties predicted to become high-risk."""
+        print(f"\n7. High-Risk County Predictions (CV change > {threshold}%)")
+        print("-" * 80)
+
+        # Use best model (Random Forest)
+        best_model = self.models['Random Forest']
+
+        # Prepare full dataset with same features as training
+        # Get base features (without crop dummy)
+        base_features = [f for f in self.feature_names if not f.startswith('crop_')]
+
+        # Prepare data
+        clean_data = self.data.dropna(subset=base_features + ['crop'])
+        X_full = clean_data[base_features].copy()
+
+        # Add crop dummy if needed
+        if 'crop_soybean' in self.feature_names:
+            crop_dummies = pd.get_dummies(clean_data['crop'], prefix='crop', drop_first=True)
+            X_full = pd.concat([X_full, crop_dummies], axis=1)
+
+        predictions = best_model.predict(X_full)
+
+        # Add predictions to clean data
+        result_data = clean_data.copy()
+        result_data['predicted_cv_change'] = predictions
+        result_data['predicted_high_risk'] = predictions > threshold
+
+        # Identify high-risk counties
+        high_risk = result_data[result_data['predicted_high_risk'] == True].copy()
+        high_risk = high_risk.sort_values('predicted_cv_change', ascending=False)
+
+        print(f"\n   Total counties predicted to be high-risk: {len(high_risk)}")
+        print(f"\n   Top 20 Highest Risk Counties:")
+        print(high_risk[['county_name', 'state_name', 'crop',
+                        'predicted_cv_change', 'yield_cv_change']].head(20).to_string(index=False))
+
+        # Update main data with predictions (for saving later)
+        self.data = result_data
+
+        return high_risk
+
+    def create_visualizations(self):
+        """Create comprehensive visualizations."""
+        print("\n8. Creating visualizations...")
+
+        # Set style for better plots
+        sns.set_style("whitegrid")
+        plt.rcParams['figure.figsize'] = (12, 6)
+
+        # Figure 1: Model Comparison
+        fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+
+        # R² comparison
+        models = list(self.results.keys())
+        r2_scores = [self.results[m]['test_r2'] for m in models]
+
+        axes[0].bar(models, r2_scores, color=['#3498db', '#2ecc71', '#e74c3c'])
+        axes[0].set_ylabel('R² Score', fontsize=12)
+        axes[0].set_title('Model Performance Comparison (R²)', fontsize=14, fontweight='bold')
+        axes[0].set_ylim(0, max(r2_scores) * 1.2)
+        for i, v in enumerate(r2_scores):
+            axes[0].text(i, v + 0.01, f'{v:.3f}', ha='center', fontweight='bold')
+
+        # RMSE comparison
+        rmse_scores = [self.results[m]['test_rmse'] for m in models]
+        axes[1].bar(models, rmse_scores, color=['#3498db', '#2ecc71', '#e74c3c'])
+        axes[1].set_ylabel('RMSE (%)', fontsize=12)
+        axes[1].set_title('Model Performance Comparison (RMSE)', fontsize=14, fontweight='bold')
+        for i, v in enumerate(rmse_scores):
+            axes[1].text(i, v + 0.1, f'{v:.2f}', ha='center', fontweight='bold')
+
+        plt.tight_layout()
+        plt.savefig('model_comparison.png', dpi=300, bbox_inches='tight')
+        print("   ✓ Saved: model_comparison.png")
+        plt.close()
+
+        # Figure 2: Feature Importance (Random Forest)
+        fig, ax = plt.subplots(figsize=(10, 8))
+
+        rf_importance = pd.DataFrame({
+            'Feature': self.feature_names,
+            'Importance': self.models['Random Forest'].feature_importances_
+        }).sort_values('Importance', ascending=False).head(15)
+
+        # Clean feature names for display
+        rf_importance['Feature_Clean'] = rf_importance['Feature'].str.replace('_', ' ').str.title()
+
+        ax.barh(rf_importance['Feature_Clean'], rf_importance['Importance'], color='#2ecc71')
+        ax.set_xlabel('Importance', fontsize=12, fontweight='bold')
+        ax.set_title('Random Forest: Top 15 Feature Importance', fontsize=14, fontweight='bold')
+        ax.invert_yaxis()
+
+        plt.tight_layout()
+        plt.savefig('feature_importance.png', dpi=300, bbox_inches='tight')
+        print("   ✓ Saved: feature_importance.png")
+        plt.close()
+
+        # Figure 3: Actual vs Predicted (Random Forest)
+        fig, ax = plt.subplots(figsize=(8, 8))
+
+        y_pred = self.results['Random Forest']['predictions']
+
+        ax.scatter(self.y_test, y_pred, alpha=0.5, s=50, edgecolors='black', linewidth=0.5)
+
+        # Perfect prediction line
+        min_val = min(self.y_test.min(), y_pred.min())
+        max_val = max(self.y_test.max(), y_pred.max())
+        ax.plot([min_val, max_val], [min_val, max_val], 'r--', linewidth=2, label='Perfect Prediction')
+
+        ax.set_xlabel('Actual Volatility Change (%)', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Predicted Volatility Change (%)', fontsize=12, fontweight='bold')
+        ax.set_title('Random Forest: Actual vs Predicted', fontsize=14, fontweight='bold')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+        # Add R² to plot
+        r2 = self.results['Random Forest']['test_r2']
+        ax.text(0.05, 0.95, f'R² = {r2:.3f}', transform=ax.transAxes,
+                fontsize=14, fontweight='bold', verticalalignment='top',
+                bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
+
+        plt.tight_layout()
+        plt.savefig('actual_vs_predicted.png', dpi=300, bbox_inches='tight')
+        print("   ✓ Saved: actual_vs_predicted.png")
+        plt.close()
+
+        fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+
+        residuals = self.y_test - y_pred
+
+        axes[0].hist(residuals, bins=30, edgecolor='black', alpha=0.7, color='#3498db')
+        axes[0].set_xlabel('Residuals (%)', fontsize=12)
+        axes[0].set_ylabel('Frequency', fontsize=12)
+        axes[0].set_title('Residual Distribution', fontsize=14, fontweight='bold')
+        axes[0].axvline(0, color='red', linestyle='--', linewidth=2)
+
+        # Residual plot
+        axes[1].scatter(y_pred, residuals, alpha=0.5, s=50, edgecolors='black', linewidth=0.5)
+        axes[1].axhline(0, color='red', linestyle='--', linewidth=2)
+        axes[1].set_xlabel('Predicted Volatility Change (%)', fontsize=12)
+        axes[1].set_ylabel('Residuals (%)', fontsize=12)
+        axes[1].set_title('Residual Plot', fontsize=14, fontweight='bold')
+        axes[1].grid(True, alpha=0.3)
+
+        plt.tight_layout()
+        plt.savefig('residual_analysis.png', dpi=300, bbox_inches='tight')
+        print("   ✓ Saved: residual_analysis.png")
+        plt.close()
+
+    def save_results(self):
+        """Save all results to files."""
+        print("\n9. Saving results...")
+
+        # Save predictions
+        predictions_df = self.data[['state_fp', 'county_fp', 'county_name', 'state_name',
+                                     'crop', 'yield_cv_change', 'predicted_cv_change',
+                                     'predicted_high_risk']].copy()
+        predictions_df.to_csv('model_predictions.csv', index=False)
+        print("   ✓ Saved: model_predictions.csv")
+
+        # Save model comparison
+        comparison = pd.DataFrame(self.results).T
+        comparison.to_csv('model_comparison_metrics.csv')
+        print("   ✓ Saved: model_comparison_metrics.csv")
+
+        # Save feature importance
+        rf_importance = pd.DataFrame({
+            'Feature': self.feature_names,
+            'RF_Importance': self.models['Random Forest'].feature_importances_,
+            'XGB_Importance': self.models['XGBoost'].feature_importances_
+        }).sort_values('RF_Importance', ascending=False)
+        rf_importance.to_csv('feature_importance.csv', index=False)
+        print("   ✓ Saved: feature_importance.csv")
+
+        # Save search results
+        if self.search_results is not None:
+            self.search_results.drop(columns='cv_scores').to_csv('hyperparameter_search.csv', index=False)
+            print("   ✓ Saved: hyperparameter_search.csv")
+
+    def export_models(self, model_dir='models'):
+        """Pickle the XGBoost and Random Forest models for the dashboard."""
+        Path(model_dir).mkdir(parents=True, exist_ok=True)
+
+        for name, filename in [('XGBoost', 'xgboost_model.pkl'),
+                               ('Random Forest', 'random_forest_model.pkl')]:
+            with open(Path(model_dir) / filename, 'wb') as f:
+                pickle.dump(self.models[name], f)
+            print(f"   ✓ Saved: {Path(model_dir) / filename}")
+
+        # Picked up by the dashboard and pipeline.score/serve in place of the global
+        # model, but only when it beat the global model in cross-validation
+        if self.routing_comparison is not None:
+            self.routing_comparison.to_csv(Path(model_dir) / ROUTING_COMPARISON_FILE, index=False)
+            print(f"   ✓ Saved: {Path(model_dir) / ROUTING_COMPARISON_FILE}")
+            routed_path = Path(model_dir) / ROUTED_MODEL_FILE
+            if self.routing_comparison.set_index('model').loc['Routed XGBoost', 'preferred']:
+                with open(routed_path, 'wb') as f:
+                    pickle.dump(self.models['Routed XGBoost'], f)
+                print(f"   ✓ Saved: {routed_path}")
+            else:
+                # A routed model left over from an earlier export must not shadow the global one
+                routed_path.unlink(missing_ok=True)
+                print("   Routed model not exported: its CV R² does not beat the global XGBoost")
+
+    def generate_report(self):
+        """Generate comprehensive text report."""
+        print("\n10. Generating summary report...")
+
+        with open('modeling_report.txt', 'w') as f:
+            f.write("="*80 + "\n")
+            f.write("CROP YIELD VOLATILITY PREDICTION - MODELING REPORT\n")
+            f.write("="*80 + "\n\n")
+
+            # Dataset summary
+            f.write("DATASET SUMMARY\n")
+            f.write("-"*80 + "\n")
+            f.write(f"Total samples: {len(self.X_train) + len(self.X_test)}\n")
+            f.write(f"Training samples: {len(self.X_train)} (80%)\n")
+            f.write(f"Test samples: {len(self.X_test)} (20%)\n")
+            f.write(f"Number of features: {len(self.feature_names)}\n\n")
+
+            # Model performance
+            f.write("MODEL PERFORMANCE COMPARISON\n")
+            f.write("-"*80 + "\n")
+            for model_name, results in self.results.items():
+                f.write(f"\n{model_name}:\n")
+                f.write(f"  Test R²: {results['test_r2']:.4f}\n")
+                f.write(f"  Test RMSE: {results['test_rmse']:.4f}%\n")
+                f.write(f"  Test MAE: {results['test_mae']:.4f}%\n")
+                f.write(f"  Cross-validation R²: {results['cv_r2_mean']:.4f} (+/- {results['cv_r2_std']:.4f})\n")
+
+            # Feature importance
+            f.write("\n\nFEATURE IMPORTANCE (Random Forest)\n")
+            f.write("-"*80 + "\n")
+            rf_imp = pd.DataFrame({
+                'Feature': self.feature_names,
+                'Importance': self.models['Random Forest'].feature_importances_
+            }).sort_values('Importance', ascending=False)
+
+            f.write(rf_imp.head(10).to_string(index=False))
+
+            # Key insights
+            f.write("\n\n\nKEY INSIGHTS\n")
+            f.write("-"*80 + "\n")
+            best_model = max(self.results.items(), key=lambda x: x[1]['test_r2'])[0]
+            best_r2 = self.results[best_model]['test_r2']
+
+            f.write(f"\n1. Best performing model: {best_model} (R² = {best_r2:.3f})\n")
+            f.write(f"\n2. Top 3 predictive features:\n")
+            for i, row in rf_imp.head(3).iterrows():
+                f.write(f"   - {row['Feature']}: {row['Importance']:.3f}\n")
+
+            f.write(f"\n3. Model can explain {best_r2*100:.1f}% of yield volatility variation\n")
+
+            high_risk_count = (self.data['predicted_high_risk'] == True).sum()
+            f.write(f"\n4. Predicted {high_risk_count} county-crop combinations as high-risk\n")
+
+        print("   ✓ Saved: modeling_report.txt")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train yield volatility models.")
+    parser.add_argument('--data', default='data/volatility_final_analysis.csv')
+    parser.add_argument('--search', action='store_true',
+                        help="Tune RF/XGBoost with a parallel, pruned CV search")
+    parser.add_argument('--routed', choices=ROUTING_MODES, default=None,
+                        help="Also train per-crop/region XGBoost models behind a routing predictor")
+    parser.add_argument('--min-group-rows', type=int, default=MIN_ROWS,
+                        help="Smallest group given its own routed model")
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--model-dir', default=None,
+                        help="Export the pickled models to this directory")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    warnings.filterwarnings('ignore')
+
+    # Initialize predictor
+    predictor = VolatilityPredictor(args.data)
+
+    # Prepare features
+    X, y = predictor.prepare_features()
+
+    # Train all models
+    if args.search:
+        predictor.train_models(search=True, n_jobs=args.n_jobs)
+    else:
+        predictor.train_models()
+    if args.routed:
+        predictor.train_routed_model(by=args.routed, min_rows=args.min_group_rows, n_jobs=args.n_jobs)
+
+    # Compare models
+    comparison = predictor.compare_models()
+
+    # Analyze feature importance
+    rf_imp, xgb_imp = predictor.analyze_feature_importance()
+
+    # Analyze linear coefficients
+    coefficients = predictor.analyze_linear_coefficients()
+
+    # Predict high-risk counties
+    high_risk = predictor.predict_high_risk_counties(threshold=5.0)
+
+    # Create visualizations
+    predictor.create_visualizations()
+
+    # Save results
+    predictor.save_results()
+
+    # Generate report
+    predictor.generate_report()
+
+    if args.model_dir:
+        predictor.export_models(args.model_dir)
+
+    print("\n" + "="*80)
+    print("MODELING COMPLETE!")
+    print("="*80)
+    print("\nGenerated files:")
+    print("  1. model_comparison.png - Model performance comparison")
+    print("  2. feature_importance.png - Top features driving volatility")
+    print("  3. actual_vs_predicted.png - Prediction accuracy visualization")
+    print("  4. residual_analysis.png - Model diagnostic plots")
+    print("  5. model_predictions.csv - Predictions for all counties")
+    print("  6. model_comparison_metrics.csv - Detailed metrics")
+    print("  7. feature_importance.csv - Feature rankings")
+    print("  8. modeling_report.txt - Comprehensive text report")
+    print("="*80 + "\n")
+
+    return predictor, comparison, rf_imp, high_risk
+
+
+if __name__ == "__main__":
+    predictor, comparison, rf_imp, high_risk = main()
\ No newline at end of file
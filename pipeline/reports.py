@@ -0,0 +1,356 @@
+"""
+Static per-county risk reports for every county-crop.
+
+Renders what pages/2_County_Explorer.py shows for one selection (risk
+metrics, yield trend, 3-year rolling volatility, climate indicators and
+the state comparison) as one self-contained HTML file per county-crop,
+plus an index.html linking them all. plotly.min.js and the chart theme
+(report.js) are written once next to the reports and shared, so each
+report stays a few KB.
+
+Reports are rendered across a process pool. Each worker loads the final
+analysis, the merged yield history and the window grid once in its
+initializer; tasks are batches of analysis row positions, so only row
+numbers and file names cross process boundaries.
+
+Usage:
+    python -m pipeline.reports --data-dir data --output reports --workers 8
+"""
+
+import argparse
+import html
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+from pipeline.volatility import YIELD_KEYS
+from pipeline.windows import YieldWindows
+
+logger = logging.getLogger(__name__)
+
+PLOTLY_JS = 'plotly.min.js'
+REPORT_JS = 'report.js'
+BATCH_SIZE = 50
+ROLLING_YEARS = 3
+
+# (label, column, format) for the climate indicator table, as on the County Explorer
+CLIMATE_INDICATORS = [
+    ('Avg Temperature Change', 'T2M_mean_change', '{:.2f}°C'),
+    ('Temperature Variability', 'T2M_std_change', '{:.2f}°C'),
+    ('Extreme Heat Days', 'extreme_heat_days_change', '{:+.1f} days'),
+    ('NDVI Change', 'NDVI_mean_change', '{:.3f}'),
+    ('NDVI Variability', 'NDVI_std_change', '{:.3f}'),
+    ('EVI Change', 'EVI_mean_change', '{:.3f}'),
+    ('Humidity Change', 'RH2M_mean_change', '{:.2f}%'),
+    ('Solar Radiation', 'ALLSKY_SFC_SW_DWN_mean_change', '{:.2f}'),
+    ('Water Stress (NDWI)', 'NDWI_mean_change', '{:.3f}'),
+]
+
+RISK_COLORS = {
+    'High Risk (Increasing)': '#e74c3c',
+    'Medium Risk (Slight Increase)': '#f39c12',
+    'Low Risk (Stable)': '#3498db',
+    'Improving (Decreasing)': '#27ae60',
+}
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script src="{plotly_js}"></script>
+<script src="{report_js}"></script>
+<style>
+body {{ font-family: Arial, sans-serif; margin: 2rem auto; max-width: 1100px; color: #2c3e50; }}
+.metrics {{ display: flex; gap: 1rem; flex-wrap: wrap; }}
+.metric {{ flex: 1; min-width: 180px; border: 1px solid #ddd; border-radius: 6px; padding: 0.75rem 1rem; }}
+.metric .label {{ font-size: 0.85rem; color: #7f8c8d; }}
+.metric .value {{ font-size: 1.6rem; font-weight: bold; }}
+.metric .note {{ font-size: 0.85rem; }}
+.charts {{ display: flex; gap: 1rem; }}
+.charts > div {{ flex: 1; }}
+table {{ border-collapse: collapse; width: 100%; }}
+td, th {{ border-bottom: 1px solid #eee; padding: 0.4rem; text-align: left; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+# Per-worker state set by _init_worker
+_WORKER = {}
+
+
+def report_js():
+    """Shared script: the default plotly theme and the plotChart() helper used by every report."""
+    template = json.dumps(pio.templates[pio.templates.default].to_plotly_json())
+    return (f"const REPORT_TEMPLATE = {template};\n"
+            "function plotChart(id, data, layout) {\n"
+            "    layout.template = REPORT_TEMPLATE;\n"
+            "    Plotly.newPlot(id, data, layout, {displayModeBar: false, responsive: true});\n"
+            "}\n")
+
+
+def report_filename(row):
+    """File name of one county-crop report, e.g. 19153_corn.html."""
+    return f"{int(row['state_fp']):02d}{int(row['county_fp']):03d}_{row['crop']}.html"
+
+
+def _metric(label, value, note='', color=None):
+    style = f' style="color: {color};"' if color else ''
+    return (f'<div class="metric"><div class="label">{html.escape(label)}</div>'
+            f'<div class="value"{style}>{html.escape(value)}</div>'
+            f'<div class="note">{html.escape(note)}</div></div>')
+
+
+def _values(array):
+    """JSON-ready list with NaN as null."""
+    return [None if np.isnan(v) else float(v) for v in np.asarray(array, dtype=float)]
+
+
+def _line(x, y, name, color=None):
+    trace = {'type': 'scatter', 'mode': 'lines+markers', 'name': name, 'x': _values(x), 'y': _values(y)}
+    if color:
+        trace['line'] = {'color': color}
+    return trace
+
+
+def _layout(title, yaxis_title):
+    return {'title': {'text': title}, 'xaxis': {'title': {'text': 'Year'}},
+            'yaxis': {'title': {'text': yaxis_title}}, 'height': 380,
+            'margin': {'l': 40, 'r': 20, 't': 50, 'b': 40}}
+
+
+def _chart(div_id, data, layout):
+    """
+    A chart as a div plus a plotChart() call (defined in report.js).
+
+    Figures are written as plain plotly JSON rather than through
+    plotly.graph_objects: validating a Figure costs ~10 ms, more than
+    the rest of a report together.
+    """
+    return (f'<div id="{div_id}"></div>'
+            f'<script>plotChart("{div_id}", {json.dumps(data)}, {json.dumps(layout)});</script>')
+
+
+def load_report_data(data_dir='data'):
+    """
+    Everything a report needs, loaded once per worker.
+
+    Returns:
+        Dict with the final analysis, per-state/crop average CV change, the
+        merged yield history grouped by county-crop and the window grid with
+        its rolling volatility (None when merged_crop_climate_data.csv is
+        missing)
+    """
+    data_dir = Path(data_dir)
+    analysis = pd.read_csv(data_dir / 'volatility_final_analysis.csv')
+    state_avg = analysis.groupby(['state_name', 'crop'])['yield_cv_change'].mean()
+
+    merged_path = data_dir / 'merged_crop_climate_data.csv'
+    history, windows, rolling = None, None, None
+    if merged_path.exists():
+        merged = pd.read_csv(merged_path, usecols=YIELD_KEYS + ['county_name', 'state_name', 'year', 'yield_value'])
+        merged = merged.dropna(subset=['yield_value']).sort_values('year')
+        windows = YieldWindows(merged)
+        rolling = windows.rolling(ROLLING_YEARS)
+        history = {
+            key: (group['year'].to_numpy(), group['yield_value'].to_numpy())
+            for key, group in merged.groupby(YIELD_KEYS, sort=False)
+        }
+
+    return {'analysis': analysis, 'state_avg': state_avg, 'history': history,
+            'windows': windows, 'rolling': rolling}
+
+
+def render_report(row, shared):
+    """
+    HTML report for one final-analysis row.
+
+    Args:
+        row: One row of volatility_final_analysis.csv
+        shared: Dict from load_report_data
+
+    Returns:
+        Complete HTML document as a string
+    """
+    county, state, crop = row['county_name'], row['state_name'], row['crop']
+    title = f"{county}, {state} - {crop.capitalize()}"
+    parts = [f'<h1>{html.escape(title)}</h1>']
+
+    # Key metrics
+    cv_change = row['yield_cv_change']
+    early_cv, late_cv = row['early_yield_cv'], row['late_yield_cv']
+    metrics = [
+        _metric("Risk Category", str(row['risk_category']), color=RISK_COLORS.get(row['risk_category'])),
+        _metric("Volatility Change", f"{cv_change:.2f}%", f"{'↑' if cv_change > 0 else '↓'} from baseline"),
+        _metric("Current Volatility", f"{late_cv:.2f}%", f"{late_cv - early_cv:.2f}% vs 2005-2014"),
+    ]
+    if 'predicted_cv_change' in row and pd.notna(row['predicted_cv_change']):
+        metrics.append(_metric("Predicted Change", f"{row['predicted_cv_change']:.2f}%", "Model prediction"))
+    parts.append(f'<div class="metrics">{"".join(metrics)}</div>')
+
+    # Yield trend and rolling volatility
+    history = shared['history']
+    key = (row['state_fp'], row['county_fp'], crop)
+    if history is not None and key in history:
+        years, yields = history[key]
+        mean = float(yields.mean())
+        trend = _chart('trend', [_line(years, yields, 'Yield')], {
+            **_layout(f"{crop.capitalize()} Yield Trend", "Yield (bu/acre)"),
+            'shapes': [{'type': 'line', 'xref': 'x domain', 'x0': 0, 'x1': 1, 'yref': 'y',
+                        'y0': mean, 'y1': mean, 'line': {'dash': 'dash', 'color': 'red'}}],
+            'annotations': [{'xref': 'x domain', 'x': 1, 'yref': 'y', 'y': mean, 'text': 'Average',
+                             'showarrow': False, 'xanchor': 'right', 'yanchor': 'bottom'}],
+        })
+
+        position = shared['windows'].key_position(*key)
+        grid_years, rolling = shared['rolling']
+        observed = np.isin(grid_years, years)
+        volatility = _chart('volatility', [
+            _line(grid_years[observed], rolling['std'][position][observed], 'Std', color='#e74c3c')
+        ], _layout(f"{ROLLING_YEARS}-Year Rolling Volatility", "Standard Deviation (bu/acre)"))
+
+        parts.append('<h2>Historical Yield Trends</h2><div class="charts">'
+                     f'<div>{trend}</div><div>{volatility}</div></div>')
+
+    # Climate indicators
+    cells = []
+    for label, column, fmt in CLIMATE_INDICATORS:
+        value = row.get(column)
+        cells.append(f'<tr><td>{html.escape(label)}</td>'
+                     f'<td>{html.escape(fmt.format(value)) if pd.notna(value) else "n/a"}</td></tr>')
+    parts.append(f'<h2>Climate Change Indicators</h2><table>{"".join(cells)}</table>')
+
+    # State comparison
+    state_avg = shared['state_avg'].get((state, crop), np.nan)
+    if pd.notna(state_avg):
+        if cv_change > state_avg:
+            note = f"{cv_change - state_avg:.2f}% more volatility increase than the state average"
+        else:
+            note = f"{state_avg - cv_change:.2f}% better than the state average"
+        parts.append(f'<h2>How Does {html.escape(county)} Compare to {html.escape(state)}?</h2>'
+                     f'<div class="metrics">{_metric(county, f"{cv_change:.2f}%")}'
+                     f'{_metric(f"{state} Average", f"{state_avg:.2f}%")}</div><p>{html.escape(note)}</p>')
+
+    return PAGE_TEMPLATE.format(title=html.escape(title), plotly_js=PLOTLY_JS, report_js=REPORT_JS,
+                                body="\n".join(parts))
+
+
+def _init_worker(data_dir):
+    _WORKER.update(load_report_data(data_dir))
+
+
+def _render_batch(positions, output_dir):
+    """Render and write the reports for a batch of analysis rows; returns how many were written."""
+    analysis = _WORKER['analysis']
+    output_dir = Path(output_dir)
+    for position in positions:
+        row = analysis.iloc[position]
+        (output_dir / report_filename(row)).write_text(render_report(row, _WORKER), encoding='utf-8')
+    return len(positions)
+
+
+def write_index(analysis, output_dir):
+    """index.html linking every report, grouped by state."""
+    rows = analysis.sort_values(['state_name', 'county_name', 'crop'])
+    items = [
+        f'<tr><td>{html.escape(str(r.state_name))}</td>'
+        f'<td><a href="{report_filename(r._asdict())}">{html.escape(str(r.county_name))}</a></td>'
+        f'<td>{html.escape(str(r.crop))}</td><td>{html.escape(str(r.risk_category))}</td></tr>'
+        for r in rows[['state_fp', 'county_fp', 'state_name', 'county_name', 'crop', 'risk_category']]
+        .itertuples(index=False)
+    ]
+    body = ('<h1>County Risk Reports</h1><table><tr><th>State</th><th>County</th><th>Crop</th>'
+            f'<th>Risk Category</th></tr>{"".join(items)}</table>')
+    page = PAGE_TEMPLATE.format(title='County Risk Reports', plotly_js=PLOTLY_JS, report_js=REPORT_JS, body=body)
+    (Path(output_dir) / 'index.html').write_text(page, encoding='utf-8')
+
+
+def generate_reports(data_dir='data', output_dir='reports', workers=None, batch_size=BATCH_SIZE, limit=None):
+    """
+    Render every county-crop report across a process pool.
+
+    Args:
+        data_dir: Directory with volatility_final_analysis.csv (and
+            merged_crop_climate_data.csv for the yield charts)
+        output_dir: Destination for the HTML files
+        workers: Worker processes (default: CPU count)
+        batch_size: Reports per task
+        limit: Only render the first `limit` county-crops
+
+    Returns:
+        Dict with reports written, elapsed seconds, reports per second and workers
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / PLOTLY_JS).write_text(get_plotlyjs(), encoding='utf-8')
+    (output_dir / REPORT_JS).write_text(report_js(), encoding='utf-8')
+
+    analysis = pd.read_csv(Path(data_dir) / 'volatility_final_analysis.csv')
+    if limit is not None:
+        analysis = analysis.head(limit)
+    write_index(analysis, output_dir)
+
+    total = len(analysis)
+    workers = workers or os.cpu_count() or 1
+    batches = [np.arange(start, min(start + batch_size, total)) for start in range(0, total, batch_size)]
+
+    start = time.perf_counter()
+    done = 0
+    next_log = 0.0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(data_dir),)) as pool:
+        futures = [pool.submit(_render_batch, batch, str(output_dir)) for batch in batches]
+        for future in as_completed(futures):
+            done += future.result()
+            elapsed = time.perf_counter() - start
+            if elapsed >= next_log or done == total:
+                rate = done / elapsed
+                eta = (total - done) / rate if rate > 0 else float('nan')
+                logger.info(f"Rendered {done:,}/{total:,} reports ({done / total:.0%}), "
+                            f"{rate:,.1f} reports/s, ETA {eta:,.0f}s")
+                next_log = elapsed + 2.0
+
+    elapsed = time.perf_counter() - start
+    return {
+        'reports': done,
+        'seconds': elapsed,
+        'reports_per_second': done / elapsed if elapsed > 0 else float('nan'),
+        'workers': workers,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Render static HTML risk reports for every county-crop.")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--output', default='reports')
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Reports per worker task")
+    parser.add_argument('--limit', type=int, default=None, help="Only render the first N county-crops")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    result = generate_reports(args.data_dir, args.output, workers=args.workers,
+                              batch_size=args.batch_size, limit=args.limit)
+    print(f"\n{result['reports']:,} reports in {result['seconds']:.1f}s "
+          f"({result['reports_per_second']:.1f} reports/s, {result['workers']} workers)")
+    print(f"Index: {Path(args.output) / 'index.html'}")
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,234 @@
+"""
+Warm-start retraining of the exported XGBoost model on new seasons.
+
+A data refresh used to mean rerunning VolatilityPredictor from scratch.
+warm_start() instead continues boosting the model the dashboard serves
+(routing.default_model_path(): models/xgboost_model.pkl, or the routed
+model when it is preferred) for a few extra rounds, on the county-crop
+rows an annual update recomputed. For a routed model, each group's
+booster continues on its group's rows and the fallback on all of them. The candidate and the
+current model are then scored on a held-out set. The candidate replaces
+the exported model only if its RMSE does not regress; the previous model
+is kept in models/archive/. Every attempt, promoted or not, is appended
+to models/retrain_history.csv.
+
+The held-out rows are picked by a hash of (state_fp, county_fp, crop),
+so the same county-crops are held out at every refresh. They are never
+used for warm-start training, even when their rows were recomputed, and
+VolatilityPredictor uses the same hash for its test split, so models it
+exports never trained on them either. A model exported before that split
+(such as the shipped models/xgboost_model.pkl, from a random split) has
+seen about 80% of the held-out county-crops. Its rmse_before is then
+partly in-sample and the check leans towards rejecting candidates, until
+the model is re-exported with pipeline.predictor --model-dir models.
+
+Usage:
+    python -m pipeline.retrain --new-rows updated_rows.csv
+    python -m pipeline.annual_update ... --retrain
+"""
+
+import argparse
+import logging
+import pickle
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_squared_error, r2_score
+from xgboost import XGBRegressor
+
+from pipeline.routing import RoutedModel, default_model_path, model_input
+from pipeline.schema import FEATURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+TARGET = 'yield_cv_change'
+HOLDOUT_FRACTION = 0.2
+WARM_ROUNDS = 30
+# Relative RMSE increase still accepted for promotion; 0 means no regression at all
+TOLERANCE = 0.0
+
+MODEL_DIR = 'models'
+ARCHIVE_DIR = 'archive'
+HISTORY_FILE = 'retrain_history.csv'
+# Every attempt is logged with the same columns, whether or not a candidate was fitted
+HISTORY_COLUMNS = ['timestamp', 'model', 'new_rows', 'holdout_rows', 'rounds', 'trees_before', 'rmse_before',
+                   'r2_before', 'trees_after', 'rmse_after', 'r2_after', 'fit_seconds', 'promoted', 'archived']
+
+
+def holdout_mask(frame, fraction=HOLDOUT_FRACTION):
+    """True for rows whose county-crop falls in the stable held-out set."""
+    crop = (frame['crop'].astype(str).str.lower() == 'soybean').to_numpy(dtype=np.uint64)
+    key = (frame['state_fp'].to_numpy(dtype=np.uint64) * 1000 + frame['county_fp'].to_numpy(dtype=np.uint64)) * 2 + crop
+    # Multiplicative hash spreads neighboring FIPS codes over [0, 1)
+    spread = (key * np.uint64(2654435761)) % np.uint64(2 ** 32)
+    return spread / 2 ** 32 < fraction
+
+
+def _training_rows(model, frame):
+    """Model input (see routing.model_input) and target of rows with every feature and the target present."""
+    frame = frame.dropna(subset=[TARGET])
+    X = model_input(model, frame)
+    complete = X[FEATURE_COLUMNS].notna().all(axis=1).to_numpy()
+    return X[complete], frame[TARGET].to_numpy()[complete]
+
+
+def _trees(model):
+    """Boosting rounds of an XGBRegressor, or of all of a RoutedModel's boosters."""
+    if isinstance(model, RoutedModel):
+        return sum(_trees(booster) for booster in [*model.models.values(), model.fallback])
+    return model.get_booster().num_boosted_rounds()
+
+
+def _continue(model, X, y, rounds):
+    """A new XGBRegressor boosting rounds more trees on top of model."""
+    candidate = XGBRegressor(**{**model.get_params(), 'n_estimators': rounds})
+    candidate.fit(X[FEATURE_COLUMNS], y, xgb_model=model.get_booster())
+    return candidate
+
+
+def _continue_routed(model, X, y, rounds):
+    """Continue each group model on its group's rows and the fallback on all rows."""
+    keys = model.keys(X)
+    models = {key: _continue(group_model, X[keys == key], y[keys == key], rounds) if (keys == key).any()
+              else group_model for key, group_model in model.models.items()}
+    return RoutedModel(model.by, models, _continue(model.fallback, X, y, rounds), model.rows)
+
+
+def evaluate(model, X, y):
+    """Held-out RMSE and R²."""
+    predictions = model.predict(X)
+    return {'rmse': float(np.sqrt(mean_squared_error(y, predictions))), 'r2': float(r2_score(y, predictions))}
+
+
+def warm_start(model, new_rows, analysis, rounds=WARM_ROUNDS, tolerance=TOLERANCE):
+    """
+    Continue boosting model on new rows and compare it with the original.
+
+    Args:
+        model: Fitted XGBRegressor or RoutedModel (left unchanged)
+        new_rows: Recomputed county-crop rows (volatility_final_analysis format)
+        analysis: Full current analysis; its held-out rows score both models
+        rounds: Boosting rounds added to the existing trees
+        tolerance: Relative RMSE increase still promoted
+
+    Returns:
+        (candidate, report): the continued model (None if there was
+        nothing to train on) and a dict of held-out metrics, timings and
+        whether the candidate should be promoted
+    """
+    X_holdout, y_holdout = _training_rows(model, analysis[holdout_mask(analysis)])
+    X_new, y_new = _training_rows(model, new_rows[~holdout_mask(new_rows)])
+    current = evaluate(model, X_holdout, y_holdout)
+    report = {
+        'new_rows': len(X_new),
+        'holdout_rows': len(X_holdout),
+        'rounds': rounds,
+        'trees_before': _trees(model),
+        'rmse_before': current['rmse'],
+        'r2_before': current['r2'],
+    }
+    if not len(X_new):
+        logger.warning("No new training rows outside the held-out set; keeping the current model")
+        return None, {**report, 'promoted': False}
+
+    start = time.perf_counter()
+    if isinstance(model, RoutedModel):
+        candidate = _continue_routed(model, X_new, y_new, rounds)
+    else:
+        candidate = _continue(model, X_new, y_new, rounds)
+    fit_seconds = time.perf_counter() - start
+
+    updated = evaluate(candidate, X_holdout, y_holdout)
+    promoted = updated['rmse'] <= current['rmse'] * (1 + tolerance)
+    report.update({
+        'trees_after': _trees(candidate),
+        'rmse_after': updated['rmse'],
+        'r2_after': updated['r2'],
+        'fit_seconds': fit_seconds,
+        'promoted': promoted,
+    })
+    logger.info(f"Warm start: {rounds} rounds on {len(X_new)} rows in {fit_seconds:.2f}s; held-out RMSE "
+                f"{current['rmse']:.3f} -> {updated['rmse']:.3f} ({'promoted' if promoted else 'rejected'})")
+    return candidate, report
+
+
+def promote(candidate, model_path):
+    """
+    Replace the exported model, archiving the previous one.
+
+    The new pickle is written next to the target and renamed over it,
+    so a dashboard loading the model never reads a partial file.
+
+    Returns:
+        Path of the archived previous model
+    """
+    model_path = Path(model_path)
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    archived = model_path.parent / ARCHIVE_DIR / f'{model_path.stem}_{stamp}{model_path.suffix}'
+    archived.parent.mkdir(parents=True, exist_ok=True)
+    archived.write_bytes(model_path.read_bytes())
+
+    staged = model_path.with_suffix('.pkl.new')
+    with open(staged, 'wb') as f:
+        pickle.dump(candidate, f)
+    staged.replace(model_path)
+    logger.info(f"Promoted warm-started model to {model_path} (previous: {archived})")
+    return archived
+
+
+def retrain(new_rows, analysis, model_path=None, rounds=WARM_ROUNDS, tolerance=TOLERANCE):
+    """
+    Warm-start the exported model, promote it if it does not regress, log the attempt.
+
+    Args:
+        model_path: Model to continue (default: routing.default_model_path(),
+            the one the dashboard and pipeline.score/serve use)
+
+    Returns:
+        Report dict (see warm_start), with the archived model path if promoted
+    """
+    model_path = Path(model_path or default_model_path(MODEL_DIR))
+    served = default_model_path(model_path.parent)
+    if served != model_path:
+        logger.warning(f"{served} is the model in use, not {model_path}; a promoted {model_path.name} will not be served")
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+
+    candidate, report = warm_start(model, new_rows, analysis, rounds=rounds, tolerance=tolerance)
+    report['archived'] = str(promote(candidate, model_path)) if report['promoted'] else None
+
+    history = model_path.parent / HISTORY_FILE
+    entry = pd.DataFrame([{'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                           'model': model_path.name, **report}]).reindex(columns=HISTORY_COLUMNS)
+    entry.to_csv(history, mode='a', header=not history.exists(), index=False)
+    return report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Warm-start the exported XGBoost model on new rows.")
+    parser.add_argument('--new-rows', required=True,
+                        help="Recomputed county-crop rows (volatility_final_analysis format)")
+    parser.add_argument('--analysis', default='data/volatility_final_analysis.csv',
+                        help="Full analysis the held-out rows are drawn from")
+    parser.add_argument('--model', default=None, help="Model to continue (default: routing.default_model_path())")
+    parser.add_argument('--rounds', type=int, default=WARM_ROUNDS, help="Boosting rounds to add")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="Relative held-out RMSE increase still promoted")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    report = retrain(pd.read_csv(args.new_rows), pd.read_csv(args.analysis), model_path=args.model,
+                     rounds=args.rounds, tolerance=args.tolerance)
+    print(pd.Series(report).to_string())
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,247 @@
+"""
+Per-region and per-crop XGBoost models behind one routing predictor.
+
+VolatilityPredictor fits one global XGBoost on every county-crop row.
+fit_routed() instead fits one model per group: per crop, per USDA farm
+production region (REGIONS), or per region and crop. Each group's model
+is an independent single-threaded fit, run as a separate job in a
+process pool, so wall time falls with the number of cores. A global
+model is fitted alongside as the fallback. It handles groups with fewer
+than min_rows training rows and rows with no region.
+
+RoutedModel.predict() takes the usual feature matrix. When routing by
+region it also takes an optional 'region' column. It scores each
+group's rows in one batch with that group's model. model_input() builds
+that input for any exported model, so the Modeler page, pipeline.score
+and pipeline.serve need no routing logic of their own. default_model_path()
+prefers an exported routed model over the global one, but only when the
+comparison exported next to it (ROUTING_COMPARISON_FILE) shows that it
+beat the global model in cross-validation.
+
+Usage:
+    python -m pipeline.predictor --routed region_crop --model-dir models
+"""
+
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from xgboost import XGBRegressor
+
+from pipeline.schema import FEATURE_COLUMNS, feature_matrix
+
+logger = logging.getLogger(__name__)
+
+# USDA ERS farm production regions by state FIPS (contiguous US)
+REGIONS = {
+    'Northeast': [9, 10, 23, 24, 25, 33, 34, 36, 42, 44, 50],
+    'Lake States': [26, 27, 55],
+    'Corn Belt': [17, 18, 19, 29, 39],
+    'Northern Plains': [20, 31, 38, 46],
+    'Appalachian': [21, 37, 47, 51, 54],
+    'Southeast': [1, 12, 13, 45],
+    'Delta States': [5, 22, 28],
+    'Southern Plains': [40, 48],
+    'Mountain': [4, 8, 16, 30, 32, 35, 49, 56],
+    'Pacific': [6, 41, 53],
+}
+STATE_REGION = {state: region for region, states in REGIONS.items() for state in states}
+
+ROUTING_MODES = ['crop', 'region', 'region_crop']
+ROUTE_COLUMN = 'region'
+
+# Same configuration as the global XGBoost in VolatilityPredictor.train_models
+XGB_PARAMS = {
+    'n_estimators': 100,
+    'learning_rate': 0.1,
+    'max_depth': 5,
+    'min_child_weight': 3,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'random_state': 42,
+}
+MIN_ROWS = 200
+
+GLOBAL_MODEL_FILE = 'xgboost_model.pkl'
+ROUTED_MODEL_FILE = 'routed_model.pkl'
+# Same-fold CV comparison of the routed and global models, written by export_models()
+ROUTING_COMPARISON_FILE = 'routing_comparison.csv'
+
+
+def state_regions(state_fp):
+    """Region name per state FIPS (None outside REGIONS)."""
+    regions = pd.to_numeric(pd.Series(state_fp), errors='coerce').map(STATE_REGION)
+    return regions.astype(object).where(regions.notna(), None).to_numpy()
+
+
+def route_keys(by, crop_soybean, region=None):
+    """
+    Group key per row: 'corn'/'soybean', a region name, or 'region|crop'.
+
+    Rows routed by region without a known region get None.
+    """
+    crop = np.where(np.asarray(crop_soybean, dtype=float) > 0.5, 'soybean', 'corn').astype(object)
+    if by == 'crop':
+        return crop
+    if region is None:
+        return np.full(len(crop), None, dtype=object)
+    region = pd.Series(region, dtype=object).where(pd.notna(region), None).to_numpy()
+    if by == 'region':
+        return region
+    return np.array([None if r is None else f'{r}|{c}' for r, c in zip(region, crop)], dtype=object)
+
+
+def _fit_group(key, X, y, params):
+    """Fit one group's model in a worker; returns (key, model, rows, seconds)."""
+    start = time.perf_counter()
+    model = XGBRegressor(tree_method='hist', n_jobs=1, **params)
+    model.fit(X, y)
+    return key, model, len(X), time.perf_counter() - start
+
+
+class RoutedModel:
+    """Dispatch each row to its group's model; fall back to a global model."""
+
+    def __init__(self, by, models, fallback, rows):
+        """
+        Args:
+            by: One of ROUTING_MODES
+            models: Dict of group key -> fitted model
+            fallback: Global model for rows without a group model
+            rows: Dict of group key (and 'global') -> training rows
+        """
+        self.by = by
+        self.models = models
+        self.fallback = fallback
+        self.rows = rows
+
+    @property
+    def uses_region(self):
+        return self.by != 'crop'
+
+    @property
+    def feature_importances_(self):
+        """Group model importances averaged by training rows."""
+        weights = np.array([self.rows[key] for key in self.models], dtype=float)
+        if not len(weights):
+            return self.fallback.feature_importances_
+        stacked = np.array([model.feature_importances_ for model in self.models.values()])
+        return weights @ stacked / weights.sum()
+
+    def keys(self, X):
+        """Group key per row of X (see route_keys)."""
+        region = X[ROUTE_COLUMN].to_numpy() if ROUTE_COLUMN in X.columns else None
+        return route_keys(self.by, X['crop_soybean'].to_numpy(), region)
+
+    def predict(self, X):
+        """
+        Predict every row with its group's model, one batch per group.
+
+        Args:
+            X: Feature matrix (FEATURE_COLUMNS), plus a ROUTE_COLUMN of
+                region names when routing by region
+        """
+        keys = self.keys(X)
+        features = X[FEATURE_COLUMNS]
+        predictions = np.empty(len(features), dtype=np.float32)
+        routed = np.zeros(len(features), dtype=bool)
+
+        codes, uniques = pd.factorize(pd.Series(keys, dtype=object))
+        for code, key in enumerate(uniques):
+            if key not in self.models:
+                continue
+            rows = codes == code
+            predictions[rows] = self.models[key].predict(features[rows])
+            routed |= rows
+        if not routed.all():
+            predictions[~routed] = self.fallback.predict(features[~routed])
+        return predictions
+
+    def __repr__(self):
+        return f"RoutedModel(by={self.by!r}, groups={sorted(self.models)})"
+
+
+def fit_routed(X, y, by='region_crop', region=None, min_rows=MIN_ROWS, params=None, n_jobs=-1):
+    """
+    Fit the group models and the global fallback in a process pool.
+
+    Args:
+        X: Feature matrix (FEATURE_COLUMNS)
+        y: Target
+        by: One of ROUTING_MODES
+        region: Region name per row (required unless by='crop')
+        min_rows: Groups with fewer training rows use the fallback
+        params: XGBoost parameters (default XGB_PARAMS)
+        n_jobs: Parallel fits (-1 for all cores)
+
+    Returns:
+        RoutedModel
+    """
+    if by not in ROUTING_MODES:
+        raise ValueError(f"Unknown routing mode {by!r}; expected one of {ROUTING_MODES}")
+    if by != 'crop' and region is None:
+        raise ValueError(f"Routing by {by!r} needs a region per row")
+
+    params = {**XGB_PARAMS, **(params or {})}
+    X = X[FEATURE_COLUMNS]
+    y = pd.Series(np.asarray(y), index=X.index)
+    keys = pd.Series(route_keys(by, X['crop_soybean'].to_numpy(), region), index=X.index)
+    counts = keys.value_counts()
+    groups = sorted(counts[counts >= min_rows].index)
+
+    start = time.perf_counter()
+    tasks = [('global', X, y)] + [(key, X[keys == key], y[keys == key]) for key in groups]
+    # Largest fits first, so the pool is not left waiting on one at the end
+    tasks.sort(key=lambda task: len(task[1]), reverse=True)
+    fitted = Parallel(n_jobs=n_jobs)(delayed(_fit_group)(key, X_group, y_group, params)
+                                     for key, X_group, y_group in tasks)
+
+    models = {key: model for key, model, _, _ in fitted if key != 'global'}
+    fallback = next(model for key, model, _, _ in fitted if key == 'global')
+    rows = {key: n for key, _, n, _ in fitted}
+    fit_seconds = sum(seconds for _, _, _, seconds in fitted)
+    logger.info(f"Fitted {len(models)} {by} models + global fallback in {time.perf_counter() - start:.1f}s "
+                f"({fit_seconds:.1f}s of fitting); {int(counts.drop(groups).sum())} rows in groups "
+                f"under {min_rows} rows use the fallback")
+    return RoutedModel(by, models, fallback, rows)
+
+
+def model_input(model, frame, fill_derived=False):
+    """
+    Feature matrix for model, with the region column a RoutedModel uses.
+
+    The region comes from a 'region' column or, failing that, 'state_fp';
+    rows with neither go to the routed model's fallback.
+    """
+    features = feature_matrix(frame, fill_derived=fill_derived)
+    if not getattr(model, 'uses_region', False):
+        return features
+    if ROUTE_COLUMN in frame.columns:
+        region = frame[ROUTE_COLUMN].to_numpy()
+    elif 'state_fp' in frame.columns:
+        region = state_regions(frame['state_fp'])
+    else:
+        region = None
+    return features.assign(**{ROUTE_COLUMN: region})
+
+
+def routed_preferred(model_dir='models'):
+    """Whether the exported routing comparison in model_dir prefers the routed model."""
+    path = Path(model_dir) / ROUTING_COMPARISON_FILE
+    if not path.exists():
+        return False
+    comparison = pd.read_csv(path).set_index('model')
+    return bool(comparison['preferred'].get('Routed XGBoost', False))
+
+
+def default_model_path(model_dir='models'):
+    """The exported routed model if it beat the global XGBoost, else the global XGBoost."""
+    routed = Path(model_dir) / ROUTED_MODEL_FILE
+    if routed.exists():
+        if routed_preferred(model_dir):
+            return routed
+        logger.warning(f"Ignoring {routed}: no {ROUTING_COMPARISON_FILE} shows it beating the global model")
+    return Path(model_dir) / GLOBAL_MODEL_FILE
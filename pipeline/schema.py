@@ -0,0 +1,88 @@
+"""Model feature schema and risk bins shared by training, scoring and the dashboard."""
+
+CLIMATE_FEATURES = [
+    'T2M_mean_change',
+    'T2M_std_change',
+    'T2M_max_change',
+    'extreme_heat_days_change',
+    'RH2M_mean_change',
+    'ALLSKY_SFC_SW_DWN_mean_change'
+]
+
+SATELLITE_FEATURES = [
+    'NDVI_mean_change',
+    'NDVI_std_change',
+    'EVI_mean_change',
+    'NDWI_mean_change'
+]
+
+BASELINE_FEATURES = [
+    'early_yield_mean',
+    'early_yield_cv'
+]
+
+# Column order the exported models were trained on
+FEATURE_COLUMNS = CLIMATE_FEATURES + SATELLITE_FEATURES + BASELINE_FEATURES + ['crop_soybean']
+
+# Predicted CV change bins used on the Risk Map
+RISK_BINS = [-float('inf'), 0, 2, 5, float('inf')]
+RISK_LABELS = ['Improving', 'Low Risk', 'Medium Risk', 'High Risk']
+HIGH_RISK_THRESHOLD = 5.0
+
+# Inputs the Modeler page does not expose: held constant or tied to NDVI
+DERIVED_FEATURES = {
+    'ALLSKY_SFC_SW_DWN_mean_change': lambda frame: 0.0,
+    'EVI_mean_change': lambda frame: frame['NDVI_mean_change'] * 0.8,
+    'NDWI_mean_change': lambda frame: frame['NDVI_mean_change'] * 0.9,
+}
+
+# Volatility Impact Modeler sliders: feature -> (label, min, max, step).
+# The page draws its sliders from these; pipeline/surrogate.py tabulates the model over them.
+MODELER_SLIDERS = {
+    'T2M_mean_change': ("Average Temperature Change (°C)", -2.0, 5.0, 0.1),
+    'T2M_std_change': ("Temperature Variability Change (°C)", -1.0, 5.0, 0.1),
+    'T2M_max_change': ("Maximum Temperature Change (°C)", -2.0, 8.0, 0.1),
+    'extreme_heat_days_change': ("Extreme Heat Days Change", -5, 15, 1),
+    'NDVI_mean_change': ("NDVI Change", -0.2, 0.2, 0.01),
+    'NDVI_std_change': ("NDVI Variability Change", -0.1, 0.2, 0.01),
+    'RH2M_mean_change': ("Humidity Change (%)", -15.0, 15.0, 0.5),
+    'early_yield_mean': ("Historical Average Yield (bu/acre)", 50.0, 200.0, 5.0),
+    'early_yield_cv': ("Historical Volatility (CV %)", 0.0, 30.0, 1.0),
+}
+
+
+def slider_key(feature):
+    """Stable widget key of a Modeler slider (what modeler_live.js matches sliders by)."""
+    return f'modeler_{feature}'
+
+
+def slider_args(feature):
+    """st.slider keyword arguments (label, range, step, key) for a Modeler input."""
+    label, low, high, step = MODELER_SLIDERS[feature]
+    return {'label': label, 'min_value': low, 'max_value': high, 'step': step, 'key': slider_key(feature)}
+
+
+def feature_matrix(frame, fill_derived=False):
+    """
+    Select the model feature columns from a DataFrame, in training order.
+
+    A 'crop' column is turned into crop_soybean when the dummy is absent.
+    With fill_derived=True, features the Modeler page derives (solar
+    radiation, EVI, NDWI) are filled the same way when missing.
+    """
+    if 'crop_soybean' not in frame.columns and 'crop' in frame.columns:
+        frame = frame.assign(crop_soybean=(frame['crop'].str.lower() == 'soybean').astype(int))
+
+    if fill_derived:
+        for column, derive in DERIVED_FEATURES.items():
+            if column not in frame.columns:
+                try:
+                    frame = frame.assign(**{column: derive(frame)})
+                except KeyError:
+                    pass  # Source column missing; reported below
+
+    missing = [c for c in FEATURE_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing model feature columns: {missing}")
+
+    return frame[FEATURE_COLUMNS].astype(float)
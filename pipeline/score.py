@@ -0,0 +1,154 @@
+"""
+Batch scoring of county scenario files.
+
+Streams a CSV or Parquet file carrying the 13 model features through the
+exported model in fixed-size chunks, so memory stays flat regardless of
+input size. Each output row gets predicted_cv_change and risk_level (the
+Risk Map bins), plus any passthrough columns.
+
+Usage:
+    python -m pipeline.score scenarios.parquet scored.csv --keep state_fp county_fp crop
+"""
+
+import argparse
+import logging
+import pickle
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.routing import ROUTE_COLUMN, default_model_path, model_input
+from pipeline.schema import FEATURE_COLUMNS, RISK_BINS, RISK_LABELS
+
+logger = logging.getLogger(__name__)
+
+
+def load_model(model_path=None):
+    """Load a pickled model exported by VolatilityPredictor (default: see routing.default_model_path)."""
+    with open(model_path or default_model_path(), 'rb') as f:
+        return pickle.load(f)
+
+
+def iter_chunks(input_path, chunksize, columns=None):
+    """Yield DataFrame chunks from a CSV or Parquet file."""
+    if Path(input_path).suffix.lower() in ('.parquet', '.pq'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet requires pyarrow: pip install pyarrow")
+
+        parquet_file = pq.ParquetFile(input_path)
+        if columns is not None:
+            columns = [c for c in columns if c in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, chunksize=chunksize,
+                               usecols=lambda c: columns is None or c in columns)
+
+
+def score_chunk(model, chunk, keep=()):
+    """Score one chunk; returns passthrough columns plus prediction and risk bin."""
+    predictions = model.predict(model_input(model, chunk))
+
+    scored = chunk[[c for c in keep if c in chunk.columns]].copy()
+    scored['predicted_cv_change'] = predictions
+    scored['risk_level'] = pd.cut(predictions, bins=RISK_BINS, labels=RISK_LABELS).astype(str)
+    return scored
+
+
+class _OutputWriter:
+    """Append scored chunks to a CSV or Parquet file as they arrive."""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.is_parquet = Path(output_path).suffix.lower() in ('.parquet', '.pq')
+        self._parquet_writer = None
+        self._wrote_header = False
+
+    def write(self, frame):
+        if self.is_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            frame.to_csv(self.output_path, mode='a' if self._wrote_header else 'w',
+                         header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def score_file(input_path, output_path, model_path=None,
+               chunksize=100_000, keep=()):
+    """
+    Score an input file chunk by chunk and stream results to output_path.
+
+    Args:
+        input_path: CSV or Parquet file with the model feature columns
+        output_path: CSV or Parquet destination
+        model_path: Pickled model to score with (default: routing.default_model_path())
+        chunksize: Rows held in memory at a time
+        keep: Input columns copied through to the output (e.g. identifiers)
+
+    Returns:
+        Dict with rows scored, elapsed seconds and rows per second
+    """
+    model = load_model(model_path)
+    # state_fp/region route rows of a per-region model
+    columns = list(dict.fromkeys(FEATURE_COLUMNS + ['crop', 'state_fp', ROUTE_COLUMN] + list(keep)))
+    writer = _OutputWriter(output_path)
+
+    rows = 0
+    start = time.perf_counter()
+    try:
+        for chunk in iter_chunks(input_path, chunksize, columns=columns):
+            writer.write(score_chunk(model, chunk, keep))
+            rows += len(chunk)
+            elapsed = time.perf_counter() - start
+            logger.info(f"Scored {rows:,} rows ({rows / elapsed:,.0f} rows/s)")
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed > 0 else float('nan'),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score scenario rows with the exported volatility model.")
+    parser.add_argument('input', help="CSV or Parquet file with the 13 model features")
+    parser.add_argument('output', help="CSV or Parquet output path")
+    parser.add_argument('--model', default=None,
+                        help="Pickled model (default: models/routed_model.pkl if exported and preferred, else xgboost_model.pkl)")
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--keep', nargs='*', default=[],
+                        help="Input columns to copy to the output, e.g. state_fp county_fp crop")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    stats = score_file(args.input, args.output, model_path=args.model,
+                       chunksize=args.chunksize, keep=args.keep)
+
+    print(f"Scored {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_second']:,.0f} rows/s) -> {args.output}", file=sys.stderr)
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,355 @@
+"""
+Local HTTP prediction service for the XGBoost volatility model.
+
+Accepts the same feature schema as the Volatility Impact Modeler page
+(see pipeline/schema.py); with a routed model, a "state_fp" or "region"
+field picks the regional model. Concurrent requests are coalesced into
+micro-batches: the first queued request opens a short window
+(--max-wait-ms) and every request arriving within it is scored in a
+single model.predict call.
+
+Endpoints:
+    POST /predict   {"features": {...}} or {"instances": [{...}, ...]}
+    GET  /metrics   latency percentiles, request and batch counts
+    GET  /health
+
+Usage:
+    python -m pipeline.serve --port 8600
+    python -m pipeline.serve --loadtest --concurrency 32 --requests 2000
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from pipeline.routing import model_input
+from pipeline.schema import RISK_BINS, RISK_LABELS
+from pipeline.score import load_model
+
+logger = logging.getLogger(__name__)
+
+
+class _Pending:
+    """A queued prediction request waiting for its batch to be scored."""
+
+    __slots__ = ('features', 'done', 'result', 'error')
+
+    def __init__(self, features):
+        self.features = features
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Coalesce concurrent predict calls into batched model.predict calls."""
+
+    def __init__(self, model, max_batch_size=256, max_wait_ms=5.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batch_sizes = deque(maxlen=10_000)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def predict(self, features):
+        """Block until the rows in features (a feature matrix) are scored."""
+        pending = _Pending(features)
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        """Gather requests arriving within the batching window."""
+        batch = [first]
+        rows = len(first.features)
+        deadline = time.monotonic() + self.max_wait
+
+        while rows < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if pending is None:
+                self._queue.put(None)
+                break
+            batch.append(pending)
+            rows += len(pending.features)
+
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = self._collect(first)
+            try:
+                features = pd.concat([p.features for p in batch], ignore_index=True)
+                predictions = self.model.predict(features)
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+                    pending.done.set()
+                continue
+
+            self.batch_sizes.append(len(features))
+            offset = 0
+            for pending in batch:
+                n = len(pending.features)
+                pending.result = predictions[offset:offset + n]
+                offset += n
+                pending.done.set()
+
+
+class LatencyTracker:
+    """Thread-safe rolling window of request latencies."""
+
+    def __init__(self, window=10_000):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def record(self, seconds, error=False):
+        with self._lock:
+            self._latencies.append(seconds * 1000)
+            self.requests += 1
+            self.errors += int(error)
+
+    def summary(self):
+        with self._lock:
+            latencies = np.array(self._latencies)
+            requests, errors = self.requests, self.errors
+
+        summary = {'requests': requests, 'errors': errors}
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            summary.update(p50_ms=p50, p95_ms=p95, p99_ms=p99, max_ms=latencies.max())
+        return summary
+
+
+def format_predictions(predictions):
+    """Attach the Risk Map bin to each predicted CV change."""
+    levels = pd.cut(predictions, bins=RISK_BINS, labels=RISK_LABELS).astype(str)
+    return [
+        {'predicted_cv_change': float(p), 'risk_level': level}
+        for p, level in zip(predictions, levels)
+    ]
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """Routes /predict, /metrics and /health for a PredictionServer."""
+
+    # Keep-alive: clients reuse one connection instead of reconnecting per request
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/metrics':
+            metrics = self.server.latency.summary()
+            batch_sizes = list(self.server.batcher.batch_sizes)
+            metrics.update(
+                batches=len(batch_sizes),
+                mean_batch_size=float(np.mean(batch_sizes)) if batch_sizes else 0.0
+            )
+            self._send_json(200, metrics)
+        else:
+            self._send_json(404, {'error': f'Unknown path {self.path}'})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        # Read the body first, so a kept-alive connection is left at the next request
+        try:
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        except ValueError as e:
+            self.close_connection = True
+            self._send_json(400, {'error': str(e)})
+            return
+        if self.path != '/predict':
+            self._send_json(404, {'error': f'Unknown path {self.path}'})
+            return
+
+        try:
+            payload = json.loads(body)
+            single = 'features' in payload
+            records = [payload['features']] if single else payload['instances']
+            features = model_input(self.server.batcher.model, pd.DataFrame.from_records(records), fill_derived=True)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.server.latency.record(time.perf_counter() - start, error=True)
+            self._send_json(400, {'error': str(e)})
+            return
+
+        try:
+            predictions = format_predictions(self.server.batcher.predict(features))
+        except Exception as e:
+            self.server.latency.record(time.perf_counter() - start, error=True)
+            self._send_json(500, {'error': str(e)})
+            return
+
+        self.server.latency.record(time.perf_counter() - start)
+        self._send_json(200, predictions[0] if single else {'predictions': predictions})
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class PredictionServer(ThreadingHTTPServer):
+    """Threaded HTTP server sharing one model behind a MicroBatcher."""
+
+    daemon_threads = True
+    # Listen backlog; the default of 5 drops connections from bursts of clients
+    request_queue_size = 256
+
+    def __init__(self, address, model, max_batch_size=256, max_wait_ms=5.0):
+        super().__init__(address, PredictionHandler)
+        self.batcher = MicroBatcher(model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        self.latency = LatencyTracker()
+
+    def server_close(self):
+        super().server_close()
+        self.batcher.close()
+
+
+# Default Modeler page slider values, used as the load-test request body
+SAMPLE_FEATURES = {
+    'T2M_mean_change': 1.0,
+    'T2M_std_change': 2.0,
+    'T2M_max_change': 2.0,
+    'extreme_heat_days_change': 3,
+    'RH2M_mean_change': -2.0,
+    'NDVI_mean_change': -0.05,
+    'NDVI_std_change': 0.05,
+    'early_yield_mean': 140.0,
+    'early_yield_cv': 10.0,
+    'crop': 'corn',
+}
+
+
+def run_loadtest(model, concurrency=32, n_requests=2000, max_wait_ms=5.0):
+    """
+    Drive single-row requests at a local server with and without batching.
+
+    Returns:
+        DataFrame with throughput and latency percentiles per mode
+    """
+    body = json.dumps({'features': SAMPLE_FEATURES})
+    results = []
+
+    for mode, batch_size in [('per-request', 1), ('micro-batched', 256)]:
+        server = PredictionServer(('127.0.0.1', 0), model,
+                                  max_batch_size=batch_size, max_wait_ms=max_wait_ms)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+
+        def worker(count):
+            """Send count requests over one connection; returns the number that failed."""
+            conn = http.client.HTTPConnection('127.0.0.1', port)
+            errors = 0
+            for _ in range(count):
+                try:
+                    conn.request('POST', '/predict', body, {'Content-Type': 'application/json'})
+                    conn.getresponse().read()
+                except (OSError, http.client.HTTPException):
+                    errors += 1
+                    conn.close()  # Reconnects on the next request
+            conn.close()
+            return errors
+
+        per_worker = [n_requests // concurrency + (i < n_requests % concurrency)
+                      for i in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            errors = sum(pool.map(worker, per_worker))
+        elapsed = time.perf_counter() - start
+
+        summary = server.latency.summary()
+        batch_sizes = list(server.batcher.batch_sizes)
+        server.shutdown()
+        server.server_close()
+
+        results.append({
+            'mode': mode,
+            'requests': summary['requests'],
+            'errors': errors,
+            'requests_per_s': summary['requests'] / elapsed,
+            'p50_ms': summary.get('p50_ms'),
+            'p95_ms': summary.get('p95_ms'),
+            'p99_ms': summary.get('p99_ms'),
+            'mean_batch_size': float(np.mean(batch_sizes)) if batch_sizes else 0.0,
+        })
+
+    return pd.DataFrame(results)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve volatility predictions over HTTP.")
+    parser.add_argument('--model', default=None,
+                        help="Pickled model (default: models/routed_model.pkl if exported and preferred, else xgboost_model.pkl)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--max-batch-size', type=int, default=256)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0,
+                        help="How long the first queued request waits for others to join its batch")
+    parser.add_argument('--loadtest', action='store_true',
+                        help="Compare per-request and micro-batched throughput on localhost, then exit")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    model = load_model(args.model)
+
+    if args.loadtest:
+        results = run_loadtest(model, concurrency=args.concurrency,
+                               n_requests=args.requests, max_wait_ms=args.max_wait_ms)
+        print(results.to_string(index=False, float_format='%.2f'))
+        return results
+
+    server = PredictionServer((args.host, args.port), model,
+                              max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    logger.info(f"Serving predictions on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
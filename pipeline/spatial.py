@@ -0,0 +1,456 @@
+"""
+County neighbor matrix and spatial autocorrelation of volatility change.
+
+The neighbor matrix is built once from the county boundary GeoJSON the
+Risk Map draws (queen contiguity: counties sharing at least one boundary
+vertex), with counties that touch nobody (islands, or boundaries that do
+not share vertices exactly) joined to their nearest centroids instead. It
+is stored as a sparse CSR matrix with its FIPS order in
+data/spatial/neighbors.npz.
+
+Global and local Moran's I for yield_cv_change (observed) and
+predicted_cv_change (model) are then sparse matrix products over the
+row-standardized matrix. Permutation tests are batched: the global test
+permutes all values at once as an (n x permutations) matrix, and the local
+test draws one set of neighbor-slot permutations shared by every county
+(conditional randomization), evaluated in row chunks. Results go to
+data/spatial/:
+
+    neighbors.npz        binary symmetric neighbor matrix + FIPS order
+    global_morans.csv    one row per source: I, expected I, z and pseudo p-value
+    hotspots.csv         per county and source: value, local I, p-value, cluster
+
+Usage:
+    python -m pipeline.spatial --data-dir data --geojson data/counties.geojson
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.spatial import cKDTree
+
+logger = logging.getLogger(__name__)
+
+GEOJSON_URL = "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json"
+
+SPATIAL_DIR = 'spatial'
+NEIGHBORS_FILE = 'neighbors.npz'
+TABLES = ['global_morans', 'hotspots']
+SOURCE_FILES = ['model_predictions.csv', 'volatility_final_analysis.csv']
+
+# (source name, file, value column) for the statistics
+SOURCES = [
+    ('predictions', 'model_predictions.csv', 'predicted_cv_change'),
+    ('analysis', 'volatility_final_analysis.csv', 'yield_cv_change'),
+]
+
+PERMUTATIONS = 999
+SIGNIFICANCE = 0.05
+ISLAND_K = 4
+# Decimal places vertices are rounded to before matching shared boundaries
+VERTEX_PRECISION = 6
+# Counties per block in the local permutation test (bounds memory at
+# chunk x permutations x max neighbors indices)
+LOCAL_CHUNK = 256
+
+HOT_SPOT = 'Hot Spot'
+COLD_SPOT = 'Cold Spot'
+HIGH_LOW = 'High-Low Outlier'
+LOW_HIGH = 'Low-High Outlier'
+NOT_SIGNIFICANT = 'Not Significant'
+# Moran scatterplot quadrant (1 = HH, 2 = LH, 3 = LL, 4 = HL) -> cluster label
+QUADRANT_LABELS = {1: HOT_SPOT, 2: LOW_HIGH, 3: COLD_SPOT, 4: HIGH_LOW}
+
+
+def load_geojson(source=GEOJSON_URL):
+    """County boundary GeoJSON from a local path or URL."""
+    if str(source).startswith(('http://', 'https://')):
+        import requests
+        return requests.get(source, timeout=60).json()
+    with open(source) as f:
+        return json.load(f)
+
+
+def exterior_rings(geometry):
+    """Exterior rings of a Polygon or MultiPolygon geometry."""
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates'][0]]
+    if geometry['type'] == 'MultiPolygon':
+        return [polygon[0] for polygon in geometry['coordinates']]
+    return []
+
+
+def boundary_vertices(geojson):
+    """
+    Boundary vertices of every county feature.
+
+    Returns:
+        (fips, county_index, vertices): FIPS per feature, and for every
+        exterior-ring vertex its feature index and (lon, lat)
+    """
+    fips, owners, vertices = [], [], []
+    for feature in geojson['features']:
+        rings = [np.asarray(ring, dtype=float)[:, :2] for ring in exterior_rings(feature.get('geometry') or {})]
+        if not rings:
+            continue
+        points = np.concatenate(rings)
+        owners.append(np.full(len(points), len(fips)))
+        vertices.append(points)
+        fips.append(str(feature['id']).zfill(5))
+    return np.array(fips), np.concatenate(owners), np.concatenate(vertices)
+
+
+def centroids(county_index, vertices, n):
+    """Mean boundary vertex per county, projected so distances are roughly isotropic."""
+    counts = np.bincount(county_index, minlength=n)
+    lon = np.bincount(county_index, weights=vertices[:, 0], minlength=n) / counts
+    lat = np.bincount(county_index, weights=vertices[:, 1], minlength=n) / counts
+    return np.column_stack([lon * np.cos(np.radians(lat)), lat])
+
+
+def _symmetric(rows, cols, n):
+    matrix = sparse.coo_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n)).tocsr()
+    matrix = matrix.maximum(matrix.T)
+    matrix.setdiag(0)
+    matrix.eliminate_zeros()
+    matrix.data[:] = 1
+    return matrix
+
+
+def knn_pairs(points, k):
+    """(rows, cols) joining each point to its k nearest other points."""
+    k = min(k, len(points) - 1)
+    if k < 1:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    _, nearest = cKDTree(points).query(points, k=k + 1)
+    return np.repeat(np.arange(len(points)), k), nearest[:, 1:].ravel()
+
+
+def neighbor_matrix(geojson, method='queen', k=ISLAND_K, precision=VERTEX_PRECISION):
+    """
+    Binary symmetric county neighbor matrix from boundary GeoJSON.
+
+    Args:
+        geojson: FeatureCollection keyed by 5-digit FIPS feature ids
+        method: 'queen' (shared boundary vertex, islands joined to their k
+            nearest centroids) or 'knn' (k nearest centroids)
+        k: Neighbors per county for 'knn' and for queen islands
+        precision: Decimal places vertices are rounded to before matching
+
+    Returns:
+        (fips, weights): FIPS array and n x n CSR matrix in that order
+    """
+    fips, county_index, vertices = boundary_vertices(geojson)
+    n = len(fips)
+    points = centroids(county_index, vertices, n)
+
+    if method == 'knn':
+        rows, cols = knn_pairs(points, k)
+        return fips, _symmetric(rows, cols, n)
+    if method != 'queen':
+        raise ValueError(f"Unknown neighbor method: {method}")
+
+    # Counties sharing a rounded vertex are neighbors
+    shared = pd.DataFrame({
+        'x': np.round(vertices[:, 0], precision),
+        'y': np.round(vertices[:, 1], precision),
+        'county': county_index,
+    }).drop_duplicates()
+    pairs = shared.merge(shared, on=['x', 'y'])
+    pairs = pairs[pairs['county_x'] != pairs['county_y']]
+    weights = _symmetric(pairs['county_x'].to_numpy(), pairs['county_y'].to_numpy(), n)
+
+    islands = np.flatnonzero(np.diff(weights.indptr) == 0)
+    if len(islands):
+        _, nearest = cKDTree(points).query(points[islands], k=min(k, n - 1) + 1)
+        rows = np.repeat(islands, nearest.shape[1] - 1)
+        cols = nearest[:, 1:].ravel()
+        weights = _symmetric(np.concatenate([weights.tocoo().row, rows]),
+                             np.concatenate([weights.tocoo().col, cols]), n)
+        logger.info(f"Joined {len(islands)} counties without shared boundaries to nearest centroids")
+
+    logger.info(f"Built neighbor matrix: {n} counties, mean {weights.nnz / max(n, 1):.1f} neighbors")
+    return fips, weights
+
+
+def save_neighbors(path, fips, weights):
+    """Write the neighbor matrix and its FIPS order to one .npz file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, fips=fips, indptr=weights.indptr, indices=weights.indices,
+                        shape=np.array(weights.shape))
+
+
+def load_neighbors(path):
+    """Read (fips, weights) written by save_neighbors."""
+    with np.load(path) as stored:
+        indices, indptr = stored['indices'], stored['indptr']
+        weights = sparse.csr_matrix((np.ones(len(indices)), indices, indptr), shape=tuple(stored['shape']))
+        return stored['fips'].astype(str), weights
+
+
+def subset_weights(fips, weights, keep):
+    """Rows/columns of weights for the FIPS codes in keep, in keep's order (missing codes dropped)."""
+    position = pd.Series(np.arange(len(fips)), index=fips)
+    keep = pd.Index(keep)
+    present = keep.isin(position.index)
+    idx = position.reindex(keep[present]).to_numpy()
+    return keep[present], weights[idx][:, idx]
+
+
+def row_standardize(weights):
+    """Row-standardized copy of weights; rows without neighbors stay zero."""
+    degree = np.asarray(weights.sum(axis=1)).ravel()
+    scale = np.divide(1.0, degree, out=np.zeros_like(degree, dtype=float), where=degree > 0)
+    return sparse.diags(scale) @ weights
+
+
+def _pseudo_p(observed, simulated):
+    """Folded pseudo p-value (as in PySAL's esda): share of simulations at least as extreme, per row."""
+    permutations = simulated.shape[-1]
+    larger = (simulated >= observed[..., None]).sum(axis=-1)
+    larger = np.minimum(larger, permutations - larger)
+    return (larger + 1) / (permutations + 1)
+
+
+def global_morans_i(weights, values, permutations=PERMUTATIONS, seed=0):
+    """
+    Global Moran's I with a batched permutation test.
+
+    Args:
+        weights: Row-standardized n x n sparse matrix
+        values: Length-n array without NaNs
+        permutations: Random relabelings for the pseudo p-value
+        seed: Random seed
+
+    Returns:
+        Dict with morans_i, expected_i, z_sim, p_value and n
+    """
+    z = values - values.mean()
+    n = len(z)
+    s0 = weights.sum()
+    scale = n / s0 / (z @ z)
+    morans_i = scale * (z @ (weights @ z))
+
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permuted(np.broadcast_to(z[:, None], (n, permutations)), axis=0)
+    simulated = scale * np.einsum('ij,ij->j', shuffled, weights @ shuffled)
+
+    return {
+        'morans_i': morans_i,
+        'expected_i': -1 / (n - 1),
+        'z_sim': (morans_i - simulated.mean()) / simulated.std(),
+        'p_value': _pseudo_p(np.array(morans_i), simulated).item(),
+        'n': n,
+    }
+
+
+def local_morans_i(weights, values, permutations=PERMUTATIONS, seed=0, chunk=LOCAL_CHUNK):
+    """
+    Local Moran's I with a conditional permutation test.
+
+    Each county's value is held fixed while its neighbors are replaced by
+    values drawn without replacement from the other counties. One draw of
+    neighbor slots (permutations x max degree) is shared by all counties,
+    shifted past the county's own position, so the whole test is a
+    gather-and-sum over (chunk x permutations x max degree) index blocks.
+
+    Args:
+        weights: Row-standardized n x n sparse CSR matrix
+        values: Length-n array without NaNs
+        permutations: Random neighbor draws for the pseudo p-values
+        seed: Random seed
+        chunk: Counties per block
+
+    Returns:
+        Dict of length-n arrays: local_i, p_value, quadrant (1 HH, 2 LH,
+        3 LL, 4 HL); counties without neighbors get p_value 1
+    """
+    weights = sparse.csr_matrix(weights)
+    z = values - values.mean()
+    n = len(z)
+    m2 = (z @ z) / n
+    lag = weights @ z
+    local_i = z * lag / m2
+
+    degree = np.diff(weights.indptr)
+    max_degree = int(degree.max()) if n else 0
+    # Neighbor weights left-aligned in a dense (n x max_degree) block, zero-padded
+    slots = np.arange(max_degree)
+    padded = np.zeros((n, max_degree))
+    mask = slots < degree[:, None]
+    padded[mask] = weights.data
+
+    rng = np.random.default_rng(seed)
+    draws = np.stack([rng.permutation(n - 1)[:max_degree] for _ in range(permutations)])
+
+    p_value = np.ones(n)
+    for start in range(0, n, chunk):
+        rows = np.arange(start, min(start + chunk, n))
+        # Index n - 1 draws into the other counties by skipping the county itself
+        idx = draws[None, :, :] + (draws[None, :, :] >= rows[:, None, None])
+        simulated = z[rows, None] * np.einsum('rpk,rk->rp', z[idx], padded[rows]) / m2
+        p_value[rows] = _pseudo_p(local_i[rows], simulated)
+    p_value[degree == 0] = 1.0
+
+    quadrant = np.select([(z > 0) & (lag > 0), (z <= 0) & (lag > 0), (z <= 0) & (lag <= 0)],
+                         [1, 2, 3], default=4)
+    return {'local_i': local_i, 'p_value': p_value, 'quadrant': quadrant}
+
+
+def county_values(frame, value_col):
+    """Mean of value_col per 5-digit FIPS (crops averaged, as on the choropleth)."""
+    fips = frame['state_fp'].astype(str).str.zfill(2) + frame['county_fp'].astype(str).str.zfill(3)
+    return frame[value_col].groupby(fips).mean().dropna()
+
+
+def hotspots(fips, weights, values, source, permutations=PERMUTATIONS, seed=0, significance=SIGNIFICANCE):
+    """
+    Global and local Moran's I for one per-county value series.
+
+    Args:
+        fips, weights: Neighbor matrix from neighbor_matrix / load_neighbors
+        values: Series indexed by FIPS (see county_values)
+        source: Label stored with the results
+        permutations, seed: Permutation test settings
+        significance: Pseudo p-value below which a county is a cluster
+
+    Returns:
+        (global_row, local_table)
+    """
+    keep, subset = subset_weights(fips, weights, values.index)
+    subset = row_standardize(subset)
+    y = values.reindex(keep).to_numpy(dtype=float)
+
+    global_row = {'source': source, **global_morans_i(subset, y, permutations, seed)}
+    local = local_morans_i(subset, y, permutations, seed)
+
+    cluster = np.where(local['p_value'] < significance,
+                       pd.Series(local['quadrant']).map(QUADRANT_LABELS).to_numpy(), NOT_SIGNIFICANT)
+    local_table = pd.DataFrame({
+        'source': source,
+        'fips': keep,
+        'value': y,
+        'local_i': local['local_i'],
+        'p_value': local['p_value'],
+        'cluster': cluster,
+    })
+    return global_row, local_table
+
+
+def build_spatial(predictions, analysis, fips, weights, permutations=PERMUTATIONS, seed=0):
+    """
+    Moran's I tables for predicted and observed volatility change.
+
+    Returns:
+        Dict of table name -> DataFrame (see TABLES)
+    """
+    frames = {'predictions': predictions, 'analysis': analysis}
+    global_rows, local_tables = [], []
+    for source, _, value_col in SOURCES:
+        global_row, local_table = hotspots(fips, weights, county_values(frames[source], value_col),
+                                           source, permutations, seed)
+        global_rows.append(global_row)
+        local_tables.append(local_table)
+        logger.info(f"{source}: global Moran's I {global_row['morans_i']:.3f} (p={global_row['p_value']:.3f})")
+
+    return {
+        'global_morans': pd.DataFrame(global_rows),
+        'hotspots': pd.concat(local_tables, ignore_index=True),
+    }
+
+
+def write_spatial(tables, output_dir):
+    """Write each table to output_dir/<name>.csv."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, table in tables.items():
+        table.to_csv(output_dir / f'{name}.csv', index=False)
+
+
+def read_spatial(spatial_dir):
+    """Read the tables written by write_spatial."""
+    spatial_dir = Path(spatial_dir)
+    return {
+        name: pd.read_csv(spatial_dir / f'{name}.csv', dtype={'fips': str})
+        for name in TABLES
+    }
+
+
+def spatial_is_stale(data_dir):
+    """True if the Moran's I tables are missing or older than the neighbor matrix or a source file."""
+    data_dir = Path(data_dir)
+    paths = [data_dir / SPATIAL_DIR / f'{name}.csv' for name in TABLES]
+    if not all(path.exists() for path in paths):
+        return True
+    built = min(path.stat().st_mtime for path in paths)
+    inputs = [data_dir / name for name in SOURCE_FILES] + [data_dir / SPATIAL_DIR / NEIGHBORS_FILE]
+    return any(path.exists() and path.stat().st_mtime > built for path in inputs)
+
+
+def build_from_data_dir(data_dir='data', geojson=None, method='queen', k=ISLAND_K,
+                        permutations=PERMUTATIONS, seed=0):
+    """
+    Build (or reuse) the neighbor matrix and write the Moran's I tables to data_dir/spatial/.
+
+    Args:
+        geojson: Boundary FeatureCollection; when None the stored neighbor
+            matrix is reused
+    """
+    data_dir = Path(data_dir)
+    neighbors_path = data_dir / SPATIAL_DIR / NEIGHBORS_FILE
+    if geojson is not None:
+        fips, weights = neighbor_matrix(geojson, method=method, k=k)
+        save_neighbors(neighbors_path, fips, weights)
+    else:
+        fips, weights = load_neighbors(neighbors_path)
+
+    predictions = pd.read_csv(data_dir / 'model_predictions.csv')
+    analysis = pd.read_csv(data_dir / 'volatility_final_analysis.csv')
+    tables = build_spatial(predictions, analysis, fips, weights, permutations, seed)
+    write_spatial(tables, data_dir / SPATIAL_DIR)
+    return tables
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the county neighbor matrix and Moran's I hotspots.")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--geojson', default=None,
+                        help="Boundary GeoJSON path or URL (default: data-dir/counties.geojson if present, "
+                             "else the stored neighbor matrix, else the Risk Map's online file)")
+    parser.add_argument('--method', choices=['queen', 'knn'], default='queen')
+    parser.add_argument('--k', type=int, default=ISLAND_K,
+                        help="Neighbors per county for knn, and for queen counties without shared boundaries")
+    parser.add_argument('--permutations', type=int, default=PERMUTATIONS)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    data_dir = Path(args.data_dir)
+
+    source = args.geojson
+    if source is None and (data_dir / 'counties.geojson').exists():
+        source = data_dir / 'counties.geojson'
+    if source is None and not (data_dir / SPATIAL_DIR / NEIGHBORS_FILE).exists():
+        source = GEOJSON_URL
+
+    tables = build_from_data_dir(data_dir, load_geojson(source) if source else None,
+                                 method=args.method, k=args.k,
+                                 permutations=args.permutations, seed=args.seed)
+    print(tables['global_morans'].to_string(index=False, float_format='%.4f'))
+    print()
+    print(tables['hotspots'].groupby(['source', 'cluster']).size().to_string())
+    return tables
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,192 @@
+"""
+Build-time summary cube for the dashboard.
+
+Everything the Home, Risk Map and Analytics pages aggregate is a function
+of model_predictions.csv and volatility_final_analysis.csv. This stage
+computes those aggregates once and writes them as small CSVs to
+data/summary/, so page reruns only read and slice them:
+
+    headline.csv          one row of headline counts and means, plus built_at
+    risk_counts.csv       rows per risk level (source, level, count)
+    state_summary.csv     per-state mean, count and high-risk count
+    top_counties.csv      top-N counties by CV change, overall and per crop
+    county_risk.csv       per-county mean prediction for the choropleth
+    prediction_table.csv  predictions with risk_level and fips, sorted
+
+Usage:
+    python -m pipeline.summary --data-dir data
+"""
+
+import argparse
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.schema import HIGH_RISK_THRESHOLD, RISK_BINS, RISK_LABELS
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_DIR = 'summary'
+SOURCE_FILES = ['model_predictions.csv', 'volatility_final_analysis.csv']
+TABLES = ['headline', 'risk_counts', 'state_summary', 'top_counties', 'county_risk', 'prediction_table']
+TOP_N = 10
+
+# Tables with a zero-padded FIPS column that must stay a string
+FIPS_TABLES = {'county_risk', 'prediction_table'}
+
+
+def _fips(frame):
+    return frame['state_fp'].astype(str).str.zfill(2) + frame['county_fp'].astype(str).str.zfill(3)
+
+
+def _top_counties(frame, value_col, source, n):
+    """Top n rows by value_col overall ('all') and within each crop."""
+    scopes = [('all', frame)] + [(crop, group) for crop, group in frame.groupby('crop')]
+    tops = []
+    for scope, group in scopes:
+        top = group.nlargest(n, value_col)[['county_name', 'state_name', 'crop', value_col]]
+        tops.append(top.rename(columns={value_col: 'cv_change'})
+                    .assign(source=source, scope=scope, rank=range(1, len(top) + 1)))
+    return pd.concat(tops, ignore_index=True)[
+        ['source', 'scope', 'rank', 'county_name', 'state_name', 'crop', 'cv_change']
+    ]
+
+
+def _state_summary(frame, value_col, source):
+    summary = frame.groupby('state_name').agg(
+        mean_cv_change=(value_col, 'mean'),
+        count=('county_fp', 'count'),
+        high_risk_count=(value_col, lambda x: int((x > HIGH_RISK_THRESHOLD).sum())),
+    ).reset_index()
+    return summary.assign(source=source)[
+        ['source', 'state_name', 'mean_cv_change', 'count', 'high_risk_count']
+    ]
+
+
+def build_summary(predictions, analysis, top_n=TOP_N):
+    """
+    Compute the summary cube from the predictions and final analysis tables.
+
+    Args:
+        predictions: model_predictions.csv contents
+        analysis: volatility_final_analysis.csv contents
+        top_n: Rows kept per top-N list
+
+    Returns:
+        Dict of table name -> DataFrame
+    """
+    predicted = predictions['predicted_cv_change']
+
+    prediction_table = predictions.copy()
+    prediction_table['risk_level'] = pd.cut(predicted, bins=RISK_BINS, labels=RISK_LABELS).astype(str)
+    prediction_table['fips'] = _fips(prediction_table)
+    prediction_table = prediction_table.sort_values('predicted_cv_change', ascending=False, ignore_index=True)
+
+    if 'predicted_high_risk' in predictions.columns:
+        high_risk = int((predictions['predicted_high_risk'] == True).sum())
+    else:
+        high_risk = int((predicted > HIGH_RISK_THRESHOLD).sum())
+
+    headline = pd.DataFrame([{
+        'predicted_high_risk': high_risk,
+        'predicted_medium_risk': int(((predicted >= 2) & (predicted <= HIGH_RISK_THRESHOLD)).sum()),
+        'predicted_low_risk': int((predicted < 2).sum()),
+        'predicted_mean_cv_change': predicted.mean(),
+        'total_counties': predictions['county_fp'].nunique(),
+        # Version stamp for caches derived from the cube (e.g. the Risk Map search index)
+        'built_at': pd.Timestamp.now(tz='UTC').isoformat(),
+    }])
+
+    predicted_counts = prediction_table['risk_level'].value_counts().reindex(RISK_LABELS, fill_value=0)
+    analysis_counts = analysis['risk_category'].value_counts()
+    risk_counts = pd.concat([
+        pd.DataFrame({'source': 'predictions', 'level': predicted_counts.index, 'count': predicted_counts.values}),
+        pd.DataFrame({'source': 'analysis', 'level': analysis_counts.index, 'count': analysis_counts.values}),
+    ], ignore_index=True)
+
+    state_summary = pd.concat([
+        _state_summary(predictions, 'predicted_cv_change', 'predictions'),
+        _state_summary(analysis, 'yield_cv_change', 'analysis'),
+    ], ignore_index=True)
+
+    top_counties = pd.concat([
+        _top_counties(predictions, 'predicted_cv_change', 'predictions', top_n),
+        _top_counties(analysis, 'yield_cv_change', 'analysis', top_n),
+    ], ignore_index=True)
+
+    county_risk = prediction_table.groupby('fips').agg({
+        'predicted_cv_change': 'mean',
+        'county_name': 'first',
+        'state_name': 'first',
+        'crop': lambda x: ', '.join(x.unique())
+    }).reset_index()
+
+    return {
+        'headline': headline,
+        'risk_counts': risk_counts,
+        'state_summary': state_summary,
+        'top_counties': top_counties,
+        'county_risk': county_risk,
+        'prediction_table': prediction_table,
+    }
+
+
+def write_summary(summary, output_dir):
+    """Write each summary table to output_dir/<name>.csv."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, table in summary.items():
+        table.to_csv(output_dir / f'{name}.csv', index=False)
+    logger.info(f"Wrote {len(summary)} summary tables to {output_dir}")
+
+
+def read_summary(summary_dir):
+    """Read the summary tables written by write_summary."""
+    summary_dir = Path(summary_dir)
+    return {
+        name: pd.read_csv(summary_dir / f'{name}.csv',
+                          dtype={'fips': str} if name in FIPS_TABLES else None)
+        for name in TABLES
+    }
+
+
+def summary_is_stale(data_dir):
+    """True if the cube is missing or older than either source file."""
+    data_dir = Path(data_dir)
+    paths = [data_dir / SUMMARY_DIR / f'{name}.csv' for name in TABLES]
+    if not all(path.exists() for path in paths):
+        return True
+    built = min(path.stat().st_mtime for path in paths)
+    return any((data_dir / name).stat().st_mtime > built for name in SOURCE_FILES)
+
+
+def build_from_data_dir(data_dir='data', top_n=TOP_N):
+    """Build the cube from the source CSVs in data_dir and write it to data_dir/summary/."""
+    data_dir = Path(data_dir)
+    predictions = pd.read_csv(data_dir / 'model_predictions.csv')
+    analysis = pd.read_csv(data_dir / 'volatility_final_analysis.csv')
+    summary = build_summary(predictions, analysis, top_n=top_n)
+    write_summary(summary, data_dir / SUMMARY_DIR)
+    return summary
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Precompute the dashboard summary cube.")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--top-n', type=int, default=TOP_N)
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    summary = build_from_data_dir(args.data_dir, top_n=args.top_n)
+    for name, table in summary.items():
+        print(f"{name}: {len(table)} rows")
+    return summary
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,214 @@
+"""
+Lookup-table surrogate of the model over the Modeler page's sliders.
+
+A single XGBoost predict takes about a millisecond. That is far more
+than a slider drag can spend per pointer move, and it only runs
+server-side after the drag. Only one slider moves at a time, though.
+SliderSurrogate.build() tabulates the model along every slider's full
+range (the step values in schema.MODELER_SLIDERS), holding the other
+inputs at the page's current settings. That is one batched predict of
+about 450 rows. While one slider moves, the surrogate returns the
+model's exact output at each step. When several inputs differ from the
+anchor settings, their effects are added, and that is only an
+approximation. measure_error() reports how close it is.
+
+The Modeler page rebuilds the tables on each rerun and evaluates them in
+the browser while a slider is dragged (dashboard/static/modeler_live.js).
+The exact model still produces the gauge once the slider is released.
+Evaluating the tables takes microseconds.
+
+Usage:
+    python -m pipeline.surrogate --anchors 100
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipeline.routing import model_input
+from pipeline.schema import MODELER_SLIDERS, RISK_BINS, slider_key
+
+logger = logging.getLogger(__name__)
+
+
+def slider_steps(feature):
+    """Every value the slider for feature can take."""
+    _, low, high, step = MODELER_SLIDERS[feature]
+    n_steps = int(round((high - low) / step)) + 1
+    return np.round(low + np.arange(n_steps) * step, 10)
+
+
+class SliderSurrogate:
+    """Per-slider lookup tables of the model around one set of inputs."""
+
+    def __init__(self, anchor, base, tables):
+        """
+        Args:
+            anchor: Inputs the tables were built at (slider features, crop_soybean, ...)
+            base: Model output at the anchor
+            tables: Dict of slider feature -> model output at each slider_steps() value
+        """
+        self.anchor = anchor
+        self.base = float(base)
+        self.tables = tables
+        # (low, step, table) per feature, so predict() does no lookups in MODELER_SLIDERS
+        self._index = {feature: (MODELER_SLIDERS[feature][1], MODELER_SLIDERS[feature][3], table.tolist())
+                       for feature, table in tables.items()}
+
+    @classmethod
+    def build(cls, model, inputs):
+        """
+        Tabulate model along every slider, other inputs held at inputs.
+
+        Args:
+            model: Any exported model (plain or routed)
+            inputs: Dict of the page's inputs: every MODELER_SLIDERS feature,
+                crop_soybean and optionally region
+        """
+        steps = {feature: slider_steps(feature) for feature in MODELER_SLIDERS}
+        n_rows = 1 + sum(len(values) for values in steps.values())
+        frame = pd.DataFrame({name: [value] * n_rows for name, value in inputs.items()})
+
+        # Row 0 is the anchor; then one block of rows per slider
+        offset = 1
+        for feature, values in steps.items():
+            frame.iloc[offset:offset + len(values), frame.columns.get_loc(feature)] = values
+            offset += len(values)
+
+        predictions = np.asarray(model.predict(model_input(model, frame, fill_derived=True)), dtype=float)
+        tables, offset = {}, 1
+        for feature, values in steps.items():
+            tables[feature] = predictions[offset:offset + len(values)]
+            offset += len(values)
+        return cls(dict(inputs), predictions[0], tables)
+
+    def predict(self, values):
+        """
+        Surrogate output for slider values (a dict; missing sliders stay at the anchor).
+
+        Exact when at most one slider differs from the anchor.
+        """
+        total = self.base
+        for feature, value in values.items():
+            entry = self._index.get(feature)
+            if entry is None:
+                continue
+            low, step, table = entry
+            i = min(max(int(round((value - low) / step)), 0), len(table) - 1)
+            total += table[i] - self.base
+        return total
+
+    def to_dict(self):
+        """JSON-ready tables for modeler_live.js: slider key -> (label, min, step, outputs)."""
+        return {
+            'base': round(self.base, 4),
+            'sliders': {
+                slider_key(feature): {
+                    'feature': feature,
+                    'label': MODELER_SLIDERS[feature][0],
+                    'min': MODELER_SLIDERS[feature][1],
+                    'step': MODELER_SLIDERS[feature][3],
+                    'values': [round(float(v), 4) for v in table],
+                }
+                for feature, table in self.tables.items()
+            },
+        }
+
+
+def _random_inputs(rng, crop_soybean):
+    return {**{feature: float(rng.choice(slider_steps(feature))) for feature in MODELER_SLIDERS},
+            'crop_soybean': crop_soybean}
+
+
+def measure_error(model, n_anchors=100, moves=(1, 2, 3, len(MODELER_SLIDERS)), moves_per_anchor=20, seed=0):
+    """
+    Surrogate error against the exact model, by number of sliders moved.
+
+    Anchors are random slider settings (both crops). From each, random
+    moves change k sliders at once to random steps; k=1 is a single drag.
+
+    Returns:
+        DataFrame with one row per k: mae, p95, max absolute error (CV
+        change percentage points) and the share of moves that land in
+        the same Risk Map bin as the exact model
+    """
+    rng = np.random.default_rng(seed)
+    features = list(MODELER_SLIDERS)
+    records = []
+    for a in range(n_anchors):
+        surrogate = SliderSurrogate.build(model, _random_inputs(rng, a % 2))
+        for k in moves:
+            for _ in range(moves_per_anchor):
+                moved = rng.choice(features, size=k, replace=False)
+                values = {feature: float(rng.choice(slider_steps(feature))) for feature in moved}
+                records.append({'sliders_moved': k, 'surrogate': surrogate.predict(values),
+                                **surrogate.anchor, **values})
+
+    frame = pd.DataFrame(records)
+    frame['exact'] = model.predict(model_input(model, frame, fill_derived=True))
+    frame['error'] = (frame['surrogate'] - frame['exact']).abs()
+    same_bin = (np.digitize(frame['surrogate'], RISK_BINS[1:-1]) == np.digitize(frame['exact'], RISK_BINS[1:-1]))
+    frame['same_bin'] = same_bin
+    return frame.groupby('sliders_moved').agg(
+        moves=('error', 'size'),
+        mae=('error', 'mean'),
+        p95=('error', lambda e: np.percentile(e, 95)),
+        max=('error', 'max'),
+        same_risk_bin=('same_bin', 'mean'),
+    ).reset_index()
+
+
+def measure_latency(model, repeat=200, seed=0):
+    """Mean seconds for a surrogate build, a surrogate predict and one exact predict."""
+    rng = np.random.default_rng(seed)
+    inputs = _random_inputs(rng, 0)
+    start = time.perf_counter()
+    for _ in range(10):
+        surrogate = SliderSurrogate.build(model, inputs)
+    build = (time.perf_counter() - start) / 10
+
+    values = {feature: inputs[feature] for feature in MODELER_SLIDERS}
+    start = time.perf_counter()
+    for _ in range(repeat * 100):
+        surrogate.predict(values)
+    surrogate_predict = (time.perf_counter() - start) / (repeat * 100)
+
+    row = model_input(model, pd.DataFrame([inputs]), fill_derived=True)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        model.predict(row)
+    exact_predict = (time.perf_counter() - start) / repeat
+    return {'build_s': build, 'surrogate_predict_s': surrogate_predict, 'exact_predict_s': exact_predict}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure the Modeler slider surrogate against the exact model.")
+    parser.add_argument('--model', default=None, help="Pickled model (default: routing.default_model_path())")
+    parser.add_argument('--anchors', type=int, default=100, help="Random slider settings to build tables at")
+    parser.add_argument('--output', default=None, help="Also write the error table to this CSV")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    from pipeline.score import load_model
+
+    args = parse_args()
+    model = load_model(args.model)
+    errors = measure_error(model, n_anchors=args.anchors)
+    latency = measure_latency(model)
+
+    print(errors.to_string(index=False, float_format='%.4f'))
+    print(f"\nBuild {latency['build_s'] * 1000:.1f} ms, surrogate predict "
+          f"{latency['surrogate_predict_s'] * 1e6:.1f} us, exact predict {latency['exact_predict_s'] * 1000:.2f} ms")
+    if args.output:
+        errors.to_csv(args.output, index=False)
+    return errors, latency
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,226 @@
+"""
+Tipping points: the smallest climate shift that makes a county-crop High Risk.
+
+For every county-crop of volatility_final_analysis.csv and each direction
+in TIPPING_DIRECTIONS, the model is re-scored with that one feature
+shifted away from its observed value, up to the direction's maximum
+shift. The tipping point is the smallest shift at which the predicted CV
+change exceeds HIGH_RISK_THRESHOLD (5%).
+
+The model is not monotone along a feature, so plain bisection could land
+on a later crossing. A coarse scan of SCAN_POINTS shifts first finds the
+first grid point above the threshold, and bisection then narrows the
+bracket below it. Every county-crop and direction advances together:
+the scan is one batched predict, and each of the BISECTION_STEPS steps is
+one predict over the pairs still being refined.
+
+Rows already above the threshold get a tipping point of 0. Rows that stay
+below it across the whole range get NaN. The table is stored in
+data/tipping/ with the version of the model and analysis file it came
+from, and rebuilt when either changes.
+
+Usage:
+    python -m pipeline.tipping --data-dir data
+"""
+
+import argparse
+import logging
+import pickle
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from pipeline.dependence import curves_version
+from pipeline.routing import ROUTE_COLUMN, default_model_path, model_input
+from pipeline.schema import FEATURE_COLUMNS, HIGH_RISK_THRESHOLD, MODELER_SLIDERS
+
+logger = logging.getLogger(__name__)
+
+TIPPING_DIR = 'tipping'
+TIPPING_FILE = 'tipping_points.joblib'
+
+# Searched feature -> largest shift tried (feature units); the sign is the direction
+TIPPING_DIRECTIONS = {
+    'T2M_std_change': 3.0,
+    'extreme_heat_days_change': 15.0,
+    'T2M_mean_change': 3.0,
+    'T2M_max_change': 5.0,
+    'RH2M_mean_change': -10.0,
+}
+SCAN_POINTS = 32
+BISECTION_STEPS = 10
+
+ID_COLUMNS = ['state_fp', 'county_fp', 'crop', 'county_name', 'state_name']
+
+
+def tipping_column(feature):
+    return f'tipping_{feature}'
+
+
+def direction_label(feature):
+    """Slider label of a searched feature, e.g. 'Temperature Variability Change (°C)'."""
+    return MODELER_SLIDERS[feature][0] if feature in MODELER_SLIDERS else feature
+
+
+def _score(model, values, region, rows, directions, shifts):
+    """
+    Predictions for (row, direction, shift) triples in one predict call.
+
+    Args:
+        values: (N, features) observed feature matrix
+        region: Region per row for a routed model, else None
+        rows, directions, shifts: Equal-length arrays; directions index
+            feature columns
+    """
+    stacked = values[rows]
+    stacked[np.arange(len(rows)), directions] += shifts
+    frame = pd.DataFrame(stacked, columns=FEATURE_COLUMNS)
+    if region is not None:
+        frame[ROUTE_COLUMN] = region[rows]
+    return np.asarray(model.predict(frame), dtype=np.float32)
+
+
+class TippingPoints:
+    """Per county-crop tipping shift along each searched direction."""
+
+    def __init__(self, table, directions, version=None):
+        """
+        Args:
+            table: DataFrame of ID_COLUMNS, predicted_cv_change and one
+                tipping_column() per direction (NaN: no crossing in range)
+            directions: Dict of searched feature -> largest shift tried
+            version: curves_version of the model and analysis it came from
+        """
+        self.table = table
+        self.directions = directions
+        self.version = version
+
+    @classmethod
+    def build(cls, model, analysis, version=None, directions=None, threshold=HIGH_RISK_THRESHOLD,
+              scan_points=SCAN_POINTS, steps=BISECTION_STEPS):
+        """
+        Search every county-crop along every direction at once.
+
+        Args:
+            model: Any exported model (plain or routed)
+            analysis: volatility_final_analysis rows; rows missing a feature are skipped
+            directions: Dict of feature -> largest shift (default TIPPING_DIRECTIONS)
+            threshold: Predicted CV change to exceed
+        """
+        start = time.perf_counter()
+        directions = dict(directions or TIPPING_DIRECTIONS)
+        X = model_input(model, analysis)
+        complete = X[FEATURE_COLUMNS].notna().all(axis=1).to_numpy()
+        values = X[FEATURE_COLUMNS].to_numpy(dtype=np.float32)[complete]
+        region = X[ROUTE_COLUMN].to_numpy()[complete] if ROUTE_COLUMN in X.columns else None
+        n_rows, n_dirs = len(values), len(directions)
+        columns = np.array([FEATURE_COLUMNS.index(feature) for feature in directions])
+        max_shift = np.array(list(directions.values()), dtype=np.float32)
+
+        # Coarse scan: (rows, directions, scan points); point 0 is the observed value
+        fractions = np.linspace(0, 1, scan_points + 1, dtype=np.float32)
+        rows, dirs, points = np.meshgrid(np.arange(n_rows), np.arange(n_dirs), np.arange(len(fractions)),
+                                         indexing='ij')
+        scan = _score(model, values, region, rows.ravel(), columns[dirs.ravel()],
+                      max_shift[dirs.ravel()] * fractions[points.ravel()]).reshape(rows.shape)
+        predictions = scan[:, 0, 0]
+        predictions_made = scan.size
+
+        above = scan > threshold
+        crosses = above.any(axis=2)
+        first = above.argmax(axis=2)
+        hi = max_shift[None, :] * fractions[first]
+        lo = max_shift[None, :] * fractions[np.maximum(first - 1, 0)]
+
+        # Bisect the pairs whose first crossing lies past the observed value
+        active_rows, active_dirs = np.nonzero(crosses & (first > 0))
+        lo_active, hi_active = lo[active_rows, active_dirs], hi[active_rows, active_dirs]
+        for _ in range(steps):
+            mid = (lo_active + hi_active) / 2
+            crossed = _score(model, values, region, active_rows, columns[active_dirs], mid) > threshold
+            hi_active = np.where(crossed, mid, hi_active)
+            lo_active = np.where(crossed, lo_active, mid)
+            predictions_made += len(mid)
+        hi[active_rows, active_dirs] = hi_active
+
+        shifts = np.where(crosses, hi, np.nan)
+        table = analysis.loc[complete, [c for c in ID_COLUMNS if c in analysis.columns]].reset_index(drop=True)
+        table['predicted_cv_change'] = predictions
+        for d, feature in enumerate(directions):
+            table[tipping_column(feature)] = shifts[:, d]
+        logger.info(f"Tipping points for {n_rows} rows x {n_dirs} directions ({predictions_made:,} predictions, "
+                    f"{len(active_rows)} bisections) in {time.perf_counter() - start:.2f}s")
+        return cls(table, directions, version)
+
+    def county_layer(self, feature):
+        """
+        Per-county tipping shift along feature for the Risk Map.
+
+        Counties with both crops take the crop that tips first.
+
+        Returns:
+            DataFrame of fips, county_name, state_name, crop and shift
+        """
+        column = tipping_column(feature)
+        frame = self.table.assign(
+            fips=self.table['state_fp'].astype(str).str.zfill(2) + self.table['county_fp'].astype(str).str.zfill(3),
+            shift=self.table[column].abs(),
+        )
+        frame = frame.sort_values('shift', na_position='last').drop_duplicates('fips')
+        return frame[['fips', 'county_name', 'state_name', 'crop', 'shift']].reset_index(drop=True)
+
+    def lookup(self, state_fp, county_fp, crop):
+        """Row of the table for one county-crop, or None."""
+        rows = self.table[(self.table['state_fp'] == state_fp) & (self.table['county_fp'] == county_fp) &
+                          (self.table['crop'] == crop)]
+        return rows.iloc[0] if len(rows) else None
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump({'table': self.table, 'directions': self.directions, 'version': self.version}, path)
+
+    @classmethod
+    def load(cls, path):
+        state = joblib.load(path)
+        return cls(state['table'], state['directions'], state['version'])
+
+
+def build_from_data_dir(data_dir='data', model_path=None):
+    """Build the tipping points for the current model and analysis file and write them to data_dir/tipping/."""
+    data_dir = Path(data_dir)
+    model_path = Path(model_path or default_model_path())
+    source = data_dir / 'volatility_final_analysis.csv'
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    tipping = TippingPoints.build(model, pd.read_csv(source), version=curves_version(model_path, source))
+    tipping.save(data_dir / TIPPING_DIR / TIPPING_FILE)
+    return tipping
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Find the climate shift that makes each county-crop High Risk.")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--model', default=None, help="Pickled model (default: routing.default_model_path())")
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_args()
+    tipping = build_from_data_dir(args.data_dir, args.model)
+    table = tipping.table
+    for feature, max_shift in tipping.directions.items():
+        shifts = table[tipping_column(feature)].abs()
+        print(f"{feature:28s} already high {(shifts == 0).sum():5d}  tips within {max_shift:+g}: "
+              f"{(shifts > 0).sum():5d}  median shift {shifts[shifts > 0].median():+.2f}  never {shifts.isna().sum():5d}")
+    print(f"Version: {tipping.version}")
+    return tipping
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
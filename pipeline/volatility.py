@@ -0,0 +1,687 @@
+"""Yield volatility metrics and climate trends per county-crop."""
+
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CLIMATE_VARS = ['T2M_mean', 'T2M_max', 'T2M_std', 'extreme_heat_days',
+                'RH2M_mean', 'ALLSKY_SFC_SW_DWN_mean']
+SATELLITE_VARS = ['NDVI_mean', 'NDVI_std', 'EVI_mean', 'NDWI_mean']
+
+YIELD_KEYS = ['state_fp', 'county_fp', 'crop']
+COUNTY_KEYS = ['state_fp', 'county_fp']
+
+# (exclusive lower bound on yield_cv_change, label), checked in order
+RISK_THRESHOLDS = [
+    (5, 'High Risk (Increasing)'),
+    (0, 'Medium Risk (Slight Increase)'),
+    (-5, 'Low Risk (Stable)'),
+]
+IMPROVING_LABEL = 'Improving (Decreasing)'
+INSUFFICIENT_LABEL = 'Insufficient Data'
+
+
+def classify_risk(cv_change):
+    """Map a yield CV change (scalar or array, in %) to its risk category."""
+    cv_change = np.asarray(cv_change, dtype=float)
+    labels = np.select(
+        [cv_change > threshold for threshold, _ in RISK_THRESHOLDS],
+        [label for _, label in RISK_THRESHOLDS],
+        default=IMPROVING_LABEL
+    )
+    return labels.item() if labels.ndim == 0 else labels
+
+
+
+class VolatilityAnalyzer:
+    """Analyze crop yield volatility and climate trends."""
+
+    def __init__(self, data_path: str = None):
+        """Load merged dataset (optional when only running incremental updates)."""
+        self.data = None
+        if data_path is not None:
+            logger.info(f"Loading data from {data_path}")
+            self.data = pd.read_csv(data_path)
+            logger.info(f"Loaded {len(self.data)} records")
+
+        # Define periods for comparison
+        self.early_start = 2005
+        self.early_end = 2014
+        self.late_start = 2015
+        self.late_end = 2023
+
+        self.volatility_data = None
+        self.climate_trends = None
+        self.final_analysis = None
+
+        # Running sums for incremental updates
+        self.yield_state = None
+        self.climate_state = None
+
+    def calculate_yield_volatility(self):
+        """Calculate yield volatility metrics for each county-crop combination."""
+        logger.info("Calculating yield volatility metrics...")
+
+        # Group by county and crop
+        volatility_metrics = []
+
+        for (state_fp, county_fp, crop), group in self.data.groupby(['state_fp', 'county_fp', 'crop']):
+            # Skip if too few years
+            if len(group) < 5:
+                continue
+
+            # Get county info
+            county_name = group['county_name'].iloc[0]
+            state_name = group['state_name'].iloc[0]
+            lat = group['latitude'].iloc[0] if 'latitude' in group.columns else np.nan
+            lon = group['longitude'].iloc[0] if 'longitude' in group.columns else np.nan
+
+            # Overall statistics
+            yields = group['yield_value']
+
+            # Calculate volatility metrics
+            metrics = {
+                'state_fp': state_fp,
+                'county_fp': county_fp,
+                'crop': crop,
+                'county_name': county_name,
+                'state_name': state_name,
+
+                # Overall metrics
+                'yield_mean': yields.mean(),
+                'yield_std': yields.std(),
+                'yield_cv': (yields.std() / yields.mean()) * 100,  # Coefficient of variation (%)
+                'yield_min': yields.min(),
+                'yield_max': yields.max(),
+                'yield_range': yields.max() - yields.min(),
+                'n_years': len(group),
+
+                # Trend analysis
+                'yield_trend_slope': self._calculate_trend(group['year'], yields)
+            }
+
+            # Period comparison (early vs late)
+            early_data = group[group['year'] <= self.early_end]
+            late_data = group[group['year'] >= self.late_start]
+
+            if len(early_data) >= 3 and len(late_data) >= 3:
+                early_yields = early_data['yield_value']
+                late_yields = late_data['yield_value']
+
+                metrics.update({
+                    # Early period (2005-2014)
+                    'early_yield_mean': early_yields.mean(),
+                    'early_yield_std': early_yields.std(),
+                    'early_yield_cv': (early_yields.std() / early_yields.mean()) * 100,
+                    'early_n_years': len(early_data),
+
+                    # Late period (2015-2023)
+                    'late_yield_mean': late_yields.mean(),
+                    'late_yield_std': late_yields.std(),
+                    'late_yield_cv': (late_yields.std() / late_yields.mean()) * 100,
+                    'late_n_years': len(late_data),
+
+                    # Changes (late - early)
+                    'yield_mean_change': late_yields.mean() - early_yields.mean(),
+                    'yield_std_change': late_yields.std() - early_yields.std(),
+                    'yield_cv_change': ((late_yields.std() / late_yields.mean()) -
+                                       (early_yields.std() / early_yields.mean())) * 100,
+
+                    # Percent changes
+                    'yield_mean_pct_change': ((late_yields.mean() - early_yields.mean()) /
+                                             early_yields.mean()) * 100,
+                    'yield_std_pct_change': ((late_yields.std() - early_yields.std()) /
+                                            early_yields.std()) * 100 if early_yields.std() > 0 else 0,
+                })
+
+                # Risk classification
+                metrics['risk_category'] = classify_risk(metrics['yield_cv_change'])
+            else:
+                # Not enough data for period comparison
+                metrics.update({
+                    'early_yield_mean': np.nan,
+                    'early_yield_std': np.nan,
+                    'early_yield_cv': np.nan,
+                    'early_n_years': len(early_data),
+                    'late_yield_mean': np.nan,
+                    'late_yield_std': np.nan,
+                    'late_yield_cv': np.nan,
+                    'late_n_years': len(late_data),
+                    'yield_mean_change': np.nan,
+                    'yield_std_change': np.nan,
+                    'yield_cv_change': np.nan,
+                    'yield_mean_pct_change': np.nan,
+                    'yield_std_pct_change': np.nan,
+                    'risk_category': INSUFFICIENT_LABEL
+                })
+
+            volatility_metrics.append(metrics)
+
+        self.volatility_data = pd.DataFrame(volatility_metrics)
+        logger.info(f"Calculated volatility for {len(self.volatility_data)} county-crop combinations")
+
+        return self.volatility_data
+
+    def calculate_climate_trends(self):
+        """Calculate climate and satellite trends for each county."""
+        logger.info("Calculating climate trends...")
+
+        climate_trends = []
+
+        for (state_fp, county_fp), group in self.data.groupby(['state_fp', 'county_fp']):
+            # Get county info
+            county_name = group['county_name'].iloc[0]
+            state_name = group['state_name'].iloc[0]
+
+            # Period comparison
+            early_data = group[group['year'] <= self.early_end]
+            late_data = group[group['year'] >= self.late_start]
+
+            if len(early_data) < 3 or len(late_data) < 3:
+                continue
+
+            trends = {
+                'state_fp': state_fp,
+                'county_fp': county_fp,
+                'county_name': county_name,
+                'state_name': state_name,
+            }
+
+            # Climate and satellite variables
+            for var in CLIMATE_VARS + SATELLITE_VARS:
+                early_mean = early_data[var].mean()
+                late_mean = late_data[var].mean()
+                change = late_mean - early_mean
+                pct_change = (change / early_mean * 100) if early_mean != 0 else 0
+
+                trends[f'{var}_early'] = early_mean
+                trends[f'{var}_late'] = late_mean
+                trends[f'{var}_change'] = change
+                trends[f'{var}_pct_change'] = pct_change
+
+            climate_trends.append(trends)
+
+        self.climate_trends = pd.DataFrame(climate_trends)
+        logger.info(f"Calculated climate trends for {len(self.climate_trends)} counties")
+
+        return self.climate_trends
+
+    def merge_volatility_and_trends(self):
+        """Merge volatility metrics with climate trends."""
+        logger.info("Merging volatility and climate trends...")
+
+        if self.volatility_data is None:
+            self.calculate_yield_volatility()
+        if self.climate_trends is None:
+            self.calculate_climate_trends()
+
+        # Merge on county (not crop-specific for climate)
+        self.final_analysis = self.volatility_data.merge(
+            self.climate_trends,
+            on=['state_fp', 'county_fp'],
+            how='inner',
+            suffixes=('', '_climate')
+        )
+
+        logger.info(f"Final analysis dataset: {len(self.final_analysis)} records")
+
+        return self.final_analysis
+
+    def _calculate_trend(self, x, y):
+        """Calculate linear trend slope using least squares."""
+        if len(x) < 3:
+            return np.nan
+        # scipy.stats takes ~0.5s to import; windows.py and the pages only need this module's constants
+        from scipy import stats
+        slope, _, _, _, _ = stats.linregress(x, y)
+        return slope
+
+    def identify_high_risk_counties(self, threshold_cv_change=3.0):
+        """Identify counties with significant volatility increases."""
+        if self.final_analysis is None:
+            self.merge_volatility_and_trends()
+
+        high_risk = self.final_analysis[
+            self.final_analysis['yield_cv_change'] > threshold_cv_change
+        ].copy()
+
+        high_risk = high_risk.sort_values('yield_cv_change', ascending=False)
+
+        logger.info(f"Identified {len(high_risk)} high-risk county-crop combinations")
+        logger.info(f"  (CV change > {threshold_cv_change}%)")
+
+        return high_risk
+
+    def get_correlation_analysis(self):
+        """Calculate correlations between climate trends and volatility changes."""
+        if self.final_analysis is None:
+            self.merge_volatility_and_trends()
+
+        # Select relevant columns
+        climate_change_cols = [col for col in self.final_analysis.columns if '_change' in col and 'yield' not in col]
+        volatility_cols = ['yield_cv_change', 'yield_std_change']
+
+        # Calculate correlations
+        correlations = {}
+        for vol_col in volatility_cols:
+            corr_data = self.final_analysis[climate_change_cols + [vol_col]].corr()[vol_col]
+            corr_data = corr_data.drop(vol_col).sort_values(ascending=False)
+            correlations[vol_col] = corr_data
+
+        return correlations
+
+    def generate_summary_report(self, output_path='volatility_analysis_report.txt'):
+        """Generate comprehensive summary report."""
+        if self.final_analysis is None:
+            self.merge_volatility_and_trends()
+
+        with open(output_path, 'w') as f:
+            f.write("="*80 + "\n")
+            f.write("CROP YIELD VOLATILITY ANALYSIS REPORT\n")
+            f.write("="*80 + "\n\n")
+
+            # Overall statistics
+            f.write("OVERALL STATISTICS\n")
+            f.write("-"*80 + "\n")
+            f.write(f"Total county-crop combinations analyzed: {len(self.volatility_data)}\n")
+            f.write(f"Counties: {self.volatility_data['county_fp'].nunique()}\n")
+            f.write(f"Crops: {', '.join(self.volatility_data['crop'].unique())}\n\n")
+
+            # Volatility summary by crop
+            f.write("VOLATILITY SUMMARY BY CROP\n")
+            f.write("-"*80 + "\n")
+            for crop in self.volatility_data['crop'].unique():
+                crop_data = self.volatility_data[self.volatility_data['crop'] == crop]
+                f.write(f"\n{crop.upper()}:\n")
+                f.write(f"  Average Yield: {crop_data['yield_mean'].mean():.2f} bu/acre\n")
+                f.write(f"  Average Volatility (CV): {crop_data['yield_cv'].mean():.2f}%\n")
+                f.write(f"  Average CV Change (2015-2023 vs 2005-2014): {crop_data['yield_cv_change'].mean():.2f}%\n")
+
+            # Risk categories
+            f.write("\n\nRISK CATEGORIES\n")
+            f.write("-"*80 + "\n")
+            risk_counts = self.volatility_data['risk_category'].value_counts()
+            for category, count in risk_counts.items():
+                pct = (count / len(self.volatility_data)) * 100
+                f.write(f"{category}: {count} ({pct:.1f}%)\n")
+
+            # High-risk counties
+            f.write("\n\nTOP 20 HIGH-RISK COUNTIES (Highest CV Increase)\n")
+            f.write("-"*80 + "\n")
+            high_risk = self.volatility_data.nlargest(20, 'yield_cv_change')
+            for idx, row in high_risk.iterrows():
+                f.write(f"{row['county_name']}, {row['state_name']} ({row['crop']}): "
+                       f"CV change = +{row['yield_cv_change']:.2f}%\n")
+
+            # Climate correlations
+            f.write("\n\nCLIMATE CORRELATIONS WITH VOLATILITY CHANGE\n")
+            f.write("-"*80 + "\n")
+            correlations = self.get_correlation_analysis()
+            f.write("\nTop 10 correlations with CV change:\n")
+            for var, corr in correlations['yield_cv_change'].head(10).items():
+                f.write(f"  {var}: {corr:.3f}\n")
+
+        logger.info(f"Report saved to {output_path}")
+        print(f"\nReport saved to: {output_path}")
+
+        return output_path
+
+    def save_results(self, prefix='volatility'):
+        """Save all analysis results to CSV files."""
+        logger.info("Saving results...")
+
+        if self.volatility_data is not None:
+            volatility_file = f'{prefix}_metrics.csv'
+            self.volatility_data.to_csv(volatility_file, index=False)
+            logger.info(f"Saved volatility metrics to {volatility_file}")
+
+        if self.climate_trends is not None:
+            climate_file = f'{prefix}_climate_trends.csv'
+            self.climate_trends.to_csv(climate_file, index=False)
+            logger.info(f"Saved climate trends to {climate_file}")
+
+        if self.final_analysis is not None:
+            final_file = f'{prefix}_final_analysis.csv'
+            self.final_analysis.to_csv(final_file, index=False)
+            logger.info(f"Saved final analysis to {final_file}")
+
+        return self
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    #
+    # Every statistic in the final analysis is a function of per-window
+    # counts, sums and sums of squares, so a new season only has to be
+    # folded into those running totals.  History is never re-read.
+    # ------------------------------------------------------------------
+
+    def _aggregate_yield_sums(self, data):
+        """Collapse merged rows into running yield sums per county-crop."""
+        early = data['year'] <= self.early_end
+        late = data['year'] >= self.late_start
+        yields = data['yield_value'].astype(float)
+        # Center years so the trend sums stay well conditioned
+        t = (data['year'] - self.early_start).astype(float)
+
+        sums = data[YIELD_KEYS + ['county_name', 'state_name']].copy()
+        sums['n'] = 1
+        sums['sum'] = yields
+        sums['sumsq'] = yields ** 2
+        sums['min'] = yields
+        sums['max'] = yields
+        sums['sum_t'] = t
+        sums['sum_tt'] = t ** 2
+        sums['sum_ty'] = t * yields
+        sums['last_year'] = data['year']
+
+        for period, mask in (('early', early), ('late', late)):
+            sums[f'{period}_n'] = mask.astype(int)
+            sums[f'{period}_sum'] = yields.where(mask, 0.0)
+            sums[f'{period}_sumsq'] = (yields ** 2).where(mask, 0.0)
+
+        return self._combine_sums(sums, YIELD_KEYS)
+
+    def _aggregate_climate_sums(self, data):
+        """Collapse merged rows into running climate sums per county."""
+        early = data['year'] <= self.early_end
+        late = data['year'] >= self.late_start
+
+        sums = data[COUNTY_KEYS + ['county_name', 'state_name']].copy()
+        sums['last_year'] = data['year']
+        for period, mask in (('early', early), ('late', late)):
+            sums[f'{period}_n'] = mask.astype(int)
+            for var in CLIMATE_VARS + SATELLITE_VARS:
+                values = data[var].where(mask)
+                sums[f'{period}_{var}_sum'] = values.fillna(0.0)
+                sums[f'{period}_{var}_count'] = values.notna().astype(int)
+
+        return self._combine_sums(sums, COUNTY_KEYS)
+
+    @staticmethod
+    def _combine_sums(sums, keys):
+        """Group rows of running sums by key, adding counts and totals."""
+        agg = {col: 'sum' for col in sums.columns if col not in keys}
+        agg.update({'county_name': 'first', 'state_name': 'first'})
+        if 'min' in agg:
+            agg.update({'min': 'min', 'max': 'max'})
+        if 'last_year' in agg:
+            agg['last_year'] = 'max'
+        return sums.groupby(keys, as_index=False).agg(agg)
+
+    @staticmethod
+    def _normalize_keys(data):
+        """Cast FIPS codes to int so CSV and freshly merged rows align."""
+        data = data.copy()
+        for key in COUNTY_KEYS:
+            data[key] = data[key].astype(int)
+        return data
+
+    def _drop_folded_years(self, new_data):
+        """
+        Drop rows for seasons the running state already contains.
+
+        A key's rows are folded only for years after the last year already
+        in its yield (county-crop) and climate (county) sums, so rerunning
+        an update, or retrying one that failed after saving the state, does
+        not count a season twice.
+        """
+        if 'last_year' not in self.yield_state.columns or 'last_year' not in self.climate_state.columns:
+            logger.warning("Running state has no last_year column; rebuild it (--rebuild-state) "
+                           "to guard against folding a season twice")
+            return new_data
+
+        yield_last = new_data[YIELD_KEYS].merge(
+            self.yield_state[YIELD_KEYS + ['last_year']], on=YIELD_KEYS, how='left')['last_year']
+        county_last = new_data[COUNTY_KEYS].merge(
+            self.climate_state[COUNTY_KEYS + ['last_year']], on=COUNTY_KEYS, how='left')['last_year']
+        folded = ((new_data['year'].to_numpy() <= yield_last.to_numpy()) |
+                  (new_data['year'].to_numpy() <= county_last.to_numpy()))
+        if folded.any():
+            logger.warning(f"Skipping {int(folded.sum())} records for seasons already in the running state "
+                           f"(years {sorted(new_data.loc[folded, 'year'].unique().tolist())})")
+        return new_data[~folded]
+
+    @staticmethod
+    def _moments(n, total, sumsq):
+        """Mean, sample std and CV (%) from a count, sum and sum of squares."""
+        n = n.astype(float)
+        mean = total / n
+        var = ((sumsq - total ** 2 / n) / (n - 1)).clip(lower=0)
+        std = np.sqrt(var)
+        return mean, std, std / mean * 100
+
+    def _volatility_from_sums(self, sums):
+        """Rebuild calculate_yield_volatility() output from running sums."""
+        sums = sums[sums['n'] >= 5]
+        mean, std, cv = self._moments(sums['n'], sums['sum'], sums['sumsq'])
+        early_mean, early_std, early_cv = self._moments(
+            sums['early_n'], sums['early_sum'], sums['early_sumsq'])
+        late_mean, late_std, late_cv = self._moments(
+            sums['late_n'], sums['late_sum'], sums['late_sumsq'])
+
+        n = sums['n']
+        slope = ((n * sums['sum_ty'] - sums['sum_t'] * sums['sum']) /
+                 (n * sums['sum_tt'] - sums['sum_t'] ** 2))
+
+        metrics = sums[YIELD_KEYS + ['county_name', 'state_name']].copy()
+        metrics['yield_mean'] = mean
+        metrics['yield_std'] = std
+        metrics['yield_cv'] = cv
+        metrics['yield_min'] = sums['min']
+        metrics['yield_max'] = sums['max']
+        metrics['yield_range'] = sums['max'] - sums['min']
+        metrics['n_years'] = n
+        metrics['yield_trend_slope'] = slope
+
+        metrics['early_yield_mean'] = early_mean
+        metrics['early_yield_std'] = early_std
+        metrics['early_yield_cv'] = early_cv
+        metrics['early_n_years'] = sums['early_n']
+        metrics['late_yield_mean'] = late_mean
+        metrics['late_yield_std'] = late_std
+        metrics['late_yield_cv'] = late_cv
+        metrics['late_n_years'] = sums['late_n']
+
+        metrics['yield_mean_change'] = late_mean - early_mean
+        metrics['yield_std_change'] = late_std - early_std
+        metrics['yield_cv_change'] = late_cv - early_cv
+        metrics['yield_mean_pct_change'] = (late_mean - early_mean) / early_mean * 100
+        metrics['yield_std_pct_change'] = np.where(
+            early_std > 0, (late_std - early_std) / early_std * 100, 0)
+        metrics['risk_category'] = classify_risk(metrics['yield_cv_change'])
+
+        # Not enough data for period comparison
+        insufficient = (sums['early_n'] < 3) | (sums['late_n'] < 3)
+        period_cols = [
+            'early_yield_mean', 'early_yield_std', 'early_yield_cv',
+            'late_yield_mean', 'late_yield_std', 'late_yield_cv',
+            'yield_mean_change', 'yield_std_change', 'yield_cv_change',
+            'yield_mean_pct_change', 'yield_std_pct_change'
+        ]
+        metrics.loc[insufficient, period_cols] = np.nan
+        metrics.loc[insufficient, 'risk_category'] = INSUFFICIENT_LABEL
+
+        return metrics.reset_index(drop=True)
+
+    def _climate_trends_from_sums(self, sums):
+        """Rebuild calculate_climate_trends() output from running sums."""
+        sums = sums[(sums['early_n'] >= 3) & (sums['late_n'] >= 3)]
+
+        trends = sums[COUNTY_KEYS + ['county_name', 'state_name']].copy()
+        for var in CLIMATE_VARS + SATELLITE_VARS:
+            early_mean = sums[f'early_{var}_sum'] / sums[f'early_{var}_count'].replace(0, np.nan)
+            late_mean = sums[f'late_{var}_sum'] / sums[f'late_{var}_count'].replace(0, np.nan)
+            change = late_mean - early_mean
+
+            trends[f'{var}_early'] = early_mean
+            trends[f'{var}_late'] = late_mean
+            trends[f'{var}_change'] = change
+            trends[f'{var}_pct_change'] = np.where(early_mean != 0, change / early_mean * 100, 0)
+
+        return trends.reset_index(drop=True)
+
+    def build_running_state(self):
+        """Aggregate the loaded merged dataset into running sums (one full pass)."""
+        if self.data is None:
+            raise ValueError("No merged data loaded. Pass data_path to build the running state.")
+
+        data = self._normalize_keys(self.data)
+        self.yield_state = self._aggregate_yield_sums(data)
+        self.climate_state = self._aggregate_climate_sums(data)
+
+        logger.info(f"Built running state: {len(self.yield_state)} county-crop "
+                    f"and {len(self.climate_state)} county rows")
+
+        return self
+
+    def save_running_state(self, prefix='volatility'):
+        """Save running sums to CSV files."""
+        if self.yield_state is None or self.climate_state is None:
+            raise ValueError("No running state to save. Run build_running_state() first.")
+
+        self.yield_state.to_csv(f'{prefix}_yield_state.csv', index=False)
+        self.climate_state.to_csv(f'{prefix}_climate_state.csv', index=False)
+        logger.info(f"Saved running state to {prefix}_yield_state.csv and {prefix}_climate_state.csv")
+
+        return self
+
+    def load_running_state(self, prefix='volatility'):
+        """Load running sums written by save_running_state()."""
+        self.yield_state = pd.read_csv(f'{prefix}_yield_state.csv')
+        self.climate_state = pd.read_csv(f'{prefix}_climate_state.csv')
+        logger.info(f"Loaded running state: {len(self.yield_state)} county-crop rows")
+
+        return self
+
+    def analysis_from_state(self, yield_state=None, climate_state=None):
+        """
+        Build final-analysis rows from running sums without touching raw data.
+
+        Equivalent to merge_volatility_and_trends() on the rows the sums were
+        built from. Defaults to the full running state.
+        """
+        yield_state = self.yield_state if yield_state is None else yield_state
+        climate_state = self.climate_state if climate_state is None else climate_state
+
+        return self._volatility_from_sums(yield_state).merge(
+            self._climate_trends_from_sums(climate_state),
+            on=COUNTY_KEYS,
+            how='inner',
+            suffixes=('', '_climate')
+        )
+
+    def update_incremental(self, new_data, final_path='volatility_final_analysis.csv'):
+        """
+        Fold a new season's merged rows into the running state.
+
+        Only the counties present in new_data are recomputed; their
+        county-crop rows are replaced in the final analysis file and all
+        other rows are written back untouched. Seasons already in the
+        running state are skipped (see _drop_folded_years).
+
+        Args:
+            new_data: Merged rows (CropYieldDataMerger output) for the new season(s)
+            final_path: Final analysis CSV to update in place
+
+        Returns:
+            DataFrame with the recomputed county-crop rows
+        """
+        if self.yield_state is None or self.climate_state is None:
+            raise ValueError("No running state. Run build_running_state() or load_running_state() first.")
+
+        new_data = self._drop_folded_years(self._normalize_keys(new_data))
+        if new_data.empty:
+            logger.info(f"No new seasons to fold; {final_path} left unchanged")
+            return pd.read_csv(final_path, nrows=0)
+        logger.info(f"Folding {len(new_data)} new records into running state...")
+
+        self.yield_state = self._combine_sums(
+            pd.concat([self.yield_state, self._aggregate_yield_sums(new_data)], ignore_index=True),
+            YIELD_KEYS
+        )
+        self.climate_state = self._combine_sums(
+            pd.concat([self.climate_state, self._aggregate_climate_sums(new_data)], ignore_index=True),
+            COUNTY_KEYS
+        )
+
+        # Climate trends are per county, so every crop in a touched county changes
+        touched = new_data[COUNTY_KEYS].drop_duplicates()
+        affected_yield = self.yield_state.merge(touched, on=COUNTY_KEYS)
+        affected_climate = self.climate_state.merge(touched, on=COUNTY_KEYS)
+
+        updated = self.analysis_from_state(affected_yield, affected_climate)
+
+        final = pd.read_csv(final_path)
+        stale = pd.MultiIndex.from_frame(final[YIELD_KEYS]).isin(
+            pd.MultiIndex.from_frame(affected_yield[YIELD_KEYS])
+        )
+        final = pd.concat(
+            [final[~stale], updated.reindex(columns=final.columns)],
+            ignore_index=True
+        ).sort_values(YIELD_KEYS, kind='stable').reset_index(drop=True)
+
+        final.to_csv(final_path, index=False)
+        self.final_analysis = final
+
+        logger.info(f"Rewrote {len(updated)} county-crop rows "
+                    f"({touched.shape[0]} counties) in {final_path}")
+
+        return updated
+
+
+def main():
+    """Main execution function."""
+
+    analyzer = VolatilityAnalyzer('data/merged_crop_climate_data.csv')
+
+    # Calculate volatility metrics
+    volatility_data = analyzer.calculate_yield_volatility()
+
+    # Calculate climate trends
+    climate_trends = analyzer.calculate_climate_trends()
+
+    # Merge everything
+    final_analysis = analyzer.merge_volatility_and_trends()
+
+    high_risk = analyzer.identify_high_risk_counties(threshold_cv_change=3.0)
+
+    correlations = analyzer.get_correlation_analysis()
+
+    analyzer.save_results(prefix='data/volatility')
+
+    analyzer.generate_summary_report()
+
+    print("\n" + "="*80)
+    print("VOLATILITY ANALYSIS SUMMARY")
+    print("="*80)
+    print(f"\nTotal county-crop combinations: {len(volatility_data)}")
+    print(f"High-risk combinations (CV increase >3%): {len(high_risk)}")
+
+    print("\n--- Risk Category Distribution ---")
+    print(volatility_data['risk_category'].value_counts())
+
+    print("\n--- Top 10 High-Risk Counties ---")
+    print(high_risk[['county_name', 'state_name', 'crop', 'yield_cv_change']].head(10))
+
+    print("\n--- Top Climate Correlations with Volatility Change ---")
+    print(correlations['yield_cv_change'].head(10))
+
+    print("\n--- Average Changes by Crop ---")
+    print(volatility_data.groupby('crop')[['yield_mean_change', 'yield_cv_change']].mean())
+
+    print("\n" + "="*80)
+    print("Analysis complete! Check the generated files:")
+    print("  - volatility_metrics.csv")
+    print("  - volatility_climate_trends.csv")
+    print("  - volatility_final_analysis.csv")
+    print("  - volatility_analysis_report.txt")
+    print("="*80)
+
+    return analyzer, volatility_data, climate_trends, final_analysis, high_risk
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    analyzer, volatility_data, climate_trends, final_analysis, high_risk = main()
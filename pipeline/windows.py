@@ -0,0 +1,164 @@
+"""
+Sliding-window yield volatility for every county-crop at once.
+
+Yields are accumulated into a dense county-crop x year grid of counts,
+sums and sums of squares, then cumulatively summed along the year axis.
+The mean/std/CV over any window [start, end] is then a difference of two
+columns for every county-crop, so any baseline/comparison pair or every
+rolling window of a given length costs O(county-crops) rather than a
+groupby over the merged dataset.
+
+Values are centered on each county-crop's overall mean before
+accumulating, which keeps the sum-of-squares variance numerically stable.
+"""
+
+import logging
+
+import numpy as np
+
+from pipeline.volatility import INSUFFICIENT_LABEL, YIELD_KEYS, classify_risk
+
+logger = logging.getLogger(__name__)
+
+# Same minimums as VolatilityAnalyzer.calculate_yield_volatility
+MIN_TOTAL_YEARS = 5
+MIN_WINDOW_YEARS = 3
+
+
+class YieldWindows:
+    """Cumulative-sum yield grid answering window statistics for all county-crops."""
+
+    def __init__(self, merged_data, value_col='yield_value'):
+        """
+        Build the grid from merged county-crop-year rows.
+
+        Args:
+            merged_data: DataFrame with YIELD_KEYS, year, value_col and names
+            value_col: Column to compute statistics over
+        """
+        data = merged_data.dropna(subset=[value_col])
+        groups = data.groupby(YIELD_KEYS, sort=True)
+        key_codes = groups.ngroup().to_numpy()
+        self.keys = groups[['county_name', 'state_name']].first().reset_index()
+        self.years = np.arange(data['year'].min(), data['year'].max() + 1)
+        year_codes = data['year'].to_numpy() - self.years[0]
+
+        n_keys, n_years = len(self.keys), len(self.years)
+        values = data[value_col].to_numpy(dtype=float)
+
+        # Per-key center for numerical stability
+        counts_per_key = np.bincount(key_codes, minlength=n_keys)
+        self.center = np.bincount(key_codes, weights=values, minlength=n_keys) / counts_per_key
+        centered = values - self.center[key_codes]
+
+        cell = key_codes * n_years + year_codes
+        size = n_keys * n_years
+        grids = [
+            np.bincount(cell, minlength=size),
+            np.bincount(cell, weights=centered, minlength=size),
+            np.bincount(cell, weights=centered ** 2, minlength=size),
+        ]
+
+        # Leading zero column so window [i, j) is cum[:, j] - cum[:, i]
+        self._count, self._sum, self._sumsq = [
+            np.concatenate([np.zeros((n_keys, 1)), np.cumsum(g.reshape(n_keys, n_years), axis=1)], axis=1)
+            for g in grids
+        ]
+
+        logger.info(f"Built yield window grid: {n_keys} county-crops x {n_years} years")
+
+    def _column(self, year):
+        """Cumulative-sum column index for the start of `year`, clipped to the grid."""
+        return int(np.clip(year - self.years[0], 0, len(self.years)))
+
+    def _moments(self, n, total, sumsq, center):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / n
+            var = (sumsq - total * mean) / (n - 1)
+            std = np.sqrt(np.maximum(var, 0))
+            std = np.where(n > 1, std, np.nan)
+            mean = mean + center
+            cv = std / mean * 100
+        return mean, std, cv
+
+    def window_stats(self, start, end):
+        """
+        Mean, std (ddof=1) and CV over years start..end (inclusive) for every county-crop.
+
+        Returns:
+            Dict of arrays aligned with self.keys: n_years, mean, std, cv
+        """
+        i, j = self._column(start), self._column(end + 1)
+        n = self._count[:, j] - self._count[:, i]
+        mean, std, cv = self._moments(n, self._sum[:, j] - self._sum[:, i],
+                                      self._sumsq[:, j] - self._sumsq[:, i], self.center)
+        return {'n_years': n.astype(int), 'mean': mean, 'std': std, 'cv': cv}
+
+    def rolling(self, length, min_years=2):
+        """
+        Trailing windows of `length` years ending in every year, for every county-crop.
+
+        Returns:
+            (end_years, stats) where stats holds (county-crops x years) arrays
+            n_years, mean, std and cv; windows with fewer than min_years
+            observations are NaN
+        """
+        ends = np.arange(1, len(self.years) + 1)
+        starts = np.maximum(ends - length, 0)
+        n = self._count[:, ends] - self._count[:, starts]
+        mean, std, cv = self._moments(n, self._sum[:, ends] - self._sum[:, starts],
+                                      self._sumsq[:, ends] - self._sumsq[:, starts], self.center[:, None])
+        short = n < min_years
+        for values in (mean, std, cv):
+            values[short] = np.nan
+        return self.years, {'n_years': n.astype(int), 'mean': mean, 'std': std, 'cv': cv}
+
+    def compare(self, baseline=(2005, 2014), comparison=(2015, 2023),
+                min_years=MIN_WINDOW_YEARS, min_total_years=MIN_TOTAL_YEARS):
+        """
+        Baseline vs comparison window volatility and risk for every county-crop.
+
+        Column names follow volatility_final_analysis.csv (early_* is the
+        baseline window, late_* the comparison window).
+
+        Args:
+            baseline: (start_year, end_year) inclusive
+            comparison: (start_year, end_year) inclusive
+            min_years: Minimum observations in each window
+            min_total_years: County-crops with fewer observations overall are dropped
+
+        Returns:
+            DataFrame with one row per county-crop
+        """
+        early = self.window_stats(*baseline)
+        late = self.window_stats(*comparison)
+        total = self._count[:, -1]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = self.keys.assign(
+                early_yield_mean=early['mean'],
+                early_yield_std=early['std'],
+                early_yield_cv=early['cv'],
+                early_n_years=early['n_years'],
+                late_yield_mean=late['mean'],
+                late_yield_std=late['std'],
+                late_yield_cv=late['cv'],
+                late_n_years=late['n_years'],
+                yield_mean_change=late['mean'] - early['mean'],
+                yield_std_change=late['std'] - early['std'],
+                yield_cv_change=late['cv'] - early['cv'],
+            )
+
+        enough = (early['n_years'] >= min_years) & (late['n_years'] >= min_years)
+        change_cols = [c for c in result.columns if c.startswith(('early_yield', 'late_yield', 'yield_'))]
+        result.loc[~enough, change_cols] = np.nan
+        result['risk_category'] = np.where(enough, classify_risk(result['yield_cv_change']), INSUFFICIENT_LABEL)
+
+        return result[total >= min_total_years].reset_index(drop=True)
+
+    def key_position(self, state_fp, county_fp, crop):
+        """Row of a county-crop in self.keys and the stats arrays, or None."""
+        match = np.flatnonzero((self.keys['state_fp'].to_numpy() == state_fp) &
+                               (self.keys['county_fp'].to_numpy() == county_fp) &
+                               (self.keys['crop'].to_numpy() == crop))
+        return int(match[0]) if len(match) else None